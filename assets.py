@@ -0,0 +1,223 @@
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import re
+import shutil
+import sys
+
+try:
+    import brotli
+except ImportError:  # staat in requirements.txt; zonder brotli alleen .gz varianten
+    brotli = None
+
+# Build stap voor statische bestanden: minify, content-hash in de bestandsnaam
+# en vooraf gecomprimeerde .gz/.br varianten in dist/. De webserver serveert
+# daarna de gecomprimeerde variant met een ETag en 'immutable' caching.
+#
+#   python assets.py
+
+DIST_DIR = os.environ.get('ASSETS_DIST', 'dist')
+MANIFEST = 'manifest.json'
+STATIC_PREFIX = '/static/'
+
+# bestanden die een fingerprint krijgen (de templates verwijzen ernaar)
+FINGERPRINTED = ['style.css', 'app.js']
+IMAGE_DIR = 'images'
+# Jinja templates waarin verwijzingen naar gefingerprinte bestanden herschreven worden;
+# de webserver laadt ze uit dist/templates in plaats van templates/
+TEMPLATE_DIR = 'templates'
+PAGES = ['index.html', 'catalogue_cards.html']
+
+COMPRESSIBLE = ('.css', '.js', '.html', '.svg', '.json')
+MIN_COMPRESS_BYTES = 512
+
+IMMUTABLE = 'public, max-age=31536000, immutable'
+REVALIDATE = 'no-cache'
+
+
+# -------------------------
+# Minify (conservatief: alleen commentaar en witruimte)
+# -------------------------
+def minify_css(text):
+    text = re.sub(r"/\*.*?\*/", "", text, flags=re.DOTALL)
+    text = re.sub(r"\s+", " ", text)
+    text = re.sub(r"\s*([{};,>])\s*", r"\1", text)
+    # alleen witruimte ná ':' weghalen; ervoor kan het een descendant selector zijn (".a :hover")
+    text = re.sub(r":\s+", ":", text)
+    return text.replace(";}", "}").strip()
+
+
+def minify_lines(text):
+    """Verwijder inspringing en lege regels (veilig voor HTML en JS)"""
+    lines = (line.strip() for line in text.splitlines())
+    return "\n".join(line for line in lines if line)
+
+
+def _minify(name, data):
+    if name.endswith('.css'):
+        return minify_css(data.decode('utf-8')).encode('utf-8')
+    if name.endswith(('.js', '.html')):
+        return minify_lines(data.decode('utf-8')).encode('utf-8')
+    return data
+
+
+# -------------------------
+# Build
+# -------------------------
+def _fingerprint(name, data):
+    digest = hashlib.sha256(data).hexdigest()[:12]
+    base, ext = os.path.splitext(name)
+    return f"{base}.{digest}{ext}"
+
+
+def _write(path, data, compress=True):
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with open(path, 'wb') as f:
+        f.write(data)
+    if compress and path.endswith(COMPRESSIBLE) and len(data) >= MIN_COMPRESS_BYTES:
+        with open(path + '.gz', 'wb') as f:
+            f.write(gzip.compress(data, compresslevel=9, mtime=0))
+        if brotli is not None:
+            with open(path + '.br', 'wb') as f:
+                f.write(brotli.compress(data, quality=11))
+
+
+def _rewrite_references(text, mapping):
+    """Vervang verwijzingen als style.css of images/x.png door hun gefingerprinte /static/ URL"""
+    names = sorted(mapping, key=len, reverse=True)
+    pattern = re.compile(r"(?<![\w./-])/?(" + "|".join(re.escape(n) for n in names) + r")(?![\w.-])")
+    return pattern.sub(lambda m: STATIC_PREFIX + mapping[m.group(1)], text)
+
+
+def build(root='.', dist=DIST_DIR):
+    """Bouw alle assets naar dist/ en retourneer het manifest"""
+    if brotli is None:
+        print("brotli niet geïnstalleerd (pip install brotli): geen .br varianten, clients krijgen alleen gzip",
+              file=sys.stderr)
+    if os.path.isdir(dist):
+        shutil.rmtree(dist)
+    os.makedirs(dist)
+
+    mapping = {}
+    images = []
+    image_root = os.path.join(root, IMAGE_DIR)
+    if os.path.isdir(image_root):
+        for dirpath, _, files in os.walk(image_root):
+            for f in files:
+                images.append(os.path.relpath(os.path.join(dirpath, f), root).replace(os.sep, '/'))
+
+    # eerst de afbeeldingen, zodat verwijzingen in CSS/JS naar hun hash herschreven kunnen worden
+    for name in sorted(images):
+        with open(os.path.join(root, name), 'rb') as f:
+            data = f.read()
+        hashed = _fingerprint(name, data)
+        _write(os.path.join(dist, hashed), data)
+        mapping[name] = hashed
+
+    image_mapping = dict(mapping)
+    for name in FINGERPRINTED:
+        path = os.path.join(root, name)
+        if not os.path.exists(path):
+            continue
+        with open(path, 'r', encoding='utf-8') as f:
+            text = f.read()
+        if image_mapping:
+            text = _rewrite_references(text, image_mapping)
+        data = _minify(name, text.encode('utf-8'))
+        hashed = _fingerprint(name, data)
+        _write(os.path.join(dist, hashed), data)
+        mapping[name] = hashed
+
+    pages = {}
+    for page in PAGES:
+        path = os.path.join(root, TEMPLATE_DIR, page)
+        if not os.path.exists(path):
+            continue
+        with open(path, 'r', encoding='utf-8') as f:
+            text = _rewrite_references(f.read(), mapping)
+        data = _minify(page, text.encode('utf-8'))
+        # templates worden gerenderd, dus geen gecomprimeerde varianten
+        _write(os.path.join(dist, TEMPLATE_DIR, page), data, compress=False)
+        pages[page] = hashlib.sha256(data).hexdigest()[:16]
+
+    manifest = {'assets': mapping, 'pages': pages}
+    with open(os.path.join(dist, MANIFEST), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    return manifest
+
+
+# -------------------------
+# Serving
+# -------------------------
+_manifest_cache = {'mtime': None, 'data': None}
+
+
+def load_manifest(dist=DIST_DIR):
+    """Manifest van de laatste build (herladen als dist/manifest.json wijzigt), of None"""
+    path = os.path.join(dist, MANIFEST)
+    try:
+        mtime = os.path.getmtime(path)
+    except OSError:
+        return None
+    if _manifest_cache['mtime'] != mtime:
+        with open(path, 'r', encoding='utf-8') as f:
+            _manifest_cache['data'] = json.load(f)
+        _manifest_cache['mtime'] = mtime
+    return _manifest_cache['data']
+
+
+def asset_url(name, dist=DIST_DIR):
+    """Gefingerprinte URL van een asset, of het originele pad als er (nog) geen build is"""
+    manifest = load_manifest(dist)
+    hashed = manifest and manifest['assets'].get(name)
+    return STATIC_PREFIX + hashed if hashed else '/' + name
+
+
+def pick_encoding(path, accept_encoding):
+    """(pad, content-encoding) van de beste vooraf gecomprimeerde variant die de client accepteert"""
+    accepted = {e.split(';')[0].strip() for e in (accept_encoding or '').lower().split(',')}
+    for encoding, ext in (('br', '.br'), ('gzip', '.gz')):
+        if encoding in accepted and os.path.exists(path + ext):
+            return path + ext, encoding
+    return path, None
+
+
+def send_built(path, etag, cache_control):
+    """Serveer een gebouwd bestand (gecomprimeerd als mogelijk) met ETag en Cache-Control"""
+    from flask import request, send_file
+
+    mimetype = mimetypes.guess_type(path)[0] or 'application/octet-stream'
+    if mimetype.startswith('text/') or mimetype == 'application/javascript':
+        mimetype += '; charset=utf-8'
+    file_path, encoding = pick_encoding(path, request.headers.get('Accept-Encoding'))
+    response = send_file(
+        os.path.abspath(file_path), mimetype=mimetype, conditional=True,
+        etag=f"{etag}-{encoding}" if encoding else etag
+    )
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    response.headers['Vary'] = 'Accept-Encoding'
+    response.headers['Cache-Control'] = cache_control
+    return response
+
+
+def send_static(filename, dist=DIST_DIR):
+    """Serveer een gefingerprint bestand uit dist/; None als het niet in het manifest staat"""
+    manifest = load_manifest(dist)
+    if not manifest or filename not in manifest['assets'].values():
+        return None
+    base = os.path.splitext(filename)[0]
+    return send_built(os.path.join(dist, filename), base.rsplit('.', 1)[-1], IMMUTABLE)
+
+
+def template_folder(dist=DIST_DIR):
+    """Map met de gebouwde templates (bestaat pas na een build)"""
+    return os.path.abspath(os.path.join(dist, TEMPLATE_DIR))
+
+
+if __name__ == '__main__':
+    target = sys.argv[1] if len(sys.argv) > 1 else DIST_DIR
+    result = build(dist=target)
+    print(f"{len(result['assets'])} assets en {len(result['pages'])} template(s) gebouwd in {target}/")
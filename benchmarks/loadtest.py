@@ -0,0 +1,125 @@
+import argparse
+import http.client
+import multiprocessing
+import os
+import socket
+import subprocess
+import sys
+import time
+
+# Load test voor serve.py: start de server met een oplopend aantal workers en meet
+# requests/sec met meerdere client processen (keep-alive verbindingen).
+#
+#   python benchmarks/loadtest.py --workers 1 2 4 --clients 16 --duration 10
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_PATHS = ['/', '/api/plugins/public', '/api/versions', '/auth-status']
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def _wait_for_server(port, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=2)
+            conn.request('GET', '/auth-status')
+            conn.getresponse().read()
+            conn.close()
+            return True
+        except OSError:
+            time.sleep(0.2)
+    return False
+
+
+def _client(port, paths, duration, results):
+    """Eén client proces: zo veel mogelijk requests binnen duration seconden"""
+    done = errors = 0
+    latencies = []
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+    deadline = time.monotonic() + duration
+    i = 0
+    while time.monotonic() < deadline:
+        path = paths[i % len(paths)]
+        i += 1
+        start = time.perf_counter()
+        try:
+            conn.request('GET', path, headers={'Accept-Encoding': 'gzip'})
+            response = conn.getresponse()
+            response.read()
+            if response.status >= 500:
+                errors += 1
+            else:
+                done += 1
+            latencies.append(time.perf_counter() - start)
+        except (OSError, http.client.HTTPException):
+            errors += 1
+            conn.close()
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+    conn.close()
+    results.put((done, errors, latencies))
+
+
+def run(workers, threads, clients, duration, paths):
+    port = _free_port()
+    env = dict(os.environ)
+    env.pop('WEB_ACCESS_LOG', None)
+    server = subprocess.Popen(
+        [sys.executable, 'serve.py', '--host', '127.0.0.1', '--port', str(port),
+         '--workers', str(workers), '--threads', str(threads)],
+        cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        if not _wait_for_server(port):
+            raise RuntimeError("Server start niet")
+        results = multiprocessing.Queue()
+        procs = [multiprocessing.Process(target=_client, args=(port, paths, duration, results))
+                 for _ in range(clients)]
+        for p in procs:
+            p.start()
+        collected = [results.get() for _ in procs]
+        for p in procs:
+            p.join()
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+    done = sum(c[0] for c in collected)
+    errors = sum(c[1] for c in collected)
+    latencies = sorted(l for c in collected for l in c[2])
+    p50 = latencies[len(latencies) // 2] if latencies else 0
+    p99 = latencies[int(len(latencies) * 0.99)] if latencies else 0
+    return {
+        'workers': workers,
+        'rps': done / duration,
+        'errors': errors,
+        'p50_ms': p50 * 1000,
+        'p99_ms': p99 * 1000,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Requests/sec van serve.py per aantal workers")
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4])
+    parser.add_argument('--threads', type=int, default=4)
+    parser.add_argument('--clients', type=int, default=16)
+    parser.add_argument('--duration', type=float, default=10)
+    parser.add_argument('--path', action='append', dest='paths')
+    args = parser.parse_args(argv)
+
+    paths = args.paths or DEFAULT_PATHS
+    print(f"{'workers':>8} {'req/s':>10} {'p50 ms':>8} {'p99 ms':>8} {'errors':>7}")
+    baseline = None
+    for workers in args.workers:
+        r = run(workers, args.threads, args.clients, args.duration, paths)
+        baseline = baseline or r['rps']
+        print(f"{r['workers']:>8} {r['rps']:>10.1f} {r['p50_ms']:>8.1f} {r['p99_ms']:>8.1f} {r['errors']:>7}"
+              f"  (x{r['rps'] / baseline:.2f})")
+
+
+if __name__ == '__main__':
+    main()
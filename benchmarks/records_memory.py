@@ -0,0 +1,64 @@
+import argparse
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from records import PluginRecord, records_from_rows, rows_from_records  # noqa: E402
+
+# Geheugen van een grote plugin lijst als losse dicts (zoals json.loads ze
+# oplevert) tegenover PluginRecords met __slots__ en geïnternde versies.
+#
+#   python benchmarks/records_memory.py --plugins 100000
+
+VERSIONS = ['1.16.5', '1.17.1', '1.18.2', '1.19.4', '1.20', '1.20.1', '1.20.4', '1.20.6', '1.21', '1.21.1']
+
+
+def _rows_json(count):
+    """Eén JSON document per row, zodat elke dict zijn eigen strings heeft (zoals in storage.py)"""
+    return [json.dumps({
+        'url': f"https://modrinth.com/plugin/plugin-{i}",
+        'title': f"Plugin {i}",
+        'description': f"Beschrijving van plugin {i}",
+        'author': f"author-{i % 5000}",
+        'icon': f"/icons/{i:064x}",
+        'versions': VERSIONS[i % 4:i % 4 + 6],
+        'owner': f"user-{i % 1000}",
+    }) for i in range(count)]
+
+
+def _measure(build):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = build()
+    elapsed = time.perf_counter() - start
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, size, elapsed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Geheugen benchmark: dicts vs PluginRecords")
+    parser.add_argument('--plugins', type=int, default=100000)
+    args = parser.parse_args(argv)
+
+    documents = _rows_json(args.plugins)
+
+    dicts, dict_size, dict_time = _measure(lambda: [json.loads(d) for d in documents])
+    records, record_size, record_time = _measure(lambda: records_from_rows([json.loads(d) for d in documents]))
+
+    # round trip: de API serialiseert records weer naar dezelfde rows
+    assert rows_from_records(records) == dicts
+    assert records[0] == PluginRecord.from_json(documents[0])
+
+    print(f"{args.plugins} plugins")
+    print(f"dicts:         {dict_size / 1e6:8.1f} MB  ({dict_size / args.plugins:6.0f} B/plugin, {dict_time:.2f}s)")
+    print(f"PluginRecords: {record_size / 1e6:8.1f} MB  ({record_size / args.plugins:6.0f} B/plugin, {record_time:.2f}s)")
+    print(f"besparing:     {(1 - record_size / dict_size) * 100:8.1f} %")
+
+
+if __name__ == '__main__':
+    main()
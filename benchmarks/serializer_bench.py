@@ -0,0 +1,100 @@
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import serializer  # noqa: E402
+import storage  # noqa: E402
+
+# JSON encode/decode van de volledige plugins table: de stdlib json module
+# (zoals voorheen) tegenover serializer.py, plus /api/plugins/public met en
+# zonder voorgecodeerde response. De table wordt herhaald tot --rows rows.
+#
+#   python benchmarks/serializer_bench.py --rows 20000
+
+
+def _load_table(rows):
+    path = os.path.join(ROOT, 'soketDB', 'plugin-craft-db', 'plugins.json')
+    with open(path, 'rb') as f:
+        table = serializer.loads(f.read())
+    if not table:
+        table = [{'url': 'https://modrinth.com/plugin/x', 'title': 'X', 'versions': ['1.21']}]
+    result = []
+    while len(result) < rows:
+        for row in table[:rows - len(result)]:
+            result.append(dict(row, url=f"{row.get('url')}-{len(result)}"))
+    return result
+
+
+def _timed(fn, repeat):
+    fn()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat
+
+
+def _stdlib_dump(rows):
+    return ("[\n" + ",\n".join(json.dumps(row, ensure_ascii=False) for row in rows) + "\n]\n").encode('utf-8')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="JSON benchmark: stdlib json vs serializer.py")
+    parser.add_argument('--rows', type=int, default=20000)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--requests', type=int, default=50)
+    args = parser.parse_args(argv)
+
+    rows = _load_table(args.rows)
+    old_bytes = _stdlib_dump(rows)
+    new_bytes = storage.dump_rows(rows)
+    assert json.loads(old_bytes) == serializer.loads(new_bytes) == rows
+
+    print(f"{len(rows)} rows, backend: {serializer.BACKEND}")
+    print(f"table bestand:   stdlib {len(old_bytes) / 1e6:6.2f} MB, compact {len(new_bytes) / 1e6:6.2f} MB")
+    results = [
+        ("table encode", lambda: _stdlib_dump(rows), lambda: storage.dump_rows(rows)),
+        ("table decode", lambda: json.loads(old_bytes), lambda: serializer.loads(new_bytes)),
+    ]
+    for name, old, new in results:
+        old_t, new_t = _timed(old, args.repeat), _timed(new, args.repeat)
+        print(f"{name}:    stdlib {old_t * 1000:8.1f} ms, serializer {new_t * 1000:8.1f} ms ({old_t / new_t:4.1f}x)")
+
+    # API: zelfde table via de webserver in een tijdelijke database
+    root = tempfile.mkdtemp(prefix='serializer-bench-')
+    try:
+        os.environ['DB_ROOT'] = root
+        os.environ.setdefault('SECRET_KEY', 'bench')
+        storage.DB_ROOT = root
+        import webserver
+        from flask import jsonify
+        from records import rows_from_records
+
+        storage.database('plugin-craft-db', root=root).execute(f"INSERT INTO plugins DATA={serializer.dumps(rows)}")
+        webserver.db = storage.database('plugin-craft-db', root=root)
+        client = webserver.app.test_client()
+
+        def uncached():
+            # het oude pad: rows laden en per request opnieuw encoderen via jsonify
+            with webserver.app.test_request_context():
+                return jsonify(rows_from_records(webserver.load_public_plugins())).get_data()
+
+        def cached():
+            return client.get('/api/plugins/public').get_data()
+
+        assert serializer.loads(uncached()) == serializer.loads(cached())
+        old_t, new_t = _timed(uncached, args.requests // 5 or 1), _timed(cached, args.requests)
+        print(f"/api/plugins/public: jsonify per request {old_t * 1000:8.1f} ms, voorgecodeerd {new_t * 1000:8.2f} ms "
+              f"({old_t / new_t:.0f}x)")
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
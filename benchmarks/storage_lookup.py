@@ -0,0 +1,91 @@
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import storage  # noqa: E402
+
+# Single-row lookups op een grote plugins table: de mmap + offset index route
+# (storage.Database._lookup) tegenover het volledig decoderen van de table.
+#
+#   python benchmarks/storage_lookup.py --rows 200000
+
+
+def _generate(db, rows):
+    plugins = [{
+        'url': f"https://modrinth.com/plugin/plugin-{i}",
+        'title': f"Plugin {i}",
+        'description': "Een plugin met een beschrijving van gemiddelde lengte " * 3,
+        'author': f"author-{i % 5000}",
+        'icon': f"/icons/{i:064x}",
+        'versions': ['1.19.4', '1.20', '1.20.6', '1.21'],
+        'owner': f"user-{i % 1000}",
+    } for i in range(rows)]
+    db.execute(f"INSERT INTO plugins DATA={json.dumps(plugins)}")
+
+
+def _timed(fn, repeat=1):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    return (time.perf_counter() - start) / repeat, result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Lookup benchmark voor storage.py")
+    parser.add_argument('--rows', type=int, default=200000)
+    parser.add_argument('--lookups', type=int, default=200)
+    args = parser.parse_args(argv)
+
+    root = tempfile.mkdtemp(prefix='storage-lookup-')
+    try:
+        _generate(storage.database('bench', root=root), args.rows)
+        size = os.path.getsize(os.path.join(root, 'bench', 'plugins.json'))
+        print(f"{args.rows} rows, {size / 1e6:.1f} MB")
+
+        def lookup(i):
+            return f"SELECT * FROM plugins WHERE url = 'https://modrinth.com/plugin/plugin-{i}'"
+
+        # index route, verse Database (geen geparste table in het geheugen)
+        db = storage.database('bench', root=root)
+        first, result = _timed(lambda: db.execute(lookup(args.rows // 2)))
+        assert len(result) == 1
+        warm, _ = _timed(lambda: db.execute(lookup(args.rows // 3)), repeat=args.lookups)
+        db.execute("SELECT * FROM plugins WHERE owner = 'user-1'")
+        owner, result = _timed(lambda: db.execute("SELECT * FROM plugins WHERE owner = 'user-7'"), repeat=20)
+
+        # volledige decode per lookup (het oude gedrag)
+        def full_scan():
+            with open(os.path.join(root, 'bench', 'plugins.json'), 'r', encoding='utf-8') as f:
+                rows = json.load(f)
+            return [r for r in rows if r['url'] == f"https://modrinth.com/plugin/plugin-{args.rows // 3}"]
+
+        scan, _ = _timed(full_scan, repeat=3)
+
+        # geheugen apart meten: tracemalloc vertraagt de timings
+        tracemalloc.start()
+        storage.database('bench', root=root).execute(lookup(1))
+        index_peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        tracemalloc.start()
+        full_scan()
+        scan_peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+        print(f"eerste lookup (bouwt de kolom index):  {first * 1000:8.1f} ms")
+        print(f"warme lookup op url:                   {warm * 1e6:8.1f} us")
+        print(f"warme lookup op owner ({len(result)} rows):     {owner * 1000:8.2f} ms")
+        print(f"volledige decode + filter:             {scan * 1000:8.1f} ms")
+        print(f"piek geheugen index route: {index_peak / 1e6:.1f} MB, volledige decode: {scan_peak / 1e6:.1f} MB")
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
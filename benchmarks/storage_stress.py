@@ -0,0 +1,134 @@
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import shutil
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from storage import database  # noqa: E402
+
+# Concurrency stress test voor storage.py: meerdere processen met elk meerdere
+# threads voegen plugins toe en verwijderen ze weer (zoals add_user_plugin /
+# delete_user_plugin), verhogen een gedeelde teller via transaction() en lezen
+# continu mee. Aan het eind moet elke verwachte row er precies één keer zijn,
+# mag geen enkele verwijderde row terugkomen en moet de teller exact kloppen.
+#
+#   python benchmarks/storage_stress.py --processes 4 --threads 8 --ops 200
+
+
+def _quote(value):
+    return "'" + str(value).replace("'", "''") + "'"
+
+
+def _worker_thread(root, proc, thread, ops, errors):
+    db = database('stress', root=root)
+    owner = f"p{proc}t{thread}"
+    rng = random.Random(proc * 1000 + thread)
+    try:
+        for i in range(ops):
+            url = f"https://modrinth.com/plugin/{owner}-{i}"
+            row = {'url': url, 'owner': owner, 'title': f"it's {i}", 'versions': ['1.20', '1.21']}
+            db.execute(f"INSERT INTO plugins DATA={json.dumps(row)}")
+            # oneven rows weer verwijderen, zoals delete_user_plugin
+            if i % 2:
+                count = db.execute(f"DELETE FROM plugins WHERE owner = {_quote(owner)} AND url = {_quote(url)}")
+                if count != 1:
+                    errors.append(f"{owner}: DELETE van {url} raakte {count} rows")
+            # read-modify-write op een gedeelde row: verloren updates zijn hier direct zichtbaar
+            with db.transaction('counters') as rows:
+                rows[0]['n'] += 1
+            if rng.random() < 0.1:
+                mine = db.execute(f"SELECT url FROM plugins WHERE owner = {_quote(owner)}")
+                if len(mine) != i // 2 + 1:
+                    errors.append(f"{owner}: {len(mine)} rows gezien na {i + 1} inserts")
+    except Exception as e:
+        errors.append(f"{owner}: {type(e).__name__}: {e}")
+
+
+def _reader_thread(root, stop, errors):
+    """Leest de raw bestanden zonder lock: dankzij de atomic rename altijd geldige JSON"""
+    path = os.path.join(root, 'stress', 'plugins.json')
+    while not stop.is_set():
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                json.load(f)
+        except FileNotFoundError:
+            pass
+        except ValueError as e:
+            errors.append(f"reader: half geschreven bestand: {e}")
+        time.sleep(0.001)
+
+
+def _process(root, proc, threads, ops, results):
+    errors = []
+    stop = threading.Event()
+    reader = threading.Thread(target=_reader_thread, args=(root, stop, errors))
+    reader.start()
+    workers = [threading.Thread(target=_worker_thread, args=(root, proc, t, ops, errors)) for t in range(threads)]
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    stop.set()
+    reader.join()
+    results.put(errors)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Concurrency stress test voor storage.py")
+    parser.add_argument('--processes', type=int, default=4)
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--ops', type=int, default=100, help="inserts per thread")
+    args = parser.parse_args(argv)
+
+    root = tempfile.mkdtemp(prefix='storage-stress-')
+    try:
+        database('stress', root=root).execute('INSERT INTO counters DATA={"n": 0}')
+        start = time.perf_counter()
+        results = multiprocessing.Queue()
+        procs = [multiprocessing.Process(target=_process, args=(root, p, args.threads, args.ops, results))
+                 for p in range(args.processes)]
+        for p in procs:
+            p.start()
+        errors = [e for _ in procs for e in results.get()]
+        for p in procs:
+            p.join()
+        elapsed = time.perf_counter() - start
+
+        db = database('stress', root=root)
+        rows = db.execute("SELECT url FROM plugins")
+        urls = [r['url'] for r in rows]
+        expected = {
+            f"https://modrinth.com/plugin/p{p}t{t}-{i}"
+            for p in range(args.processes) for t in range(args.threads) for i in range(0, args.ops, 2)
+        }
+        if len(urls) != len(set(urls)):
+            errors.append(f"{len(urls) - len(set(urls))} dubbele rows")
+        if set(urls) != expected:
+            errors.append(f"{len(expected - set(urls))} verloren rows, {len(set(urls) - expected)} onverwachte rows")
+        counter = db.execute("SELECT n FROM counters")[0]['n']
+        total_ops = args.processes * args.threads * args.ops
+        if counter != total_ops:
+            errors.append(f"teller {counter} in plaats van {total_ops} (verloren updates)")
+        if [f for f in os.listdir(os.path.join(root, 'stress')) if f.startswith('.tmp-')]:
+            errors.append("achtergebleven temp files")
+
+        statements = total_ops * 2 + total_ops // 2
+        print(f"{args.processes} processen x {args.threads} threads, {statements} schrijvende statements "
+              f"in {elapsed:.1f}s ({statements / elapsed:.0f}/s), {len(urls)} rows over")
+        for error in errors[:20]:
+            print(f"FOUT: {error}")
+        print("OK" if not errors else f"{len(errors)} fout(en)")
+        return 0 if not errors else 1
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
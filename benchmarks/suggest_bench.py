@@ -0,0 +1,104 @@
+import argparse
+import gc
+import os
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from records import PluginRecord  # noqa: E402
+from suggest import SuggestIndex  # noqa: E402
+
+# Latency van /api/plugins/suggest (SuggestIndex.suggest) bij een grote catalogus:
+# korte prefixen, hele woorden, meerdere woorden en typo's, plus de kosten van
+# een incrementele update.
+#
+#   python benchmarks/suggest_bench.py --plugins 100000
+
+WORDS = ['luck', 'perms', 'essentials', 'world', 'edit', 'guard', 'vault', 'chat', 'core', 'shop', 'economy',
+         'land', 'claim', 'skin', 'rest', 'auth', 'holo', 'graphic', 'display', 'mob', 'stack', 'spawn', 'ranks',
+         'quest', 'craft', 'anti', 'cheat', 'protect', 'teleport', 'warp', 'home', 'kit', 'crate', 'vote', 'party',
+         'mcmmo', 'citizens', 'dungeon', 'boss', 'pet', 'backpack', 'tab', 'scoreboard', 'nametag', 'discord', 'sync']
+QUERIES = ['l', 'lu', 'luc', 'luck', 'luckp', 'ess', 'essentials c', 'world ed', 'w', 'mob st', 'disc', 'tele',
+           'luckprems', 'esentials', 'wrld', 'scorebord', 'dev-17', 'plugin 4242']
+
+
+def _records(count, seed=1):
+    rng = random.Random(seed)
+    for i in range(count):
+        words = rng.sample(WORDS, rng.randint(1, 3))
+        title = ''.join(w.capitalize() for w in words) if rng.random() < 0.5 else ' '.join(w.capitalize() for w in words)
+        if rng.random() < 0.3:
+            title += f" {i}"
+        record = PluginRecord(url=f"https://modrinth.com/plugin/plugin-{i}", title=title,
+                              author=f"dev-{i % 5000}", icon=f"/icons/{i:064x}")
+        yield f"modrinth:plugin-{i}", record, rng.randint(0, 50), False
+
+
+def _percentiles(samples):
+    samples = sorted(samples)
+    return statistics.median(samples), samples[int(len(samples) * 0.99) - 1], samples[-1]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Typeahead benchmark: SuggestIndex latency")
+    parser.add_argument('--plugins', type=int, default=100000)
+    parser.add_argument('--rounds', type=int, default=50)
+    args = parser.parse_args(argv)
+
+    records = list(_records(args.plugins))
+    start = time.perf_counter()
+    index = SuggestIndex.build(records)
+    build_time = time.perf_counter() - start
+    # zoals webserver.py na een opbouw: de index buiten de cyclische GC houden, anders
+    # betaalt de eerste query na de opbouw een volledige GC over alle index objecten
+    gc.freeze()
+    print(f"{args.plugins} plugins: opbouw {build_time:.2f}s")
+
+    print(f"{'query':<16} {'eerste':>9} {'p50':>9} {'p99':>9} {'max':>9}  top resultaat")
+    for query in QUERIES:
+        start = time.perf_counter()
+        result = index.suggest(query)
+        first = time.perf_counter() - start
+        samples = []
+        for _ in range(args.rounds):
+            start = time.perf_counter()
+            index.suggest(query)
+            samples.append(time.perf_counter() - start)
+        p50, p99, worst = _percentiles(samples)
+        top = result[0]['title'] if result else '-'
+        print(f"{query:<16} {first * 1e3:7.2f}ms {p50 * 1e3:7.2f}ms {p99 * 1e3:7.2f}ms {worst * 1e3:7.2f}ms  {top}")
+
+    # incrementeel: een refresh van cron.py wijzigt projecten terwijl er gezocht wordt
+    rng = random.Random(2)
+    samples = []
+    for key, record, owners, public in rng.sample(records, 1000):
+        record = record.replace(title=record.title + ' Reloaded')
+        start = time.perf_counter()
+        index.update(key, record, owners + 1, public)
+        samples.append(time.perf_counter() - start)
+    p50, p99, worst = _percentiles(samples)
+    print(f"update (1000x): p50 {p50 * 1e3:.2f}ms, p99 {p99 * 1e3:.2f}ms, max {worst * 1e3:.2f}ms")
+    samples = []
+    for query in QUERIES:
+        start = time.perf_counter()
+        index.suggest(query)
+        samples.append(time.perf_counter() - start)
+    p50, p99, worst = _percentiles(samples)
+    print(f"queries na updates: p50 {p50 * 1e3:.2f}ms, max {worst * 1e3:.2f}ms")
+
+    # geheugen apart gemeten: na tracemalloc.stop() kost de eerste allocatie tot ~100 ms,
+    # wat anders in de latency van de eerste query zou vallen
+    del index
+    tracemalloc.start()
+    index = SuggestIndex.build(records)
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    print(f"geheugen van de index: {size / 1e6:.1f} MB")
+
+
+if __name__ == '__main__':
+    main()
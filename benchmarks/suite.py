@@ -0,0 +1,373 @@
+import argparse
+import io
+import json
+import multiprocessing
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# Reproduceerbare benchmark suite. Per schaal (aantal plugins) een tijdelijke
+# plugin-craft-db met synthetische gebruikers en plugins, en daartegen:
+#   - webserver routes via de Flask test client (latency en sequentiële req/s;
+#     HTTP throughput per worker aantal meet benchmarks/loadtest.py)
+#   - storage operaties direct op storage.py / projects.py
+# Daarnaast de fetch pipeline (launcher.py + fetchers + icon mirror) tegen een
+# lokale stand-in server die de upstream responses uit fixtures/upstream.json
+# teruggeeft (spiget, Modrinth, Hangar, CurseForge).
+#
+# Elke run schrijft een resultaten bestand; --compare zet twee runs naast elkaar.
+#
+#   python benchmarks/suite.py --scales 1000 10000 100000
+#   python benchmarks/suite.py --scales 1000 --compare benchmarks/results/<eerdere run>.json
+
+RESULTS_DIR = os.path.join(ROOT, 'benchmarks', 'results')
+FIXTURES = os.path.join(ROOT, 'benchmarks', 'fixtures', 'upstream.json')
+
+# plugins per gebruiker in de synthetische data
+PLUGINS_PER_USER = 10
+PASSWORD = 'benchmark-wachtwoord'
+
+FETCH_URLS = [
+    'https://modrinth.com/plugin/luckperms',
+    'https://www.spigotmc.org/resources/luckperms.28140/',
+    'https://hangar.papermc.io/LuckPerms/LuckPerms',
+    'https://www.curseforge.com/minecraft/mc-mods/jei',
+]
+
+
+# -------------------------
+# Meten
+# -------------------------
+def _stats(times, total):
+    times = sorted(times)
+
+    def pct(p):
+        return times[min(len(times) - 1, int(len(times) * p))] * 1000
+
+    return {
+        'n': len(times),
+        'mean_ms': round(sum(times) / len(times) * 1000, 3),
+        'p50_ms': round(pct(0.50), 3),
+        'p95_ms': round(pct(0.95), 3),
+        'p99_ms': round(pct(0.99), 3),
+        'max_ms': round(times[-1] * 1000, 3),
+        'per_s': round(len(times) / total, 1) if total else None,
+    }
+
+
+def _measure(fn, n, setup=None):
+    """fn(i) n keer; setup(i) (niet meegeteld) vooraf, bv. om een cache te legen"""
+    times = []
+    total = 0.0
+    for i in range(n):
+        if setup is not None:
+            setup(i)
+        start = time.perf_counter()
+        fn(i)
+        elapsed = time.perf_counter() - start
+        times.append(elapsed)
+        total += elapsed
+    return _stats(times, total)
+
+
+def _expect(response, status=200):
+    if response.status_code != status:
+        raise RuntimeError(f"{response.request.path}: status {response.status_code} in plaats van {status}")
+    return response
+
+
+# -------------------------
+# Synthetische data
+# -------------------------
+def _generate(db, scale):
+    """scale projecten, scale / PLUGINS_PER_USER gebruikers met elk PLUGINS_PER_USER koppelingen"""
+    import projects
+    from records import PluginRecord
+    from webserver import hash_password
+
+    users = max(1, scale // PLUGINS_PER_USER)
+    versions = ['1.19.4', '1.20', '1.20.1', '1.20.4', '1.20.6', '1.21', '1.21.1']
+    rows = []
+    links = []
+    for i in range(scale):
+        record = PluginRecord(
+            url=f"https://modrinth.com/plugin/bench-{i}",
+            title=f"Benchmark plugin {i}",
+            description=f"Synthetische plugin {i} voor de benchmark suite",
+            author=f"author-{i % 997}",
+            icon=f"/icons/{i:064x}",
+            versions=versions[i % 3:i % 3 + 4],
+        )
+        rows.append(dict(record.to_dict(), project_id=record.key))
+        links.append({'owner': f"user-{i % users}", 'project_id': record.key})
+    db.execute(f"INSERT INTO {projects.PROJECTS} DATA={json.dumps(rows)}")
+    db.execute(f"INSERT INTO {projects.LINKS} DATA={json.dumps(links)}")
+    password = hash_password(PASSWORD)
+    accounts = [{'username': f"user-{u}", 'password': password, 'role': 'user'} for u in range(users)]
+    accounts.append({'username': 'bench-admin', 'password': password, 'role': 'admin'})
+    db.execute(f"INSERT INTO users DATA={json.dumps(accounts)}")
+    db.execute('INSERT INTO settings DATA={"registration_enabled": true}')
+    return users
+
+
+# -------------------------
+# Webserver + storage per schaal (in een eigen proces)
+# -------------------------
+def _run_scale(scale, requests, root, queue):
+    try:
+        # env vóór de imports: webserver en storage lezen hun paden bij het importeren
+        os.environ['DB_ROOT'] = root
+        os.environ['SECRET_KEY'] = 'benchmark'
+        os.environ['JOBQUEUE_PATH'] = os.path.join(root, 'jobs.db')
+        os.environ['ICON_DIR'] = os.path.join(root, 'icon-cache')
+        os.chdir(ROOT)
+
+        import storage
+        import projects
+        db = storage.database('plugin-craft-db', root=root)
+        started = time.perf_counter()
+        users = _generate(db, scale)
+        generate_s = time.perf_counter() - started
+
+        import webserver
+        writes = max(5, requests // 10)
+        results = {}
+
+        client = webserver.app.test_client()
+        _expect(client.post('/login', json={'username': 'user-0', 'password': PASSWORD}))
+        admin = webserver.app.test_client()
+        _expect(admin.post('/login', json={'username': 'bench-admin', 'password': PASSWORD}))
+
+        results['GET /api/plugins/public (cold)'] = _measure(
+            lambda i: _expect(client.get('/api/plugins/public')), max(3, writes // 2),
+            setup=lambda i: webserver.invalidate_catalogue())
+        results['GET /api/plugins/public'] = _measure(
+            lambda i: _expect(client.get('/api/plugins/public')), requests)
+        results['GET /api/plugins/public?version=1.21'] = _measure(
+            lambda i: _expect(client.get('/api/plugins/public?version=1.21')), requests)
+        results['GET /api/plugins'] = _measure(lambda i: _expect(client.get('/api/plugins')), requests)
+        results['POST /login'] = _measure(lambda i: _expect(webserver.app.test_client().post(
+            '/login', json={'username': f"user-{i % users}", 'password': PASSWORD})), requests)
+        results['GET /admin/users'] = _measure(lambda i: _expect(admin.get('/admin/users')), writes)
+
+        def add(i):
+            data = {'url': f"https://modrinth.com/plugin/bench-new-{i}", 'title': f"Nieuw {i}", 'versions': ['1.21']}
+            _expect(client.post('/add_plugin', json={'plugin_data': data}))
+
+        def delete(i):
+            _expect(client.post('/delete_plugin', json={'url': f"https://modrinth.com/plugin/bench-new-{i}"}))
+
+        results['POST /add_plugin'] = _measure(add, writes)
+        results['POST /delete_plugin'] = _measure(delete, writes)
+
+        middle = scale // 2
+        results['storage: SELECT project op key'] = _measure(
+            lambda i: db.execute(f"SELECT * FROM projects WHERE project_id = 'modrinth:bench-{(middle + i) % scale}'"),
+            requests)
+        results['storage: SELECT koppelingen van owner'] = _measure(
+            lambda i: db.execute(f"SELECT * FROM user_plugins WHERE owner = 'user-{i % users}'"), requests)
+        results['storage: SELECT * FROM projects'] = _measure(lambda i: db.execute("SELECT * FROM projects"), writes)
+        results['projects.load_plugins'] = _measure(lambda i: projects.load_plugins(db), writes)
+        results['storage: INSERT + DELETE users row'] = _measure(lambda i: (
+            db.execute(f'INSERT INTO users DATA={{"username": "tmp-{i}", "password": "x", "role": "user"}}'),
+            db.execute(f"DELETE FROM users WHERE username = 'tmp-{i}'"),
+        ), writes)
+
+        queue.put({'scale': scale, 'users': users, 'generate_s': round(generate_s, 2), 'results': results})
+    except Exception as e:
+        queue.put({'scale': scale, 'error': f"{type(e).__name__}: {e}"})
+
+
+def run_scale(scale, requests):
+    root = tempfile.mkdtemp(prefix=f'bench-{scale}-')
+    try:
+        # spawn: een schone interpreter per schaal (geen gedeelde module state of caches)
+        ctx = multiprocessing.get_context('spawn')
+        queue = ctx.Queue()
+        proc = ctx.Process(target=_run_scale, args=(scale, requests, root, queue))
+        proc.start()
+        result = queue.get()
+        proc.join()
+        return result
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+# -------------------------
+# Fetch pipeline tegen een lokale stand-in server
+# -------------------------
+def _icon_bytes():
+    try:
+        from PIL import Image
+    except ImportError:
+        # 1x1 PNG
+        return bytes.fromhex('89504e470d0a1a0a0000000d4948445200000001000000010806000000'
+                             '1f15c4890000000d49444154789c6360f8cf000000030101001868dd8d0000000049454e44ae426082')
+    buf = io.BytesIO()
+    Image.new('RGBA', (256, 256), (90, 140, 200, 255)).save(buf, 'PNG')
+    return buf.getvalue()
+
+
+class _StandIn(BaseHTTPRequestHandler):
+    """Geeft de responses uit fixtures/upstream.json terug (pad zonder query string)"""
+
+    fixtures = {}
+    icon = b''
+    requests = 0
+
+    def do_GET(self):
+        type(self).requests += 1
+        path = urlparse(self.path).path
+        if path.startswith('/icons/'):
+            body, content_type = self.icon, 'image/png'
+        elif path in self.fixtures:
+            body, content_type = self.fixtures[path], 'application/json'
+        else:
+            self.send_error(404)
+            return
+        self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def run_fetch_pipeline(runs):
+    from jobqueue import run_launcher
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _StandIn)
+    base = f"http://127.0.0.1:{server.server_port}"
+    with open(FIXTURES, 'r', encoding='utf-8') as f:
+        raw = json.load(f)
+    _StandIn.fixtures = {path: json.dumps(body).replace('{base}', base).encode('utf-8') for path, body in raw.items()}
+    _StandIn.icon = _icon_bytes()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+
+    root = tempfile.mkdtemp(prefix='bench-fetch-')
+    saved = dict(os.environ)
+    os.environ.update({
+        'MODRINTH_API': f"{base}/modrinth",
+        'SPIGET_API': f"{base}/spiget",
+        'HANGAR_API': f"{base}/hangar",
+        'CURSEFORGE_API': f"{base}/curseforge",
+        'ICON_DIR': os.path.join(root, 'icon-cache'),
+        'CURSEFORGE_CACHE_DIR': os.path.join(root, 'curseforge-cache'),
+    })
+    cwd = os.getcwd()
+    os.chdir(ROOT)
+    try:
+        results = {}
+        for url in FETCH_URLS:
+            platform_name = url.split('/')[2].replace('www.', '').split('.')[0]
+            before = _StandIn.requests
+
+            def fetch(i):
+                plugin = run_launcher(url)
+                if not plugin.get('title') or not plugin.get('versions'):
+                    raise RuntimeError(f"onvolledige fetch voor {url}: {plugin}")
+
+            stats = _measure(fetch, runs)
+            stats['upstream_requests'] = round((_StandIn.requests - before) / runs, 1)
+            results[f"fetch pipeline: {platform_name}"] = stats
+        return results
+    finally:
+        os.chdir(cwd)
+        os.environ.clear()
+        os.environ.update(saved)
+        server.shutdown()
+        shutil.rmtree(root, ignore_errors=True)
+
+
+# -------------------------
+# Resultaten
+# -------------------------
+def _git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _print_results(name, results, previous=None):
+    print(f"\n== {name}")
+    print(f"{'':44} {'p50 ms':>10} {'p95 ms':>10} {'p99 ms':>10} {'per s':>10}")
+    for key, stats in results.items():
+        line = f"{key:44} {stats['p50_ms']:10.2f} {stats['p95_ms']:10.2f} {stats['p99_ms']:10.2f} {stats['per_s']:10.1f}"
+        old = (previous or {}).get(key)
+        if old and old.get('p50_ms'):
+            line += f"   p50 {(stats['p50_ms'] / old['p50_ms'] - 1) * 100:+6.1f}%"
+        print(line)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark suite: webserver routes, storage en fetch pipeline")
+    parser.add_argument('--scales', type=int, nargs='+', default=[1000, 10000],
+                        help="aantal plugins per run (bv. 1000 10000 100000)")
+    parser.add_argument('--requests', type=int, default=200, help="requests per lees route (schrijvend: 1/10)")
+    parser.add_argument('--fetch-runs', type=int, default=3, help="fetches per platform (0: overslaan)")
+    parser.add_argument('--output', help="resultaten bestand (standaard benchmarks/results/<tijd>-<commit>.json)")
+    parser.add_argument('--compare', help="eerder resultaten bestand om tegen te vergelijken")
+    args = parser.parse_args(argv)
+
+    previous = {}
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            previous = json.load(f)
+
+    import serializer
+    commit = _git_commit()
+    run = {
+        'started_at': datetime.now().isoformat(timespec='seconds'),
+        'commit': commit,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+        'json_backend': serializer.BACKEND,
+        'args': vars(args),
+        'scales': {},
+        'fetch': {},
+    }
+
+    failed = False
+    for scale in args.scales:
+        result = run_scale(scale, args.requests)
+        if 'error' in result:
+            print(f"\n== {scale} plugins: FOUT {result['error']}")
+            failed = True
+            continue
+        run['scales'][str(scale)] = result
+        _print_results(f"{scale} plugins, {result['users']} gebruikers (data in {result['generate_s']}s)",
+                       result['results'], previous.get('scales', {}).get(str(scale), {}).get('results'))
+
+    if args.fetch_runs:
+        run['fetch'] = run_fetch_pipeline(args.fetch_runs)
+        _print_results("fetch pipeline (stand-in upstream)", run['fetch'], previous.get('fetch'))
+
+    output = args.output
+    if not output:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        output = os.path.join(RESULTS_DIR, f"{datetime.now():%Y%m%d-%H%M%S}-{commit or 'onbekend'}.json")
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(run, f, indent=2)
+    print(f"\nResultaten opgeslagen in {output}")
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
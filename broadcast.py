@@ -0,0 +1,58 @@
+import queue
+import threading
+
+
+class Subscription:
+    """Events voor één abonnee (bv. één SSE verbinding), in een eigen begrensde queue"""
+
+    def __init__(self, maxsize):
+        self._queue = queue.Queue(maxsize)
+        # gezet als de abonnee niet bijhield en events gemist heeft
+        self.overflowed = False
+
+    def get(self, timeout=None):
+        """Het volgende event, of None na timeout seconden zonder event"""
+        try:
+            return self._queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+
+class Broadcaster:
+    """
+    Thread-safe fan-out van events naar alle abonnees in dit proces. Een abonnee die niet
+    bijhoudt houdt de publisher niet op: hij wordt afgemeld en overflowed wordt gezet.
+    """
+
+    def __init__(self, maxsize=256):
+        self.maxsize = maxsize
+        self._subscribers = set()
+        self._lock = threading.Lock()
+
+    def subscribe(self):
+        subscription = Subscription(self.maxsize)
+        with self._lock:
+            self._subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscribers.discard(subscription)
+
+    def publish(self, event):
+        """Stuur event naar alle abonnees; retourneert het aantal abonnees dat het kreeg"""
+        with self._lock:
+            subscribers = list(self._subscribers)
+        delivered = 0
+        for subscription in subscribers:
+            try:
+                subscription._queue.put_nowait(event)
+                delivered += 1
+            except queue.Full:
+                subscription.overflowed = True
+                self.unsubscribe(subscription)
+        return delivered
+
+    def __len__(self):
+        with self._lock:
+            return len(self._subscribers)
@@ -0,0 +1,53 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+class TTLCache:
+    """Thread-safe LRU cache met een vaste TTL per entry en een maximale grootte"""
+
+    def __init__(self, maxsize=256, ttl=300, clock=time.monotonic):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._clock = clock
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        """Retourneer de waarde voor key, of default als die ontbreekt of verlopen is"""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return default
+            expires, value = entry
+            if expires <= self._clock():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        """Sla value op onder key; de minst recent gebruikte entries vallen eruit"""
+        if self.maxsize <= 0 or self.ttl <= 0:
+            return
+        with self._lock:
+            self._data[key] = (self._clock() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def pop(self, key, default=None):
+        with self._lock:
+            entry = self._data.pop(key, None)
+            return entry[1] if entry else default
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __contains__(self, key):
+        return self.get(key) is not None
+
+    def __len__(self):
+        with self._lock:
+            return len(self._data)
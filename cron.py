@@ -1,135 +1,143 @@
-import json
 import time
-import subprocess
 import os
 import sys
-from datetime import datetime, timedelta
 
-def load_plugins():
-    """Laad de plugins data uit het JSON bestand"""
-    try:
-        if os.path.exists('plugins.json'):
-            with open('plugins.json', 'r', encoding='utf-8') as f:
-                return json.load(f)
-        return []
-    except Exception as e:
-        print(f"Fout bij het laden van plugins: {e}")
-        return []
+from fetchers.curseforge import prefetch_mods
+from fetchers.router import take_upstream_calls
+from jobqueue import JobQueue
+from leases import LeaseManager
+from refresh import Breakers, FailureTracker, RefreshScheduler, platform_of, refresh_pipeline
+from storage import database
+import projects
+
+# Dezelfde persistente queue als de webserver; cron verwerkt zelf ook jobs
+job_queue = JobQueue(workers=int(os.environ.get('CRON_WORKERS', 4)))
+
+# Hoe vaak de projectlijst opnieuw gelezen wordt (nieuwe en verwijderde projecten)
+SYNC_INTERVAL = 300
+# Hoe vaak de planning wordt weggeschreven
+CHECKPOINT_INTERVAL = 60
+# Langste slaap tussen twee rondes
+MAX_SLEEP = 60
+
+# Dezelfde tables als de webserver (storage.py regelt de file locks)
+db = database("plugin-craft-db")
 
-def update_plugin(url, owner=None):
-    """Voer launcher.py uit voor een specifieke plugin URL"""
+def load_project_ids():
+    """Alle project_ids (streamend; de metadata zelf wordt per batch gelezen)"""
     try:
-        print(f"Bijwerken plugin: {url}")
-        
-        python_executable = sys.executable
-        
-        # Voer launcher.py uit zonder confirm om alleen data op te halen
-        result = subprocess.run(
-            [python_executable, 'launcher.py', url],
-            capture_output=True,
-            text=True,
-            check=True,
-            timeout=300
-        )
-        
-        # Parse de JSON output
-        if not result.stdout.strip():
-            print(f"Geen output ontvangen voor plugin {url}")
-            return None
-            
-        plugin_data = json.loads(result.stdout)
-        
-        # Behoud owner informatie
-        if owner:
-            plugin_data['owner'] = owner
-        
-        print(f"Plugin succesvol bijgewerkt: {url}")
-        return plugin_data
-        
-    except subprocess.CalledProcessError as e:
-        print(f"Fout bij bijwerken plugin {url}:")
-        print(f"Error output: {e.stderr}")
-        return None
-    except subprocess.TimeoutExpired:
-        print(f"Timeout bij bijwerken plugin {url}")
-        return None
-    except json.JSONDecodeError as e:
-        print(f"Ongeldige JSON output voor plugin {url}: {e}")
-        print(f"Output was: {result.stdout[:200]}...")
-        return None
+        projects.migrate_legacy_plugins(db)
+        return set(projects.project_ids(db))
     except Exception as e:
-        print(f"Onverwachte fout bij bijwerken plugin {url}: {e}")
+        print(f"Fout bij het laden van projecten: {e}")
         return None
 
-def save_plugins(plugins):
-    """Sla plugins op in het JSON bestand"""
+def prefetch(batch):
+    """CurseForge mods met een bekend id in batches ophalen; de fetchers lezen ze uit de cache"""
     try:
-        with open('plugins.json', 'w', encoding='utf-8') as f:
-            json.dump(plugins, f, indent=4, ensure_ascii=False)
-        return True
+        prefetched = prefetch_mods(plugin.url for plugin in batch.values())
+        if prefetched:
+            print(f"{prefetched} CurseForge mod(s) in batch opgehaald")
     except Exception as e:
-        print(f"Fout bij het opslaan van plugins: {e}")
-        return False
+        print(f"CurseForge batch mislukt, fetchers zoeken zelf: {e}")
+    finally:
+        # de batch POST draait in dit proces; meetellen in de totalen van /metrics
+        try:
+            job_queue.record_upstream(take_upstream_calls())
+        except Exception as e:
+            print(f"Fout bij bewaren upstream calls: {e}")
 
 def main():
-    """Hoofdfunctie die elk uur alle plugins bijwerkt"""
+    """Hoofdfunctie: ververst elk project zodra het aan de beurt is (zie refresh.RefreshScheduler)"""
     print("Cron service gestart - Ctrl+C om te stoppen")
     print(f"Python executable: {sys.executable}")
     print("-" * 50)
     
+    job_queue.start()
+    
+    # backoff per project (bewaard in de database) en circuit breakers per platform (in dit proces)
+    tracker = FailureTracker(db)
+    breakers = Breakers()
+    # volgende refresh per project; de checkpoint laat een herstart verder gaan waar hij was
+    scheduler = RefreshScheduler(db)
+    if len(scheduler):
+        print(f"Planning van {len(scheduler)} project(en) hervat")
+    # meerdere cron.py processen verdelen de projecten via leases (één worker heeft alles)
+    leases = LeaseManager(db)
+    leases.start()
+    
+    last = {'sync': 0, 'checkpoint': time.time(), 'purge': 0, 'generation': leases.generation}
+    all_keys = set()
+    
+    def housekeeping():
+        """Projectlijst bijwerken, planning wegschrijven en oude jobs opruimen (ook tijdens een lange run)"""
+        nonlocal all_keys
+        now = time.time()
+        if now - last['sync'] >= SYNC_INTERVAL or leases.generation != last['generation']:
+            if now - last['sync'] >= SYNC_INTERVAL:
+                keys = load_project_ids()
+                if keys is not None:
+                    all_keys = keys
+                    if not keys:
+                        print("Geen plugins gevonden om bij te werken")
+                last['sync'] = now
+            # alleen de projecten in de slots van deze worker; de rest laten we aan de anderen
+            last['generation'] = leases.generation
+            mine = leases.owned(all_keys)
+            scheduler.sync(mine, projects.owner_counts(db), others=all_keys)
+            tracker.prune(mine, others=all_keys)
+        if now - last['checkpoint'] >= CHECKPOINT_INTERVAL:
+            scheduler.checkpoint()
+            last['checkpoint'] = now
+        if now - last['purge'] >= 3600:
+            job_queue.purge()
+            last['purge'] = now
+    
+    def reschedule(key, outcome, plugin):
+        retry_at = breakers[platform_of(plugin.url)].open_until if outcome == 'deferred' else None
+        scheduler.completed(key, outcome, tracker, retry_at)
+    
+    def due_keys():
+        for key in scheduler.iter_due():
+            if leases.holds(key):
+                yield key
+            else:
+                # lease verlopen of slot naar een andere worker
+                scheduler.drop(key)
+    
     # Oneindige loop
     while True:
         try:
-            # Laad huidige plugins
-            plugins = load_plugins()
-            
-            if not plugins:
-                print("Geen plugins gevonden om bij te werken")
-            else:
-                print(f"Start bijwerken van {len(plugins)} plugin(s)")
-                
-                # Bijwerken van elke plugin
-                updated_plugins = []
-                success_count = 0
-                
-                for plugin in plugins:
-                    url = plugin.get('url')
-                    owner = plugin.get('owner')
-                    
-                    if url:
-                        updated_data = update_plugin(url, owner)
-                        if updated_data:
-                            updated_plugins.append(updated_data)
-                            success_count += 1
-                        else:
-                            # Behoud originele data bij fout
-                            print(f"Originele data behouden voor: {url}")
-                            updated_plugins.append(plugin)
-                    else:
-                        print("Plugin zonder URL gevonden, overslaan...")
-                        updated_plugins.append(plugin)
-                
-                # Sla bijgewerkte plugins op
-                if save_plugins(updated_plugins):
-                    print(f"Bijwerken voltooid: {success_count}/{len(plugins)} plugins succesvol bijgewerkt")
-                else:
-                    print("Fout bij opslaan van bijgewerkte plugins")
+            housekeeping()
             
-            # Wacht 1 uur tot volgende update
-            next_run = datetime.now() + timedelta(hours=1)
-            print(f"Volgende update om: {next_run.strftime('%Y-%m-%d %H:%M:%S')}")
-            print("-" * 50)
+            # Alles wat aan de beurt is in batches door de pipeline; per batch één commit
+            for stats in refresh_pipeline(db, due_keys(), job_queue, tracker, breakers,
+                                          prefetch=prefetch, on_result=reschedule):
+                total = sum(stats[k] for k in ('updated', 'failed', 'not_found', 'backoff', 'deferred', 'skipped'))
+                print(f"Batch voltooid: {stats['updated']}/{total} projecten bijgewerkt, "
+                      f"{stats['written']} gewijzigd opgeslagen, {stats['unchanged']} ongewijzigd")
+                if stats['backoff'] or stats['deferred'] or stats['not_found']:
+                    print(f"Overgeslagen: {stats['backoff']} in backoff, {stats['deferred']} uitgesteld, "
+                          f"{stats['not_found']} niet (meer) gevonden")
+                housekeeping()
             
-            # Wacht 1 uur (3600 seconden)
-            time.sleep(3600)
+            # Wachten tot het volgende project aan de beurt is (of de volgende sync)
+            now = time.time()
+            next_due = scheduler.next_due()
+            wake = min(next_due or now + MAX_SLEEP, last['sync'] + SYNC_INTERVAL, now + MAX_SLEEP)
+            time.sleep(max(wake - time.time(), 1))
             
         except KeyboardInterrupt:
+            scheduler.release()
+            scheduler.checkpoint()
+            leases.stop()
             print("\nCron service gestopt door gebruiker")
             break
         except Exception as e:
             print(f"Onverwachte fout in hoofdloop: {e}")
+            scheduler.release()
             # Wacht 5 minuten voordat we opnieuw proberen bij een fout
             time.sleep(300)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
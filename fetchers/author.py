@@ -1,15 +1,16 @@
 import argparse
 import re
-import requests
 import sys
-from urllib.parse import urlparse
 from playwright.sync_api import sync_playwright
 
+from router import detect_platform, MODRINTH_API, SPIGET_API, REQUEST_TIMEOUT, upstream_request
+from curseforge import get_mod
+
 # -------- MODRINTH --------
 def get_modrinth_author(slug):
     try:
-        url = f"https://api.modrinth.com/v2/project/{slug}"
-        response = requests.get(url)
+        url = f"{MODRINTH_API}/project/{slug}"
+        response = upstream_request('GET', url, timeout=REQUEST_TIMEOUT)
         response.raise_for_status()
         data = response.json()
         
@@ -17,8 +18,8 @@ def get_modrinth_author(slug):
         if not team_id:
             return None
             
-        team_url = f"https://api.modrinth.com/v2/team/{team_id}/members"
-        team_response = requests.get(team_url)
+        team_url = f"{MODRINTH_API}/team/{team_id}/members"
+        team_response = upstream_request('GET', team_url, timeout=REQUEST_TIMEOUT)
         team_response.raise_for_status()
         team_data = team_response.json()
         
@@ -44,9 +45,9 @@ def get_spigot_author(url):
             return None
         
         resource_id = match.group(1)
-        api_url = f"https://api.spiget.org/v2/resources/{resource_id}/author"
+        api_url = f"{SPIGET_API}/resources/{resource_id}/author"
         
-        response = requests.get(api_url)
+        response = upstream_request('GET', api_url, timeout=REQUEST_TIMEOUT)
         if response.status_code != 200:
             return None
         
@@ -69,32 +70,9 @@ def get_hangar_author(combined_slug):
 # -------- CURSEFORGE --------
 def get_curseforge_author(url):
     try:
-        parsed = urlparse(url)
-        path_parts = parsed.path.strip('/').split('/')
-        if len(path_parts) < 3:
-            return None
-        
-        category = path_parts[1]
-        project_slug = path_parts[2]
-        
-        class_id = 6 if category == 'mc-mods' else 4471 if category == 'modpacks' else None
-        if not class_id:
-            return None
-        
-        api_url = f"https://api.curseforge.com/v1/mods/search?gameId=432&slug={project_slug}&classId={class_id}"
-        
-        headers = {
-            'Accept': 'application/json',
-            'x-api-key': '$2a$10$bL4bIL5pUWqfcO7KQtnMReakwtfHbNKh6v1uTpKlzhwoueEJQnPnm'
-        }
-        
-        response = requests.get(api_url, headers=headers)
-        if response.status_code != 200:
-            return None
-        
-        data = response.json()
-        if data.get('data'):
-            authors = data['data'][0].get('authors', [])
+        mod = get_mod(url)
+        if mod:
+            authors = mod.get('authors', [])
             if authors:
                 return authors[0].get('name')
         
@@ -102,34 +80,6 @@ def get_curseforge_author(url):
     except Exception:
         return None
 
-# -------- PLATFORM DETECTION --------
-def detect_platform(url):
-    try:
-        parsed = urlparse(url)
-        host = parsed.netloc.lower()
-
-        if "modrinth.com" in host:
-            match = re.search(r"/(plugin|mod|datapack)/([^/]+)/?", parsed.path)
-            if match:
-                return "modrinth", match.group(2)
-
-        elif "spigotmc.org" in host:
-            return "spigot", url
-
-        elif "hangar.papermc.io" in host:
-            match = re.search(r"/([^/]+)/([^/]+)/?$", parsed.path)
-            if match:
-                author = match.group(1)
-                project = match.group(2)
-                return "hangar", f"{author}/{project}"
-
-        elif "curseforge.com" in host:
-            return "curseforge", url
-
-        return None, None
-    except Exception:
-        return None, None
-
 # -------- MAIN --------
 def main():
     parser = argparse.ArgumentParser(description="Extract plugin author from Modrinth, SpigotMC, or Hangar URLs")
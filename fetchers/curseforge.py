@@ -0,0 +1,161 @@
+import json
+import os
+import tempfile
+import time
+
+try:
+    from router import CURSEFORGE_API, REQUEST_TIMEOUT, route, upstream_request
+except ImportError:  # geïmporteerd als fetchers.curseforge (bv. door cron.py)
+    from fetchers.router import CURSEFORGE_API, REQUEST_TIMEOUT, route, upstream_request
+
+# Gedeelde CurseForge toegang voor alle fetchers. mods/search (duur) draait
+# alleen de eerste keer per project: de slug wordt vertaald naar het numerieke
+# mod id en dat wordt bewaard. Daarna gaat alles via mods/<id>, en de mod
+# response wordt kort bewaard zodat de vijf fetchers van één launcher.py run
+# samen één lookup doen. Bij een bulk refresh haalt prefetch_mods() alle
+# bekende mods in één POST mods request op.
+
+API_KEY = os.environ.get('CURSEFORGE_API_KEY', '$2a$10$bL4bIL5pUWqfcO7KQtnMReakwtfHbNKh6v1uTpKlzhwoueEJQnPnm')
+HEADERS = {
+    'Accept': 'application/json',
+    'x-api-key': API_KEY,
+}
+GAME_ID = 432
+CLASS_IDS = {'mc-mods': 6, 'modpacks': 4471}
+
+CACHE_DIR = os.environ.get('CURSEFORGE_CACHE_DIR', 'curseforge-cache')
+# hoe lang een opgehaalde mod geldig blijft (ruim een launcher.py run of een bulk refresh)
+MOD_TTL = float(os.environ.get('CURSEFORGE_MOD_TTL', 600))
+# maximaal aantal mod ids per POST mods request
+BATCH_SIZE = 100
+
+
+def _ids_path():
+    return os.path.join(CACHE_DIR, 'ids.json')
+
+
+def _mod_path(mod_id):
+    return os.path.join(CACHE_DIR, 'mods', f"{int(mod_id)}.json")
+
+
+def _read_json(path):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_json(path, value):
+    """Atomisch schrijven: fetchers draaien als parallelle processen"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), prefix='.tmp-')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(value, f)
+        os.replace(tmp, path)
+    except Exception:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+
+def project_key(url):
+    """'mc-mods/jei' voor een CurseForge URL, of None"""
+    r = route(url)
+    if not r or r.platform != 'curseforge':
+        return None
+    category = r.project_id.split('/', 1)[0]
+    return r.project_id if category in CLASS_IDS else None
+
+
+def cached_mod_id(key):
+    return (_read_json(_ids_path()) or {}).get(key)
+
+
+def _remember_mod_id(key, mod_id):
+    # lezen + samenvoegen + atomisch schrijven; een gelijktijdige schrijver kan hooguit
+    # een id laten wegvallen, dat dan later opnieuw opgezocht wordt
+    ids = _read_json(_ids_path()) or {}
+    if ids.get(key) != mod_id:
+        ids[key] = mod_id
+        _write_json(_ids_path(), ids)
+
+
+def _remember_mod(mod):
+    _write_json(_mod_path(mod['id']), {'fetched_at': time.time(), 'data': mod})
+
+
+def _cached_mod(mod_id):
+    cached = _read_json(_mod_path(mod_id))
+    if cached and time.time() - cached.get('fetched_at', 0) < MOD_TTL:
+        return cached.get('data')
+    return None
+
+
+def _search(key):
+    """Zoek de mod met precies deze slug (niet blind het eerste resultaat)"""
+    category, slug = key.split('/', 1)
+    response = upstream_request(
+        'GET',
+        f"{CURSEFORGE_API}/mods/search",
+        params={'gameId': GAME_ID, 'slug': slug, 'classId': CLASS_IDS[category]},
+        headers=HEADERS,
+        timeout=REQUEST_TIMEOUT,
+    )
+    response.raise_for_status()
+    for mod in response.json().get('data') or []:
+        if str(mod.get('slug', '')).lower() == slug and mod.get('id'):
+            return mod
+    return None
+
+
+def get_mod(url):
+    """
+    De CurseForge mod achter een project URL (dict uit de API), of None als het project niet
+    (meer) bestaat. Bij een storing (timeout, 5xx) een requests exception.
+    """
+    key = project_key(url)
+    if not key:
+        return None
+
+    mod_id = cached_mod_id(key)
+    if mod_id:
+        mod = _cached_mod(mod_id)
+        if mod:
+            return mod
+        response = upstream_request('GET', f"{CURSEFORGE_API}/mods/{int(mod_id)}", headers=HEADERS, timeout=REQUEST_TIMEOUT)
+        if response.status_code == 200:
+            mod = response.json().get('data')
+            if mod:
+                _remember_mod(mod)
+                return mod
+        elif response.status_code != 404:
+            response.raise_for_status()
+        # 404: het bewaarde id klopt niet meer, opnieuw zoeken op slug
+
+    mod = _search(key)
+    if mod:
+        _remember_mod_id(key, mod['id'])
+        _remember_mod(mod)
+    return mod
+
+
+def prefetch_mods(urls):
+    """
+    Haal alle mods met een bekend id in batches via POST mods op en bewaar ze, zodat de
+    fetchers daarna geen eigen request meer doen. Retourneert het aantal opgehaalde mods.
+    """
+    ids = _read_json(_ids_path()) or {}
+    mod_ids = sorted({ids[key] for key in map(project_key, urls) if key and key in ids})
+    fetched = 0
+    for start in range(0, len(mod_ids), BATCH_SIZE):
+        batch = mod_ids[start:start + BATCH_SIZE]
+        response = upstream_request('POST', f"{CURSEFORGE_API}/mods", json={'modIds': batch}, headers=HEADERS, timeout=REQUEST_TIMEOUT)
+        if response.status_code != 200:
+            continue
+        for mod in response.json().get('data') or []:
+            if mod.get('id'):
+                _remember_mod(mod)
+                fetched += 1
+    return fetched
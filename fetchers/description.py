@@ -1,15 +1,16 @@
 import argparse
 import re
-import requests
 import sys
-from urllib.parse import urlparse
 from playwright.sync_api import sync_playwright
 
+from router import detect_platform, MODRINTH_API, SPIGET_API, HANGAR_API, REQUEST_TIMEOUT, upstream_request
+from curseforge import get_mod
+
 # -------- MODRINTH --------
 def get_modrinth_description(slug):
     try:
-        url = f"https://api.modrinth.com/v2/project/{slug}"
-        response = requests.get(url)
+        url = f"{MODRINTH_API}/project/{slug}"
+        response = upstream_request('GET', url, timeout=REQUEST_TIMEOUT)
         response.raise_for_status()
         data = response.json()
         return data.get("description")
@@ -24,9 +25,9 @@ def get_spigot_description(url):
             return None
         
         resource_id = match.group(1)
-        api_url = f"https://api.spiget.org/v2/resources/{resource_id}"
+        api_url = f"{SPIGET_API}/resources/{resource_id}"
         
-        response = requests.get(api_url)
+        response = upstream_request('GET', api_url, timeout=REQUEST_TIMEOUT)
         if response.status_code != 200:
             return None
         
@@ -38,8 +39,8 @@ def get_spigot_description(url):
 # -------- HANGAR --------
 def get_hangar_description(combined_slug):
     try:
-        url = f"https://hangar.papermc.io/api/v1/projects/{combined_slug}"
-        response = requests.get(url)
+        url = f"{HANGAR_API}/projects/{combined_slug}"
+        response = upstream_request('GET', url, timeout=REQUEST_TIMEOUT)
         response.raise_for_status()
         data = response.json()
         return data.get("description")
@@ -49,65 +50,11 @@ def get_hangar_description(combined_slug):
 # -------- CURSEFORGE --------
 def get_curseforge_description(url):
     try:
-        parsed = urlparse(url)
-        path_parts = parsed.path.strip('/').split('/')
-        if len(path_parts) < 3:
-            return None
-        
-        category = path_parts[1]
-        project_slug = path_parts[2]
-        
-        class_id = 6 if category == 'mc-mods' else 4471 if category == 'modpacks' else None
-        if not class_id:
-            return None
-        
-        api_url = f"https://api.curseforge.com/v1/mods/search?gameId=432&slug={project_slug}&classId={class_id}"
-        
-        headers = {
-            'Accept': 'application/json',
-            'x-api-key': '$2a$10$bL4bIL5pUWqfcO7KQtnMReakwtfHbNKh6v1uTpKlzhwoueEJQnPnm'
-        }
-        
-        response = requests.get(api_url, headers=headers)
-        if response.status_code != 200:
-            return None
-        
-        data = response.json()
-        if data.get('data'):
-            return data['data'][0].get('summary')
-        
-        return None
+        mod = get_mod(url)
+        return mod.get('summary') if mod else None
     except Exception:
         return None
 
-# -------- PLATFORM DETECTION --------
-def detect_platform(url):
-    try:
-        parsed = urlparse(url)
-        host = parsed.netloc
-
-        if "modrinth.com" in host:
-            match = re.search(r"/(plugin|mod)/([^/]+)/?", parsed.path)
-            if match:
-                return "modrinth", match.group(2)
-
-        elif "spigotmc.org" in host:
-            return "spigot", url
-
-        elif "hangar.papermc.io" in host:
-            match = re.search(r"/([^/]+)/([^/]+)/?$", parsed.path)
-            if match:
-                author = match.group(1)
-                project = match.group(2)
-                return "hangar", f"{author}/{project}"
-
-        elif "curseforge.com" in host:
-            return "curseforge", url
-
-        return None, None
-    except Exception:
-        return None, None
-
 # -------- MAIN --------
 def main():
     parser = argparse.ArgumentParser(description="Extract plugin description from Modrinth, SpigotMC, or Hangar URLs")
@@ -1,15 +1,17 @@
 import argparse
 import re
-import requests
 import sys
-from urllib.parse import urlparse, urlunparse
+from urllib.parse import urljoin, urlparse, urlunparse
 from playwright.sync_api import sync_playwright
 
+from router import detect_platform, MODRINTH_API, SPIGET_API, HANGAR_API, REQUEST_TIMEOUT, upstream_request
+from curseforge import get_mod
+
 # -------- MODRINTH --------
 def get_modrinth_icon(slug):
     try:
-        url = f"https://api.modrinth.com/v2/project/{slug}"
-        response = requests.get(url)
+        url = f"{MODRINTH_API}/project/{slug}"
+        response = upstream_request('GET', url, timeout=REQUEST_TIMEOUT)
         response.raise_for_status()
         data = response.json()
         icon_url = data.get("icon_url")
@@ -29,9 +31,9 @@ def get_spigot_icon(url):
             return None
         
         resource_id = match.group(1)
-        api_url = f"https://api.spiget.org/v2/resources/{resource_id}"
+        api_url = f"{SPIGET_API}/resources/{resource_id}"
         
-        response = requests.get(api_url)
+        response = upstream_request('GET', api_url, timeout=REQUEST_TIMEOUT)
         if response.status_code != 200:
             return None
         
@@ -40,7 +42,8 @@ def get_spigot_icon(url):
         if icon and 'url' in icon:
             icon_url = icon['url']
             if not icon_url.startswith('http'):
-                icon_url = f"https://www.spigotmc.org/{icon_url}"
+                # relatieve paden ("data/..." of "//static.spigotmc.org/...") tegen de spigot host oplossen
+                icon_url = urljoin("https://www.spigotmc.org/", icon_url)
             if '?' in icon_url:
                 icon_url = icon_url.split('?')[0]
             return icon_url
@@ -52,8 +55,8 @@ def get_spigot_icon(url):
 # -------- HANGAR --------
 def get_hangar_icon(combined_slug):
     try:
-        url = f"https://hangar.papermc.io/api/v1/projects/{combined_slug}"
-        response = requests.get(url)
+        url = f"{HANGAR_API}/projects/{combined_slug}"
+        response = upstream_request('GET', url, timeout=REQUEST_TIMEOUT)
         response.raise_for_status()
         data = response.json()
         
@@ -70,32 +73,9 @@ def get_hangar_icon(combined_slug):
 # -------- CURSEFORGE --------
 def get_curseforge_icon(url):
     try:
-        parsed = urlparse(url)
-        path_parts = parsed.path.strip('/').split('/')
-        if len(path_parts) < 3:
-            return None
-        
-        category = path_parts[1]
-        project_slug = path_parts[2]
-        
-        class_id = 6 if category == 'mc-mods' else 4471 if category == 'modpacks' else None
-        if not class_id:
-            return None
-        
-        api_url = f"https://api.curseforge.com/v1/mods/search?gameId=432&slug={project_slug}&classId={class_id}"
-        
-        headers = {
-            'Accept': 'application/json',
-            'x-api-key': '$2a$10$bL4bIL5pUWqfcO7KQtnMReakwtfHbNKh6v1uTpKlzhwoueEJQnPnm'
-        }
-        
-        response = requests.get(api_url, headers=headers)
-        if response.status_code != 200:
-            return None
-        
-        data = response.json()
-        if data.get('data'):
-            logo = data['data'][0].get('logo')
+        mod = get_mod(url)
+        if mod:
+            logo = mod.get('logo')
             if logo:
                 icon_url = logo.get('thumbnailUrl') or logo.get('url')
                 if icon_url and '?' in icon_url:
@@ -106,34 +86,6 @@ def get_curseforge_icon(url):
     except Exception:
         return None
 
-# -------- PLATFORM DETECTION --------
-def detect_platform(url):
-    try:
-        parsed = urlparse(url)
-        host = parsed.netloc.lower()
-
-        if "modrinth.com" in host:
-            match = re.search(r"/(plugin|mod|datapack)/([^/]+)/?", parsed.path)
-            if match:
-                return "modrinth", match.group(2)
-
-        elif "spigotmc.org" in host:
-            return "spigot", url
-
-        elif "hangar.papermc.io" in host:
-            match = re.search(r"/([^/]+)/([^/]+)/?$", parsed.path)
-            if match:
-                author = match.group(1)
-                project = match.group(2)
-                return "hangar", f"{author}/{project}"
-
-        elif "curseforge.com" in host:
-            return "curseforge", url
-
-        return None, None
-    except Exception:
-        return None, None
-
 # -------- MAIN --------
 def main():
     parser = argparse.ArgumentParser(description="Extract plugin icon URL from Modrinth, SpigotMC, or Hangar URLs")
@@ -0,0 +1,100 @@
+import re
+from collections import defaultdict
+
+# Minecraft versies als gesorteerde lijsten in plaats van een spatie-gescheiden
+# string, plus een index versie -> plugin keys (ook voor reeksen zoals "1.20.x").
+
+_SEPARATORS = re.compile(r"[\s,]+")
+_RANGE = re.compile(r"^(\d+\.\d+)\.x$", re.IGNORECASE)
+# 1.21.0 is dezelfde release als 1.21
+_ZERO_PATCH = re.compile(r"^(\d+\.\d+)\.0$")
+
+
+def canonical_version(version):
+    """'1.21.0' -> '1.21'; andere versies ongewijzigd"""
+    version = version.strip()
+    match = _ZERO_PATCH.match(version)
+    return match.group(1) if match else version
+
+
+def version_key(version):
+    """Sorteer key die 1.9 voor 1.10 plaatst (en 1.21.0 gelijk aan 1.21); niet-numerieke delen komen achteraan"""
+    parts = []
+    for part in canonical_version(version).split('.'):
+        if part.isdigit():
+            parts.append((0, int(part), ''))
+        else:
+            parts.append((1, 0, part))
+    return tuple(parts)
+
+
+def normalize_versions(value):
+    """Maak van een versie string of lijst een ontdubbelde, oplopend gesorteerde lijst"""
+    if not value:
+        return []
+    if isinstance(value, str):
+        items = _SEPARATORS.split(value)
+    else:
+        items = [str(v) for v in value]
+    versions = {canonical_version(v) for v in items if v and v.strip()}
+    return sorted(versions, key=version_key)
+
+
+def version_range(version):
+    """'1.20.6' en '1.20' -> '1.20.x'; None als de versie geen major.minor heeft"""
+    parts = version.split('.')
+    if len(parts) < 2 or not (parts[0].isdigit() and parts[1].isdigit()):
+        return None
+    return f"{parts[0]}.{parts[1]}.x"
+
+
+class VersionIndex:
+    """Index van Minecraft versie (en reeks) naar de keys van plugins die die versie ondersteunen"""
+
+    def __init__(self):
+        self._exact = defaultdict(set)
+        self._ranges = defaultdict(set)
+
+    @classmethod
+    def build(cls, items):
+        """Bouw een index uit (plugin_key, versions) paren"""
+        index = cls()
+        for key, versions in items:
+            index.add(key, versions)
+        return index
+
+    def add(self, key, versions):
+        for v in normalize_versions(versions):
+            self._exact[v].add(key)
+            r = version_range(v)
+            if r:
+                self._ranges[r].add(key)
+
+    def remove(self, key, versions):
+        for v in normalize_versions(versions):
+            self._exact[v].discard(key)
+            if not self._exact[v]:
+                del self._exact[v]
+            r = version_range(v)
+            if r and r in self._ranges:
+                self._ranges[r].discard(key)
+                if not self._ranges[r]:
+                    del self._ranges[r]
+
+    def lookup(self, query):
+        """Plugin keys voor een exacte versie ('1.21') of een reeks ('1.20.x')"""
+        query = (query or '').strip()
+        if _RANGE.match(query):
+            return set(self._ranges.get(query.lower(), ()))
+        return set(self._exact.get(canonical_version(query), ()))
+
+    def versions(self, newest_first=True):
+        return sorted(self._exact, key=version_key, reverse=newest_first)
+
+    def ranges(self, newest_first=True):
+        return sorted(self._ranges, key=lambda r: version_key(r[:-2]), reverse=newest_first)
+
+    def counts(self):
+        counts = {v: len(keys) for v, keys in self._exact.items()}
+        counts.update({r: len(keys) for r, keys in self._ranges.items()})
+        return counts
@@ -0,0 +1,212 @@
+import atexit
+import json
+import os
+import re
+import sys
+import threading
+from collections import Counter, namedtuple
+from urllib.parse import urlparse
+
+import requests
+
+# Eén plek die elke ondersteunde plugin URL vertaalt naar een canonieke
+# (platform, project_id) key. Gebruikt door alle fetchers, de job queue,
+# de fetch cache en de opslag zodat varianten van dezelfde URL
+# (trailing slash, www., query strings, subpagina's) één project blijven.
+
+Route = namedtuple('Route', ['platform', 'project_id', 'identifier', 'url'])
+
+# API base URLs van de platforms; via env te overschrijven, bv. met de lokale
+# stand-in server van benchmarks/suite.py
+MODRINTH_API = os.environ.get('MODRINTH_API', 'https://api.modrinth.com/v2').rstrip('/')
+SPIGET_API = os.environ.get('SPIGET_API', 'https://api.spiget.org/v2').rstrip('/')
+HANGAR_API = os.environ.get('HANGAR_API', 'https://hangar.papermc.io/api/v1').rstrip('/')
+CURSEFORGE_API = os.environ.get('CURSEFORGE_API', 'https://api.curseforge.com/v1').rstrip('/')
+
+# timeout per upstream request, zodat een hangende host niet de hele launcher timeout kost
+REQUEST_TIMEOUT = float(os.environ.get('FETCH_REQUEST_TIMEOUT', 15))
+# upstream statussen voor een verwijderd of onbekend project
+GONE_STATUS = (404, 410)
+
+# exit codes van launcher.py (en titles.py) bij een mislukte fetch
+EXIT_NOT_FOUND = 2
+EXIT_UNAVAILABLE = 3
+
+# stderr regel waarmee een fetcher zijn upstream calls aan launcher.py meldt
+UPSTREAM_REPORT = 'upstream-calls '
+
+_MODRINTH_PATH = re.compile(r"^/(plugin|mod|datapack)/([^/]+)", re.IGNORECASE)
+_SPIGOT_PATH = re.compile(r"^/resources/(?:([^/]*)\.)?(\d+)(?:/|$)", re.IGNORECASE)
+_HANGAR_PATH = re.compile(r"^/([^/]+)/([^/]+)")
+_CURSEFORGE_PATH = re.compile(r"^/minecraft/([^/]+)/([^/]+)", re.IGNORECASE)
+
+# paden op hangar.papermc.io die geen project zijn
+_HANGAR_RESERVED = {'api', 'auth', 'admin', 'linkout', 'notifications', 'settings', 'staff', 'tools', 'version'}
+
+
+def _host(parsed):
+    host = parsed.netloc.lower().split(':')[0]
+    if host.startswith('www.'):
+        host = host[4:]
+    return host
+
+
+def _modrinth(path):
+    match = _MODRINTH_PATH.match(path)
+    if not match:
+        return None
+    kind, slug = match.group(1).lower(), match.group(2).lower()
+    return Route('modrinth', slug, slug, f"https://modrinth.com/{kind}/{slug}")
+
+
+def _spigot(path):
+    match = _SPIGOT_PATH.match(path)
+    if not match:
+        return None
+    slug, resource_id = match.group(1), match.group(2)
+    url = f"https://www.spigotmc.org/resources/{slug + '.' if slug else ''}{resource_id}/"
+    # de spigot fetchers halen het resource id zelf uit de canonieke URL
+    return Route('spigot', resource_id, url, url)
+
+
+def _hangar(path):
+    match = _HANGAR_PATH.match(path)
+    if not match or match.group(1).lower() in _HANGAR_RESERVED:
+        return None
+    combined = f"{match.group(1)}/{match.group(2)}"
+    return Route('hangar', combined.lower(), combined, f"https://hangar.papermc.io/{combined}")
+
+
+def _curseforge(path):
+    match = _CURSEFORGE_PATH.match(path)
+    if not match:
+        return None
+    category, slug = match.group(1).lower(), match.group(2).lower()
+    url = f"https://www.curseforge.com/minecraft/{category}/{slug}"
+    return Route('curseforge', f"{category}/{slug}", url, url)
+
+
+_ROUTES = {
+    'modrinth.com': _modrinth,
+    'spigotmc.org': _spigot,
+    'hangar.papermc.io': _hangar,
+    'curseforge.com': _curseforge,
+}
+
+
+def route(url):
+    """Vertaal een plugin URL naar een Route, of None als de URL niet ondersteund wordt"""
+    if not url:
+        return None
+    url = url.strip()
+    if '://' not in url:
+        url = 'https://' + url
+    try:
+        parsed = urlparse(url)
+    except ValueError:
+        return None
+    handler = _ROUTES.get(_host(parsed))
+    if not handler:
+        return None
+    return handler(parsed.path)
+
+
+def detect_platform(url):
+    """(platform, identifier) zoals de fetchers die verwachten; (None, None) bij een ongeldige URL"""
+    r = route(url)
+    if not r:
+        return None, None
+    return r.platform, r.identifier
+
+
+def plugin_key(url):
+    """Canonieke key 'platform:project_id' voor opslag, cache en de-duplicatie"""
+    r = route(url)
+    return f"{r.platform}:{r.project_id}" if r else None
+
+
+def canonical_url(url):
+    """Canonieke URL van een plugin; niet ondersteunde URLs komen ongewijzigd terug"""
+    r = route(url)
+    return r.url if r else (url or '').strip()
+
+
+# -------------------------
+# Upstream calls tellen
+# -------------------------
+# Elke HTTP call naar een platform gaat via upstream_request en wordt per platform
+# geteld. Een fetcher meldt zijn telling bij exit op stderr (UPSTREAM_REPORT=1,
+# gezet door launcher.py), launcher.py telt alles op en stuurt het met de job
+# mee; jobqueue.py houdt de totalen bij in jobs.db (zie /metrics).
+_API_PLATFORMS = (
+    (MODRINTH_API, 'modrinth'),
+    (SPIGET_API, 'spigot'),
+    (HANGAR_API, 'hangar'),
+    (CURSEFORGE_API, 'curseforge'),
+)
+_HOST_PLATFORMS = (
+    ('modrinth.com', 'modrinth'),
+    ('spiget.org', 'spigot'),
+    ('spigotmc.org', 'spigot'),
+    ('papermc.io', 'hangar'),
+    ('curseforge.com', 'curseforge'),
+    ('forgecdn.net', 'curseforge'),
+)
+
+_upstream_calls = Counter()
+_upstream_lock = threading.Lock()
+
+
+def upstream_platform(url):
+    """Platform waar een upstream URL heen gaat ('other' voor bv. externe icon hosts)"""
+    for base, platform in _API_PLATFORMS:
+        if url.startswith(base + '/') or url == base:
+            return platform
+    try:
+        host = _host(urlparse(url))
+    except ValueError:
+        return 'other'
+    for suffix, platform in _HOST_PLATFORMS:
+        if host == suffix or host.endswith('.' + suffix):
+            return platform
+    return 'other'
+
+
+def upstream_request(method, url, **kwargs):
+    """requests.request die de call per platform telt (ook als hij mislukt)"""
+    add_upstream_calls({upstream_platform(url): 1})
+    return requests.request(method, url, **kwargs)
+
+
+def add_upstream_calls(counts):
+    """Tel upstream calls van elders (bv. van een fetcher subprocess) bij die van dit proces op"""
+    with _upstream_lock:
+        _upstream_calls.update({platform: int(n) for platform, n in counts.items()})
+
+
+def take_upstream_calls():
+    """Upstream calls per platform sinds de vorige aanroep"""
+    with _upstream_lock:
+        counts = dict(_upstream_calls)
+        _upstream_calls.clear()
+    return counts
+
+
+def parse_upstream_report(text):
+    """Tel de UPSTREAM_REPORT regels uit de stderr van een fetcher op"""
+    counts = Counter()
+    for line in (text or '').splitlines():
+        if line.startswith(UPSTREAM_REPORT):
+            try:
+                counts.update(json.loads(line[len(UPSTREAM_REPORT):]))
+            except (ValueError, TypeError):
+                continue
+    return dict(counts)
+
+
+@atexit.register
+def _report_upstream_calls():
+    if os.environ.get('UPSTREAM_REPORT') == '1':
+        counts = take_upstream_calls()
+        if counts:
+            print(UPSTREAM_REPORT + json.dumps(counts), file=sys.stderr, flush=True)
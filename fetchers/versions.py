@@ -1,15 +1,17 @@
 import argparse
 import re
-import requests
 import sys
-from urllib.parse import urlparse
 from playwright.sync_api import sync_playwright
 
+from router import detect_platform, MODRINTH_API, SPIGET_API, HANGAR_API, REQUEST_TIMEOUT, upstream_request
+from curseforge import get_mod
+from mcversions import normalize_versions
+
 # -------- MODRINTH --------
 def get_modrinth_server_game_versions(slug):
     try:
-        url = f"https://api.modrinth.com/v2/project/{slug}/version"
-        response = requests.get(url)
+        url = f"{MODRINTH_API}/project/{slug}/version"
+        response = upstream_request('GET', url, timeout=REQUEST_TIMEOUT)
         response.raise_for_status()
         data = response.json()
 
@@ -31,7 +33,7 @@ def get_modrinth_server_game_versions(slug):
                 else:
                     game_versions_dict[gv] = best_loader
 
-        return sorted(game_versions_dict.keys())
+        return normalize_versions(game_versions_dict.keys())
     except Exception:
         return None
 
@@ -43,16 +45,16 @@ def get_spigot_game_versions(url):
             return None
         
         resource_id = match.group(1)
-        api_url = f"https://api.spiget.org/v2/resources/{resource_id}"
+        api_url = f"{SPIGET_API}/resources/{resource_id}"
         
-        response = requests.get(api_url)
+        response = upstream_request('GET', api_url, timeout=REQUEST_TIMEOUT)
         if response.status_code != 200:
             return None
         
         data = response.json()
         versions = data.get('testedVersions', [])
         
-        return sorted(versions) if versions else []
+        return normalize_versions(versions)
     except Exception:
         return None
 
@@ -64,9 +66,9 @@ def get_hangar_game_versions(combined_slug):
         game_versions = set()
         
         while True:
-            url = f"https://hangar.papermc.io/api/v1/projects/{combined_slug}/versions?limit={limit}&offset={offset}"
+            url = f"{HANGAR_API}/projects/{combined_slug}/versions?limit={limit}&offset={offset}"
             
-            response = requests.get(url)
+            response = upstream_request('GET', url, timeout=REQUEST_TIMEOUT)
             response.raise_for_status()
                 
             data = response.json()
@@ -86,79 +88,27 @@ def get_hangar_game_versions(combined_slug):
                 
             offset += limit
         
-        return sorted(game_versions)
+        return normalize_versions(game_versions)
     except Exception:
         return None
 
 # -------- CURSEFORGE --------
 def get_curseforge_game_versions(url):
     try:
-        parsed = urlparse(url)
-        path_parts = parsed.path.strip('/').split('/')
-        if len(path_parts) < 3:
-            return []
-        
-        category = path_parts[1]
-        project_slug = path_parts[2]
-        
-        class_id = 6 if category == 'mc-mods' else 4471 if category == 'modpacks' else None
-        if not class_id:
-            return []
-        
-        api_url = f"https://api.curseforge.com/v1/mods/search?gameId=432&slug={project_slug}&classId={class_id}"
-        
-        headers = {
-            'Accept': 'application/json',
-            'x-api-key': '$2a$10$bL4bIL5pUWqfcO7KQtnMReakwtfHbNKh6v1uTpKlzhwoueEJQnPnm'
-        }
-        
-        response = requests.get(api_url, headers=headers)
-        if response.status_code != 200:
-            return []
-        
-        data = response.json()
-        if not data.get('data'):
+        mod = get_mod(url)
+        if not mod:
             return []
         
         versions = set()
-        for mod in data['data']:
-            for version in mod.get('latestFilesIndexes', []):
-                game_version = version.get('gameVersion')
-                if game_version and re.match(r'^1\.\d+(\.\d+)?$', game_version):
-                    versions.add(game_version)
+        for version in mod.get('latestFilesIndexes', []):
+            game_version = version.get('gameVersion')
+            if game_version and re.match(r'^1\.\d+(\.\d+)?$', game_version):
+                versions.add(game_version)
         
-        return sorted(versions) if versions else []
+        return normalize_versions(versions)
     except Exception:
         return []
 
-# -------- PLATFORM DETECTIE --------
-def detect_platform(url):
-    try:
-        parsed = urlparse(url)
-        host = parsed.netloc
-
-        if "modrinth.com" in host:
-            match = re.search(r"/(plugin|mod)/([^/]+)/?", parsed.path)
-            if match:
-                return "modrinth", match.group(2)
-
-        elif "spigotmc.org" in host:
-            return "spigot", url
-
-        elif "hangar.papermc.io" in host:
-            match = re.search(r"/([^/]+)/([^/]+)/?$", parsed.path)
-            if match:
-                author = match.group(1)
-                project = match.group(2)
-                return "hangar", f"{author}/{project}"
-
-        elif "curseforge.com" in host:
-            return "curseforge", url
-
-        return None, None
-    except Exception:
-        return None, None
-
 # -------- MAIN --------
 def main():
     parser = argparse.ArgumentParser(description="Print supported Minecraft versions of a plugin")
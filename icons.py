@@ -0,0 +1,179 @@
+import hashlib
+import io
+import json
+import os
+import re
+import tempfile
+import time
+
+try:
+    from PIL import Image
+except ImportError:  # Pillow is optioneel: zonder Pillow wordt alleen het origineel gespiegeld
+    Image = None
+
+from fetchers.router import upstream_request
+
+# Lokale spiegel van plugin iconen. Elk icoon wordt één keer gedownload,
+# content-addressed (sha256) opgeslagen en als vaste WebP thumbnails via
+# /icons/<hash> geserveerd, zodat bezoekers geen third-party hosts hoeven te laden.
+ICON_DIR = os.environ.get('ICON_DIR', 'icon-cache')
+THUMBNAIL_SIZES = (32, 64, 128)
+DEFAULT_SIZE = 128
+MAX_ICON_BYTES = 2 * 1024 * 1024
+# upstream pas opnieuw controleren (conditional GET) na deze tijd
+RECHECK_SECONDS = int(os.environ.get('ICON_RECHECK_SECONDS', 6 * 3600))
+
+_DIGEST = re.compile(r"^[0-9a-f]{64}$")
+# spiget gaf relatieve paden als "//static.spigotmc.org/..." die achter de host geplakt werden
+_DOUBLE_HOST = re.compile(r"^(https?:)//[^/]+//(?=[^/])")
+
+
+def repair_icon_url(url):
+    """Herstel kapotte upstream URLs zoals https://www.spigotmc.org//static.spigotmc.org/..."""
+    if not url:
+        return url
+    return _DOUBLE_HOST.sub(r"\1//", url.strip())
+
+
+def _write_atomic(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), prefix='.tmp-')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(tmp, path)
+    except Exception:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+
+def _blob_dir(digest):
+    return os.path.join(ICON_DIR, digest[:2])
+
+
+def _source_path(url):
+    return os.path.join(ICON_DIR, 'sources', hashlib.sha1(url.encode('utf-8')).hexdigest() + '.json')
+
+
+def _load_source(url):
+    try:
+        with open(_source_path(url), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _store(digest, content):
+    """Sla het origineel en de thumbnails op (alleen als ze nog niet bestaan)"""
+    original = os.path.join(_blob_dir(digest), f"{digest}.orig")
+    if not os.path.exists(original):
+        _write_atomic(original, content)
+    if Image is None:
+        return
+    for size in THUMBNAIL_SIZES:
+        path = os.path.join(_blob_dir(digest), f"{digest}-{size}.webp")
+        if os.path.exists(path):
+            continue
+        try:
+            with Image.open(io.BytesIO(content)) as img:
+                img = img.convert('RGBA')
+                img.thumbnail((size, size), Image.LANCZOS)
+                out = io.BytesIO()
+                img.save(out, 'WEBP', quality=85, method=6)
+            _write_atomic(path, out.getvalue())
+        except Exception:
+            # geen geldig beeld: het origineel blijft beschikbaar
+            return
+
+
+def mirror_icon(url, timeout=10):
+    """
+    Spiegel het icoon op url en retourneer de sha256 digest, of None bij een fout.
+    Een bekend icoon wordt alleen opnieuw gedownload als upstream veranderd is.
+    """
+    url = repair_icon_url(url)
+    if not url or not url.startswith(('http://', 'https://')):
+        return None
+
+    source = _load_source(url)
+    if source and time.time() - source.get('checked_at', 0) < RECHECK_SECONDS and has_icon(source['digest']):
+        return source['digest']
+
+    headers = {}
+    if source and has_icon(source['digest']):
+        if source.get('etag'):
+            headers['If-None-Match'] = source['etag']
+        if source.get('last_modified'):
+            headers['If-Modified-Since'] = source['last_modified']
+
+    try:
+        with upstream_request('GET', url, headers=headers, timeout=timeout, stream=True) as response:
+            if response.status_code == 304 and source:
+                digest = source['digest']
+            else:
+                response.raise_for_status()
+                if not response.headers.get('Content-Type', 'image/').startswith('image/'):
+                    return None
+                content = response.raw.read(MAX_ICON_BYTES + 1, decode_content=True)
+                if not content or len(content) > MAX_ICON_BYTES:
+                    return None
+                digest = hashlib.sha256(content).hexdigest()
+                _store(digest, content)
+    except Exception:
+        # bij een netwerkfout het laatst bekende icoon blijven gebruiken
+        return source['digest'] if source and has_icon(source['digest']) else None
+
+    record = {
+        'url': url,
+        'digest': digest,
+        'etag': response.headers.get('ETag') or (source or {}).get('etag'),
+        'last_modified': response.headers.get('Last-Modified') or (source or {}).get('last_modified'),
+        'checked_at': time.time(),
+    }
+    _write_atomic(_source_path(url), json.dumps(record).encode('utf-8'))
+    return digest
+
+
+def has_icon(digest):
+    return bool(digest) and os.path.exists(os.path.join(_blob_dir(digest), f"{digest}.orig"))
+
+
+def icon_file(digest, size=DEFAULT_SIZE):
+    """
+    (pad, mimetype, variant) van een gespiegeld icoon in de gevraagde grootte, of (None, None, None).
+    variant is de geleverde thumbnail grootte, of 'orig' als er (nog) geen thumbnail is en het
+    originele bestand geleverd wordt.
+    """
+    if not digest or not _DIGEST.match(digest):
+        return None, None, None
+    if size not in THUMBNAIL_SIZES:
+        size = DEFAULT_SIZE
+    thumbnail = os.path.join(_blob_dir(digest), f"{digest}-{size}.webp")
+    if os.path.exists(thumbnail):
+        return thumbnail, 'image/webp', size
+    original = os.path.join(_blob_dir(digest), f"{digest}.orig")
+    if os.path.exists(original):
+        return original, _sniff_mimetype(original), 'orig'
+    return None, None, None
+
+
+def _sniff_mimetype(path):
+    with open(path, 'rb') as f:
+        head = f.read(12)
+    if head.startswith(b'\x89PNG'):
+        return 'image/png'
+    if head[:3] == b'\xff\xd8\xff':
+        return 'image/jpeg'
+    if head[:6] in (b'GIF87a', b'GIF89a'):
+        return 'image/gif'
+    if head[:4] == b'RIFF' and head[8:12] == b'WEBP':
+        return 'image/webp'
+    if head.lstrip().startswith(b'<'):
+        return 'image/svg+xml'
+    return 'application/octet-stream'
+
+
+def icon_url(digest):
+    """Publieke URL van een gespiegeld icoon"""
+    return f"/icons/{digest}"
@@ -0,0 +1,415 @@
+import os
+import sqlite3
+import subprocess
+import sys
+import threading
+import time
+import uuid
+
+from fetchers.router import canonical_url, plugin_key, EXIT_NOT_FOUND, EXIT_UNAVAILABLE
+from records import PluginRecord
+import serializer
+
+# Persistente queue voor plugin fetches. Webserver en cron.py delen hetzelfde
+# bestand; elke process die start() aanroept verwerkt jobs uit de queue.
+QUEUE_PATH = os.environ.get('JOBQUEUE_PATH', 'jobs.db')
+
+QUEUED = 'queued'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+
+# Prioriteiten: interactieve fetches gaan voor bulk imports, die weer voor geplande refreshes
+PRIORITY_INTERACTIVE = 10
+PRIORITY_IMPORT = 5
+PRIORITY_REFRESH = 0
+
+# Soort fout van een mislukte job (error_kind), voor backoff en circuit breakers
+ERROR_NOT_FOUND = 'not_found'      # project bestaat niet (meer) upstream
+ERROR_UNAVAILABLE = 'unavailable'  # platform onbereikbaar of gaf geen data
+ERROR_TIMEOUT = 'timeout'
+ERROR_OTHER = 'error'
+
+
+def job_key(url):
+    """De-duplicatie key voor een fetch: de canonieke plugin key, anders de URL zelf"""
+    return plugin_key(url) or url.strip()
+
+
+def run_launcher(url, timeout=300, progress=None, upstream=None):
+    """
+    Voer launcher.py --stream uit voor een URL en retourneer de plugin data als (genormaliseerde)
+    dict. progress(veld, waarde) wordt aangeroepen voor elk veld zodra launcher.py het meldt,
+    upstream(calls per platform) met de HTTP calls die de fetch kostte (ook als hij mislukt).
+    """
+    args = [sys.executable, 'launcher.py', '--stream', url]
+    process = subprocess.Popen(args, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+    # stderr apart leeglezen, anders kan launcher.py vastlopen op een volle pipe
+    stderr = []
+    reader = threading.Thread(target=lambda: stderr.append(process.stderr.read()), daemon=True)
+    reader.start()
+    timer = threading.Timer(timeout, process.kill)
+    timer.start()
+    result = None
+    try:
+        for line in process.stdout:
+            if not line.strip():
+                continue
+            try:
+                message = serializer.loads(line)
+            except ValueError:
+                continue
+            if 'result' in message:
+                result = message['result']
+            elif 'field' in message and progress is not None:
+                progress(message['field'], message.get('value'))
+            elif 'upstream' in message and upstream is not None:
+                upstream(message['upstream'] or {})
+        process.wait()
+    finally:
+        timed_out = not timer.is_alive() and process.returncode != 0
+        timer.cancel()
+        if process.poll() is None:
+            process.kill()
+            process.wait()
+        reader.join()
+    if timed_out:
+        raise subprocess.TimeoutExpired(args, timeout)
+    if process.returncode != 0:
+        raise subprocess.CalledProcessError(process.returncode, args, stderr=''.join(stderr))
+    if result is None:
+        raise ValueError(f"Geen output ontvangen voor plugin {url}")
+    return PluginRecord.from_dict(result).to_dict()
+
+
+class JobQueue:
+    """SQLite-backed job queue met een worker pool voor plugin fetches"""
+
+    def __init__(self, path=QUEUE_PATH, workers=2, timeout=300, handler=run_launcher):
+        # handler(url, timeout=, progress=, upstream=) zoals run_launcher
+        self.path = path
+        self.workers = workers
+        self.timeout = timeout
+        self.handler = handler
+        # callbacks(job) die na elke afgeronde job in de worker thread worden aangeroepen
+        self.listeners = []
+        self._threads = []
+        self._stop = threading.Event()
+        self._wakeup = threading.Condition()
+        self._start_lock = threading.Lock()
+        self._init_db()
+
+    # -------------------------
+    # Database
+    # -------------------------
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def _init_db(self):
+        conn = self._connect()
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id TEXT PRIMARY KEY,
+                    key TEXT,
+                    url TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    priority INTEGER NOT NULL DEFAULT 0,
+                    result TEXT,
+                    error TEXT,
+                    error_kind TEXT,
+                    partial TEXT,
+                    upstream TEXT,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    created_at REAL NOT NULL,
+                    started_at REAL,
+                    finished_at REAL
+                )
+            """)
+            columns = [r['name'] for r in conn.execute("PRAGMA table_info(jobs)")]
+            if 'key' not in columns:
+                conn.execute("ALTER TABLE jobs ADD COLUMN key TEXT")
+            if 'error_kind' not in columns:
+                conn.execute("ALTER TABLE jobs ADD COLUMN error_kind TEXT")
+            if 'partial' not in columns:
+                conn.execute("ALTER TABLE jobs ADD COLUMN partial TEXT")
+            if 'upstream' not in columns:
+                conn.execute("ALTER TABLE jobs ADD COLUMN upstream TEXT")
+            # upstream HTTP calls per platform van alle processen samen (zie record_upstream)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS upstream_calls (
+                    platform TEXT PRIMARY KEY,
+                    count INTEGER NOT NULL DEFAULT 0
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, priority, created_at)")
+            conn.execute("CREATE INDEX IF NOT EXISTS jobs_key ON jobs (key, status)")
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _row_to_job(row):
+        job = {
+            'job_id': row['id'],
+            'key': row['key'],
+            'url': row['url'],
+            'status': row['status'],
+            'created_at': row['created_at'],
+            'started_at': row['started_at'],
+            'finished_at': row['finished_at'],
+        }
+        if row['partial'] is not None:
+            # velden die al binnen zijn terwijl de job nog loopt (zie _progress)
+            job['partial'] = serializer.loads(row['partial'])
+        if row['result'] is not None:
+            job['result'] = serializer.loads(row['result'])
+        if row['upstream'] is not None:
+            job['upstream'] = serializer.loads(row['upstream'])
+        if row['error'] is not None:
+            job['error'] = row['error']
+            job['error_kind'] = row['error_kind'] or ERROR_OTHER
+        return job
+
+    # -------------------------
+    # Public API
+    # -------------------------
+    def submit(self, url, priority=PRIORITY_INTERACTIVE):
+        """
+        Zet een fetch voor url in de queue en retourneer het job id.
+        Als er al een job voor hetzelfde project wacht of loopt, wordt die
+        hergebruikt zodat gelijktijdige aanvragen één fetch delen.
+        """
+        key = job_key(url)
+        url = canonical_url(url)
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(
+                "SELECT id, priority FROM jobs WHERE key = ? AND status IN (?, ?) ORDER BY created_at LIMIT 1",
+                (key, QUEUED, RUNNING)
+            ).fetchone()
+            if row:
+                if priority > row['priority']:
+                    conn.execute("UPDATE jobs SET priority = ? WHERE id = ?", (priority, row['id']))
+                conn.execute("COMMIT")
+                return row['id']
+            job_id = uuid.uuid4().hex
+            conn.execute(
+                "INSERT INTO jobs (id, key, url, status, priority, created_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (job_id, key, url, QUEUED, priority, time.time())
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+        with self._wakeup:
+            self._wakeup.notify()
+        return job_id
+
+    def get(self, job_id):
+        """Haal de status (en het resultaat) van een job op; None als onbekend"""
+        conn = self._connect()
+        try:
+            row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            return self._row_to_job(row) if row else None
+        finally:
+            conn.close()
+
+    def wait(self, job_id, timeout=None, interval=0.5):
+        """Wacht tot een job klaar of mislukt is en retourneer de job"""
+        deadline = time.time() + timeout if timeout else None
+        while True:
+            job = self.get(job_id)
+            if job is None or job['status'] in (DONE, FAILED):
+                return job
+            if deadline and time.time() >= deadline:
+                return job
+            time.sleep(interval)
+
+    def purge(self, older_than=86400):
+        """Verwijder afgeronde jobs ouder dan older_than seconden"""
+        conn = self._connect()
+        try:
+            conn.execute(
+                "DELETE FROM jobs WHERE status IN (?, ?) AND finished_at < ?",
+                (DONE, FAILED, time.time() - older_than)
+            )
+        finally:
+            conn.close()
+
+    def record_upstream(self, counts, job_id=None):
+        """
+        Tel upstream HTTP calls per platform op bij de totalen in de queue database, die
+        webserver workers en cron.py delen. Met job_id worden ze ook bij de job bewaard.
+        """
+        counts = {platform: int(n) for platform, n in (counts or {}).items() if n}
+        if not counts and job_id is None:
+            return
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.executemany(
+                "INSERT INTO upstream_calls (platform, count) VALUES (?, ?) "
+                "ON CONFLICT(platform) DO UPDATE SET count = count + excluded.count",
+                counts.items()
+            )
+            if job_id is not None:
+                conn.execute("UPDATE jobs SET upstream = ? WHERE id = ?", (serializer.dumps(counts), job_id))
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+    def upstream_calls(self):
+        """Totaal aantal upstream HTTP calls per platform, over alle processen"""
+        conn = self._connect()
+        try:
+            return {r['platform']: r['count'] for r in conn.execute("SELECT platform, count FROM upstream_calls")}
+        finally:
+            conn.close()
+
+    # -------------------------
+    # Workers
+    # -------------------------
+    def start(self):
+        """Start de worker pool (idempotent)"""
+        with self._start_lock:
+            if self._threads:
+                return
+            self._requeue_stale()
+            self._stop.clear()
+            for i in range(self.workers):
+                t = threading.Thread(target=self._worker_loop, name=f"fetch-worker-{i}", daemon=True)
+                t.start()
+                self._threads.append(t)
+
+    def stop(self):
+        """Stop de workers na hun huidige job"""
+        self._stop.set()
+        with self._wakeup:
+            self._wakeup.notify_all()
+        for t in self._threads:
+            t.join()
+        self._threads = []
+
+    def _requeue_stale(self):
+        """Zet jobs terug die bleven hangen doordat een proces crashte"""
+        conn = self._connect()
+        try:
+            conn.execute(
+                "UPDATE jobs SET status = ? WHERE status = ? AND started_at < ?",
+                (QUEUED, RUNNING, time.time() - self.timeout * 2)
+            )
+        finally:
+            conn.close()
+
+    def _claim(self):
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(
+                "SELECT id, url FROM jobs WHERE status = ? ORDER BY priority DESC, created_at LIMIT 1",
+                (QUEUED,)
+            ).fetchone()
+            if not row:
+                conn.execute("COMMIT")
+                return None
+            conn.execute(
+                "UPDATE jobs SET status = ?, started_at = ?, partial = NULL, attempts = attempts + 1 WHERE id = ?",
+                (RUNNING, time.time(), row['id'])
+            )
+            conn.execute("COMMIT")
+            return row['id'], row['url']
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+    def _finish(self, job_id, result=None, error=None, error_kind=None):
+        conn = self._connect()
+        try:
+            conn.execute(
+                "UPDATE jobs SET status = ?, result = ?, error = ?, error_kind = ?, finished_at = ? WHERE id = ?",
+                (
+                    FAILED if error is not None else DONE,
+                    serializer.dumps(result) if error is None else None,
+                    error,
+                    (error_kind or ERROR_OTHER) if error is not None else None,
+                    time.time(),
+                    job_id,
+                )
+            )
+        finally:
+            conn.close()
+
+    def _progress(self, job_id):
+        """Callback voor de handler: bewaar elk binnengekomen veld in partial"""
+        fields = {}
+
+        def progress(field, value):
+            fields[field] = value
+            conn = self._connect()
+            try:
+                conn.execute("UPDATE jobs SET partial = ? WHERE id = ?", (serializer.dumps(fields), job_id))
+            except sqlite3.Error as e:
+                print(f"Fout bij bewaren voortgang job {job_id}: {e}", file=sys.stderr)
+            finally:
+                conn.close()
+
+        return progress
+
+    def _upstream(self, job_id):
+        """Callback voor de handler: upstream calls van de job bij de job en de totalen bewaren"""
+        def upstream(counts):
+            try:
+                self.record_upstream(counts, job_id=job_id)
+            except sqlite3.Error as e:
+                print(f"Fout bij bewaren upstream calls job {job_id}: {e}", file=sys.stderr)
+
+        return upstream
+
+    def _notify(self, job_id):
+        job = self.get(job_id)
+        for listener in list(self.listeners):
+            try:
+                listener(job)
+            except Exception as e:
+                print(f"Fout in job listener: {e}", file=sys.stderr)
+
+    def _worker_loop(self):
+        while not self._stop.is_set():
+            try:
+                claimed = self._claim()
+            except sqlite3.Error as e:
+                print(f"Fout bij ophalen job uit queue: {e}", file=sys.stderr)
+                claimed = None
+
+            if not claimed:
+                # Geen werk: wacht op een submit in dit proces of poll voor jobs van andere processen
+                with self._wakeup:
+                    self._wakeup.wait(timeout=1.0)
+                continue
+
+            job_id, url = claimed
+            try:
+                result = self.handler(
+                    url, timeout=self.timeout, progress=self._progress(job_id), upstream=self._upstream(job_id)
+                )
+                self._finish(job_id, result=result)
+            except subprocess.CalledProcessError as e:
+                kind = {EXIT_NOT_FOUND: ERROR_NOT_FOUND, EXIT_UNAVAILABLE: ERROR_UNAVAILABLE}.get(e.returncode, ERROR_OTHER)
+                self._finish(job_id, error=f"Fout bij ophalen plugin data: {e.stderr}", error_kind=kind)
+            except subprocess.TimeoutExpired:
+                self._finish(job_id, error=f"Timeout bij ophalen plugin {url}", error_kind=ERROR_TIMEOUT)
+            except Exception as e:
+                self._finish(job_id, error=f"Onverwachte fout: {e}")
+            self._notify(job_id)
@@ -1,84 +1,207 @@
-import json
 import os
 import subprocess
 import sys
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from fetchers.router import (
+    canonical_url, plugin_key, add_upstream_calls, parse_upstream_report, take_upstream_calls,
+    EXIT_NOT_FOUND, EXIT_UNAVAILABLE,
+)
+from icons import mirror_icon, icon_url
+from records import PluginRecord
+from storage import database
+import projects
+import serializer
+
+# standaard aantal URLs dat --batch tegelijk ophaalt
+BATCH_JOBS = 4
+
+class ProjectNotFound(Exception):
+    """Het project bestaat niet (meer) upstream (fetcher exit code EXIT_NOT_FOUND)"""
 
 def run_script(script_name, url):
-    """Voert een Python script uit uit de fetchers map met de gegeven URL en retourneert de output"""
+    """
+    Voert een Python script uit uit de fetchers map met de gegeven URL en retourneert de output.
+    De upstream calls die het script meldt (zie fetchers/router.py) tellen mee voor dit proces.
+    """
     try:
         result = subprocess.run(
             [sys.executable, f'fetchers/{script_name}.py', url],
             capture_output=True,
             text=True,
-            check=True
+            check=True,
+            env=dict(os.environ, UPSTREAM_REPORT='1')
         )
+        add_upstream_calls(parse_upstream_report(result.stderr))
         return result.stdout.strip()
     except subprocess.CalledProcessError as e:
+        add_upstream_calls(parse_upstream_report(e.stderr))
+        if e.returncode == EXIT_NOT_FOUND:
+            raise ProjectNotFound(url) from e
         print(f"Fout bij uitvoeren fetchers/{script_name}.py: {e}", file=sys.stderr)
         return ""
 
-def get_plugin_data(url):
-    """Haalt alle plugin data op voor een gegeven URL"""
-    versions = run_script('versions', url)
-    
+def _fetch_icon(url):
+    icon_source = run_script('icon', url)
+    # Spiegel het icoon lokaal; bij een fout blijft de upstream URL staan
+    digest = mirror_icon(icon_source) if icon_source else None
+    return {'icon': icon_url(digest) if digest else icon_source, 'icon_source': icon_source}
+
+def get_plugin_data(url, on_field=None):
+    """
+    Haalt alle plugin data op voor een gegeven URL. De titel eerst: bestaat het project niet
+    meer (ProjectNotFound) of is het platform onbereikbaar (lege titel), dan slaan we de
+    andere fetchers over. Die draaien daarna tegelijk; on_field(naam, waarde) wordt per veld
+    aangeroepen zodra het binnen is (zie --stream).
+    """
     titles = run_script('titles', url)
+    if not titles:
+        return None
+    if on_field is not None:
+        on_field('title', titles)
     
-    icon = run_script('icon', url)
+    fields = {'title': titles}
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        futures = {
+            pool.submit(run_script, 'versions', url): 'versions',
+            pool.submit(_fetch_icon, url): 'icon',
+            pool.submit(run_script, 'description', url): 'description',
+            pool.submit(run_script, 'author', url): 'author',
+        }
+        for future in as_completed(futures):
+            name = futures[future]
+            value = future.result()
+            if name == 'icon':
+                fields.update(value)
+                value = value['icon']
+            elif name == 'versions':
+                # zoals in het record: genormaliseerd
+                value = fields[name] = PluginRecord(url=url, versions=value).versions
+            else:
+                fields[name] = value
+            if on_field is not None:
+                on_field(name, value)
     
-    description = run_script('description', url)
-    
-    author = run_script('author', url)
-    
-    # Maak plugin object
-    plugin = {
-        "url": url,
-        "title": titles,
-        "description": description,
-        "author": author,
-        "icon": icon,
-        "versions": versions
-    }
-    
-    return plugin
+    # Maak plugin record (versies worden daar genormaliseerd)
+    return PluginRecord(url=url, **fields)
 
 def save_to_file(plugin):
-    """Slaat een plugin op in het plugins.json bestand"""
-    # Lees bestaande data of initialiseer lege lijst
-    if os.path.exists('plugins.json'):
-        with open('plugins.json', 'r', encoding='utf-8') as f:
-            try:
-                plugins = json.load(f)
-            except json.JSONDecodeError:
-                plugins = []
-    else:
-        plugins = []
+    """Slaat een PluginRecord op als catalogus plugin (zonder owner) in de projects table van de webserver"""
+    db = database("plugin-craft-db")
+    projects.migrate_legacy_plugins(db)
     
-    # Verwijder bestaande plugin met dezelfde URL
-    plugins = [p for p in plugins if p['url'] != plugin['url']]
+    # Nieuwe metadata vervangt die van een bestaand project (ook voor de owners ervan)
+    projects.add_plugin(db, None, plugin, refresh=True)
     
-    # Voeg nieuwe plugin toe
-    plugins.append(plugin)
+    print(f"Plugin {plugin.url} is opgeslagen in de projects table!")
+
+def read_urls(path):
+    """URLs uit een bestand (of '-' voor stdin), één per regel; lege regels en # commentaar tellen niet"""
+    f = sys.stdin if path == '-' else open(path, 'r', encoding='utf-8')
+    try:
+        return [line.strip() for line in f if line.strip() and not line.strip().startswith('#')]
+    finally:
+        if f is not sys.stdin:
+            f.close()
+
+def fetch_one(url):
+    """Plugin data voor één URL als (status, PluginRecord of None)"""
+    try:
+        plugin = get_plugin_data(url)
+    except ProjectNotFound:
+        return 'not_found', None
+    except Exception as e:
+        print(f"Fout bij ophalen {url}: {e}", file=sys.stderr)
+        return 'error', None
+    return ('ok', plugin) if plugin is not None else ('unavailable', None)
+
+def emit(**fields):
+    print(serializer.dumps(fields), flush=True)
+
+def run_batch(path, jobs=BATCH_JOBS, confirm=False):
+    """
+    Haal alle URLs uit path op met jobs tegelijk en schrijf per URL een NDJSON regel zodra hij
+    klaar is, plus een slotregel. Met confirm worden alle gelukte plugins in één commit opgeslagen.
+    Retourneert het aantal mislukte URLs.
+    """
+    urls = {}
+    failed = 0
+    for url in read_urls(path):
+        if not plugin_key(url):
+            failed += 1
+            emit(url=url, status='invalid')
+            continue
+        key = plugin_key(url)
+        if key in urls:
+            emit(url=url, status='duplicate', key=key)
+            continue
+        urls[key] = canonical_url(url)
     
-    # Schrijf terug naar bestand
-    with open('plugins.json', 'w', encoding='utf-8') as f:
-        json.dump(plugins, f, indent=4, ensure_ascii=False)
+    plugins = []
+    with ThreadPoolExecutor(max_workers=max(1, jobs)) as pool:
+        futures = {pool.submit(fetch_one, url): (key, url) for key, url in urls.items()}
+        for future in as_completed(futures):
+            key, url = futures[future]
+            status, plugin = future.result()
+            if plugin is not None:
+                plugins.append(plugin)
+                emit(url=url, status=status, key=key, plugin=plugin.to_dict())
+            else:
+                failed += 1
+                emit(url=url, status=status, key=key)
     
-    print(f"Plugin {plugin['url']} is opgeslagen in plugins.json!")
+    if confirm and plugins:
+        db = database("plugin-craft-db")
+        projects.migrate_legacy_plugins(db)
+        projects.add_plugins(db, None, plugins, refresh=True)
+    emit(done=True, fetched=len(plugins), failed=failed, saved=len(plugins) if confirm else 0)
+    return failed
 
 def main():
+    # Bulk modus: python launcher.py --batch <bestand|-> [--jobs N] [confirm]
+    if len(sys.argv) > 2 and sys.argv[1] == '--batch':
+        args = sys.argv[2:]
+        path = args.pop(0)
+        jobs = BATCH_JOBS
+        if len(args) >= 2 and args[0] == '--jobs':
+            jobs = int(args[1])
+            args = args[2:]
+        confirm = bool(args) and args[0].lower() == 'confirm'
+        sys.exit(1 if run_batch(path, jobs, confirm) else 0)
+    
     # Controleer command-line argumenten
-    if len(sys.argv) < 2:
+    if len(sys.argv) < 2 or (sys.argv[1] == '--stream' and len(sys.argv) < 3):
         print("Gebruik: python launcher.py <url> [confirm]")
+        print("         python launcher.py --stream <url> [confirm]")
+        print("         python launcher.py --batch <bestand|-> [--jobs N] [confirm]")
         sys.exit(1)
     
-    url = sys.argv[1].strip()
-    confirm = len(sys.argv) > 2 and sys.argv[2].lower() == 'confirm'
+    # --stream: per veld een NDJSON regel zodra het binnen is, dan {"upstream": calls per platform}
+    # en daarna {"result": plugin} (jobqueue.py)
+    stream = sys.argv[1] == '--stream'
+    args = sys.argv[2:] if stream else sys.argv[1:]
+    url = canonical_url(args[0])
+    confirm = len(args) > 1 and args[1].lower() == 'confirm'
     
-    # Haal plugin data op
-    plugin = get_plugin_data(url)
+    # Haal plugin data op; met --stream volgen daarna altijd de upstream calls (ook bij een fout)
+    try:
+        plugin = get_plugin_data(url, on_field=(lambda name, value: emit(field=name, value=value)) if stream else None)
+    except ProjectNotFound:
+        if stream:
+            emit(upstream=take_upstream_calls())
+        print(f"Project {url} bestaat niet (meer)", file=sys.stderr)
+        sys.exit(EXIT_NOT_FOUND)
+    if stream:
+        emit(upstream=take_upstream_calls())
+    if plugin is None:
+        print(f"Kon {url} niet ophalen (platform onbereikbaar?)", file=sys.stderr)
+        sys.exit(EXIT_UNAVAILABLE)
     
     # Toon de JSON structuur
-    print(json.dumps(plugin, indent=4, ensure_ascii=False))
+    if stream:
+        emit(result=plugin.to_dict())
+    else:
+        print(plugin.to_json(indent=4))
     
     # Als confirm is opgegeven, sla dan op
     if confirm:
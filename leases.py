@@ -0,0 +1,162 @@
+import bisect
+import hashlib
+import os
+import socket
+import threading
+import time
+
+# Meerdere refresh workers (cron.py, op één of meer hosts met dezelfde
+# soketDB map) verdelen de projecten. De key ruimte is opgedeeld in
+# REFRESH_SLOTS vaste slots (hash van de canonieke plugin key); de slots
+# worden met consistent hashing over de levende workers verdeeld, zodat een
+# worker erbij of eraf maar een klein deel van de slots laat verhuizen.
+#
+# Een worker refresht alleen projecten in slots waarvan hij de lease heeft
+# (refresh_leases table, vernieuwd door een achtergrond thread). Een lease die
+# niet vernieuwd wordt verloopt na LEASE_TTL; pas dan kan een andere worker het
+# slot overnemen. Zo refreshen twee workers nooit tegelijk hetzelfde slot en
+# blijft er geen slot liggen als een worker wegvalt. De klokken van de hosts
+# moeten gelijk lopen (NTP).
+
+WORKERS = 'refresh_workers'
+LEASES = 'refresh_leases'
+
+REFRESH_SLOTS = int(os.environ.get('REFRESH_SLOTS', 256))
+LEASE_TTL = float(os.environ.get('LEASE_TTL', 30))
+LEASE_RENEW = float(os.environ.get('LEASE_RENEW', 10))
+# punten per worker op de ring (meer = gelijkmatiger verdeeld)
+RING_REPLICAS = 64
+
+
+def _hash(value):
+    return int.from_bytes(hashlib.sha1(value.encode('utf-8')).digest()[:8], 'big')
+
+
+def slot_of(key, slots=REFRESH_SLOTS):
+    """Vast slot van een canonieke plugin key"""
+    return _hash(key) % slots
+
+
+def default_worker_id():
+    return os.environ.get('REFRESH_WORKER_ID') or f"{socket.gethostname()}:{os.getpid()}"
+
+
+class HashRing:
+    """Consistent hashing: elk slot hoort bij de eerste worker met een ring punt erna"""
+
+    def __init__(self, members, replicas=RING_REPLICAS):
+        points = sorted((_hash(f"{member}#{i}"), member) for member in members for i in range(replicas))
+        self._hashes = [h for h, _ in points]
+        self._members = [m for _, m in points]
+
+    def node(self, slot):
+        if not self._hashes:
+            return None
+        i = bisect.bisect(self._hashes, _hash(f"slot-{slot}")) % len(self._hashes)
+        return self._members[i]
+
+
+class LeaseManager:
+    """
+    Lease van deze worker op zijn slots. renew() meldt de worker als levend, neemt vrije of
+    verlopen slots over die volgens de ring bij hem horen en vernieuwt de slots die hij al
+    heeft; slots die naar een andere worker gaan worden losgelaten.
+    """
+
+    def __init__(self, db, worker_id=None, slots=REFRESH_SLOTS, ttl=LEASE_TTL, renew_interval=LEASE_RENEW,
+                 clock=time.time):
+        self.db = db
+        self.worker_id = worker_id or default_worker_id()
+        self.slots = slots
+        self.ttl = ttl
+        self.renew_interval = renew_interval
+        self.clock = clock
+        # verhoogd als de set slots verandert, zodat cron.py de projecten opnieuw verdeelt
+        self.generation = 0
+        self.members = []
+        self._held = frozenset()
+        self._valid_until = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    # -------------------------
+    # Leases
+    # -------------------------
+    def renew(self):
+        now = self.clock()
+        me = self.worker_id
+        with self.db.transaction(WORKERS) as workers:
+            workers[:] = [w for w in workers if w.get('expires_at', 0) > now and w.get('worker') != me]
+            workers.append({'worker': me, 'host': socket.gethostname(), 'pid': os.getpid(), 'expires_at': now + self.ttl})
+            members = sorted(w['worker'] for w in workers)
+        ring = HashRing(members)
+
+        held = set()
+        with self.db.transaction(LEASES) as leases:
+            by_slot = {lease.get('slot'): lease for lease in leases}
+            for slot in range(self.slots):
+                lease = by_slot.get(slot)
+                mine = lease is not None and lease.get('worker') == me
+                if ring.node(slot) == me:
+                    if mine or lease is None or lease.get('expires_at', 0) <= now:
+                        by_slot[slot] = {'slot': slot, 'worker': me, 'expires_at': now + self.ttl}
+                        held.add(slot)
+                elif mine:
+                    # hoort nu bij een andere worker: direct vrijgeven
+                    del by_slot[slot]
+            leases[:] = [by_slot[slot] for slot in sorted(by_slot)]
+
+        self.members = members
+        # marge: stoppen met uitdelen voordat een andere worker het slot kan overnemen
+        self._valid_until = now + self.ttl - self.renew_interval
+        if held != self._held:
+            print(f"Worker {me}: {len(held)}/{self.slots} slots ({len(members)} worker(s) actief)")
+            self._held = frozenset(held)
+            self.generation += 1
+        return held
+
+    def release(self):
+        """Geef alle leases vrij en meld de worker af (bij stoppen), zodat anderen meteen overnemen"""
+        me = self.worker_id
+        with self.db.transaction(WORKERS) as workers:
+            workers[:] = [w for w in workers if w.get('worker') != me]
+        with self.db.transaction(LEASES) as leases:
+            leases[:] = [lease for lease in leases if lease.get('worker') != me]
+        self._held = frozenset()
+        self._valid_until = 0
+        self.generation += 1
+
+    def holds(self, key):
+        """Mag deze worker key nu refreshen?"""
+        return self.clock() < self._valid_until and slot_of(key, self.slots) in self._held
+
+    def owned(self, keys):
+        """De keys in slots van deze worker"""
+        held = self._held
+        return {key for key in keys if slot_of(key, self.slots) in held}
+
+    # -------------------------
+    # Achtergrond thread
+    # -------------------------
+    def start(self):
+        """Eerste renew direct, daarna elke renew_interval in een thread (ook tijdens een lange batch)"""
+        self.renew()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name='lease-renew', daemon=True)
+        self._thread.start()
+
+    def stop(self, release=True):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        if release:
+            self.release()
+
+    def _loop(self):
+        while not self._stop.wait(self.renew_interval):
+            try:
+                self.renew()
+            except Exception as e:
+                # zonder renew verloopt _valid_until vanzelf en stopt deze worker met uitdelen
+                print(f"Lease vernieuwen mislukt: {e}")
@@ -0,0 +1,266 @@
+import bisect
+import re
+import threading
+import time
+from contextlib import contextmanager
+
+# Lichtgewicht in-process metrics in Prometheus text format. Alleen labels met
+# een beperkt aantal waarden gebruiken (route templates, platform, statement type),
+# zodat het geheugengebruik begrensd blijft en de metrics in productie aan kunnen.
+
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+
+def _format_labels(names, values, extra=None):
+    pairs = list(zip(names, values))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ''
+    body = ','.join(
+        '{}="{}"'.format(k, str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+        for k, v in pairs
+    )
+    return '{' + body + '}'
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+class Registry:
+    """Verzameling metrics die samen op /metrics gerenderd worden"""
+
+    def __init__(self):
+        self._metrics = []
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        with self._lock:
+            self._metrics.append(metric)
+        return metric
+
+    def render(self):
+        with self._lock:
+            metrics = list(self._metrics)
+        lines = []
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.samples())
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry()
+
+
+class Counter:
+    """Monotoon stijgende teller, optioneel bij het renderen gelezen (callback: {labelwaarde(n): waarde})"""
+    kind = 'counter'
+
+    def __init__(self, name, documentation, labelnames=(), registry=REGISTRY, callback=None):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.callback = callback
+        self._values = {}
+        self._lock = threading.Lock()
+        registry.register(self)
+
+    def inc(self, amount=1, **labels):
+        key = tuple(labels.get(n, '') for n in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self):
+        if self.callback is not None:
+            try:
+                values = self.callback()
+            except Exception:
+                return []
+            items = sorted((k if isinstance(k, tuple) else (k,), v) for k, v in values.items())
+        else:
+            with self._lock:
+                items = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, k)} {_format_value(v)}" for k, v in items]
+
+
+class Gauge:
+    """Waarde die op en neer kan gaan, optioneel berekend bij het renderen"""
+    kind = 'gauge'
+
+    def __init__(self, name, documentation, labelnames=(), registry=REGISTRY, callback=None):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.callback = callback
+        self._values = {}
+        self._lock = threading.Lock()
+        registry.register(self)
+
+    def set(self, value, **labels):
+        key = tuple(labels.get(n, '') for n in self.labelnames)
+        with self._lock:
+            self._values[key] = value
+
+    def samples(self):
+        if self.callback is not None:
+            try:
+                return [f"{self.name} {_format_value(self.callback())}"]
+            except Exception:
+                return []
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, k)} {_format_value(v)}" for k, v in items]
+
+
+class Histogram:
+    """Verdeling van waarnemingen (bv. latency in seconden) over vaste buckets"""
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS, registry=REGISTRY):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # per label combinatie: [counts per bucket (+Inf als laatste), som]
+        self._values = {}
+        self._lock = threading.Lock()
+        registry.register(self)
+
+    def observe(self, value, **labels):
+        key = tuple(labels.get(n, '') for n in self.labelnames)
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            entry[0][i] += 1
+            entry[1] += value
+
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def samples(self):
+        with self._lock:
+            items = sorted((k, (list(v[0]), v[1])) for k, v in self._values.items())
+        lines = []
+        for key, (counts, total) in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += count
+                le = ('le', _format_value(float(bound)))
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {cumulative}")
+        return lines
+
+
+# -------------------------
+# Database instrumentation
+# -------------------------
+DB_QUERY_SECONDS = Histogram(
+    'db_query_duration_seconds',
+    'Duur van db calls per statement type (SELECT, ..., of ITER, TRANSACTION, WRITE_ROWS, UPDATE_ROWS)',
+    ['statement'])
+DB_ROWS_READ = Counter(
+    'db_rows_read_total', 'Aantal rows gelezen door SELECT, iter_rows en transaction', ['table'])
+
+
+_FROM_TABLE = re.compile(r"\bFROM\s+(\w+)", re.IGNORECASE)
+
+
+class InstrumentedDatabase:
+    """
+    Proxy rond een database object die elke call timet en telt: execute() en de streamende
+    en transactionele methodes van storage.py (iter_rows, transaction, write_rows, update_rows).
+    """
+
+    def __init__(self, db, on_execute=None):
+        self._db = db
+        # optionele callback() per db call, bv. om calls per request te tellen
+        self._on_execute = on_execute
+
+    def _observe(self, statement, start):
+        DB_QUERY_SECONDS.observe(time.perf_counter() - start, statement=statement)
+        if self._on_execute is not None:
+            self._on_execute()
+
+    def execute(self, query, *args, **kwargs):
+        words = query.split(None, 1)
+        statement = words[0].upper() if words else ''
+        start = time.perf_counter()
+        try:
+            return_value = self._db.execute(query, *args, **kwargs)
+        finally:
+            self._observe(statement, start)
+        if statement == 'SELECT' and isinstance(return_value, list):
+            match = _FROM_TABLE.search(query)
+            table = match.group(1) if match else ''
+            DB_ROWS_READ.inc(len(return_value), table=table)
+        return return_value
+
+    def iter_rows(self, table):
+        """Zoals db.iter_rows; de tijd telt alleen het lezen zelf, niet het werk van de aanroeper"""
+        rows = self._db.iter_rows(table)
+        elapsed = 0.0
+        count = 0
+        try:
+            while True:
+                start = time.perf_counter()
+                try:
+                    row = next(rows)
+                except StopIteration:
+                    return
+                finally:
+                    elapsed += time.perf_counter() - start
+                count += 1
+                yield row
+        finally:
+            rows.close()
+            DB_QUERY_SECONDS.observe(elapsed, statement='ITER')
+            DB_ROWS_READ.inc(count, table=table)
+            if self._on_execute is not None:
+                self._on_execute()
+
+    @contextmanager
+    def transaction(self, table):
+        """Zoals db.transaction; de tijd loopt van lock tot commit (zo lang blijft de table op slot)"""
+        start = time.perf_counter()
+        try:
+            with self._db.transaction(table) as rows:
+                DB_ROWS_READ.inc(len(rows), table=table)
+                yield rows
+        finally:
+            self._observe('TRANSACTION', start)
+
+    def write_rows(self, table, rows, keep=None):
+        start = time.perf_counter()
+        try:
+            return self._db.write_rows(table, rows, keep=keep)
+        finally:
+            self._observe('WRITE_ROWS', start)
+
+    def update_rows(self, table, key, updates):
+        start = time.perf_counter()
+        try:
+            return self._db.update_rows(table, key, updates)
+        finally:
+            self._observe('UPDATE_ROWS', start)
+
+    def __getattr__(self, name):
+        return getattr(self._db, name)
+
+
+def render():
+    """Alle geregistreerde metrics in Prometheus text exposition format"""
+    return REGISTRY.render()
@@ -0,0 +1,288 @@
+import serializer
+from fetchers.router import canonical_url
+from records import PluginRecord
+
+# Plugin metadata staat één keer per project in de projects table (met de
+# canonieke project key als project_id); user_plugins koppelt owners aan een
+# project_id. Een plugin die 500 gebruikers hebben toegevoegd wordt zo één keer
+# opgeslagen, door cron.py één keer ververst en één keer upstream opgehaald.
+# Een koppeling zonder owner is een catalogus plugin (launcher.py confirm).
+# Projecten zonder koppelingen worden opgeruimd.
+#
+# Elke schrijfactie voegt de geraakte project_ids toe aan catalogue_changes met
+# een oplopend versienummer (de change version van de catalogus). Clients met
+# een lokale kopie halen via changes_since() alleen de projecten op die sinds
+# hun versie gewijzigd zijn. Het log bewaart de laatste CHANGES_KEEP regels; wie
+# verder achterloopt haalt de hele catalogus opnieuw op.
+#
+# Lock volgorde bij schrijven: (plugins,) projects, user_plugins, catalogue_changes.
+
+PROJECTS = 'projects'
+LINKS = 'user_plugins'
+CHANGES = 'catalogue_changes'
+CHANGES_KEEP = 10000
+# oude layout: een volledige kopie van de metadata per owner
+LEGACY = 'plugins'
+
+# sentinel voor "elke owner" (None is de owner van catalogus plugins)
+ANY_OWNER = object()
+
+
+def project_id(url):
+    """Canonieke project key van een URL ('platform:project_id'), of de canonieke URL"""
+    return PluginRecord(url=canonical_url(url)).key
+
+
+def _quote(value):
+    return "'" + str(value).replace("'", "''") + "'"
+
+
+def _project_row(record):
+    row = record.replace(owner=None).to_dict()
+    row['project_id'] = record.key
+    return row
+
+
+def _project_record(row):
+    row = dict(row)
+    row.pop('project_id', None)
+    return PluginRecord.from_dict(row)
+
+
+def _same_owner(link, owner):
+    return owner is ANY_OWNER or link.get('owner') == owner
+
+
+def _log_changes(changes, keys):
+    """Voeg keys (project_ids) toe aan het change log (de rows van een CHANGES transaction)"""
+    version = changes[-1].get('version', 0) if changes else 0
+    for key in dict.fromkeys(keys):
+        version += 1
+        changes.append({'version': version, 'project_id': key})
+    if len(changes) > CHANGES_KEEP:
+        del changes[:len(changes) - CHANGES_KEEP]
+
+
+def catalogue_version(db):
+    """Huidige change version van de catalogus (0 zonder wijzigingen)"""
+    version = 0
+    for change in db.iter_rows(CHANGES):
+        version = change.get('version', version)
+    return version
+
+
+def changes_since(db, since):
+    """
+    Wijzigingen na versie since als (versie, [(project_id, [PluginRecord per koppeling])]); een
+    lege lijst records betekent dat het project weg is. Is since uit het log gevallen (of
+    onbekend), dan (versie, None): de client moet alles opnieuw ophalen.
+    """
+    version, first = 0, None
+    keys = {}
+    for change in db.iter_rows(CHANGES):
+        version = change.get('version', version)
+        if first is None:
+            first = version
+        if version > since:
+            keys[change.get('project_id')] = True
+    if since > version or (first is not None and since < first - 1):
+        return version, None
+    if not keys:
+        return version, []
+    records = {row.get('project_id'): _project_record(row) for row in db.iter_rows(PROJECTS)
+               if row.get('project_id') in keys}
+    rows = {key: [] for key in keys}
+    for link in db.iter_rows(LINKS):
+        key = link.get('project_id')
+        if key in rows and key in records:
+            owner = link.get('owner')
+            rows[key].append(records[key].replace(owner=owner) if owner else records[key])
+    return version, list(rows.items())
+
+
+def migrate_legacy_plugins(db):
+    """
+    Verplaats rows uit de oude plugins table naar projects + user_plugins (eenmalig; daarna
+    is de oude table leeg). Bij meerdere kopieën van een project wint de laatste row.
+    """
+    if not db.execute(f"SELECT url FROM {LEGACY}"):
+        return 0
+    with db.transaction(LEGACY) as legacy, db.transaction(PROJECTS) as projects, \
+            db.transaction(LINKS) as links:
+        index = {row.get('project_id'): i for i, row in enumerate(projects)}
+        linked = {(link.get('owner'), link.get('project_id')) for link in links}
+        for row in legacy:
+            if not isinstance(row, dict) or not row.get('url'):
+                continue
+            record = PluginRecord.from_dict(row)
+            record = record.replace(url=canonical_url(record.url))
+            key = record.key
+            if key in index:
+                projects[index[key]] = _project_row(record)
+            else:
+                index[key] = len(projects)
+                projects.append(_project_row(record))
+            if (record.owner, key) not in linked:
+                linked.add((record.owner, key))
+                links.append({'owner': record.owner, 'project_id': key})
+        moved = len(legacy)
+        legacy[:] = []
+    return moved
+
+
+def load_projects(db):
+    """Alle projecten als {project_id: PluginRecord} (zonder owner)"""
+    return {row.get('project_id'): _project_record(row) for row in db.execute(f"SELECT * FROM {PROJECTS}")}
+
+
+def iter_projects(db):
+    """Alle projecten als (project_id, PluginRecord), streamend (de table komt niet in het geheugen)"""
+    for row in db.iter_rows(PROJECTS):
+        yield row.get('project_id'), _project_record(row)
+
+
+def project_ids(db):
+    """Alle project_ids, streamend"""
+    for row in db.iter_rows(PROJECTS):
+        yield row.get('project_id')
+
+
+def get_project(db, key):
+    """PluginRecord van één project, of None"""
+    rows = db.execute(f"SELECT * FROM {PROJECTS} WHERE project_id = {_quote(key)}")
+    return _project_record(rows[0]) if rows else None
+
+
+def load_plugins(db, owner=ANY_OWNER):
+    """
+    Eén PluginRecord per koppeling (met owner), in volgorde van toevoegen; zoals de rows
+    van de oude plugins table. Met owner alleen de plugins van die gebruiker.
+    """
+    if owner is ANY_OWNER:
+        links = db.execute(f"SELECT * FROM {LINKS}")
+    else:
+        links = db.execute(f"SELECT * FROM {LINKS} WHERE owner = {_quote(owner)}")
+    if not links:
+        return []
+    projects = load_projects(db)
+    plugins = []
+    for link in links:
+        record = projects.get(link.get('project_id'))
+        if record is not None:
+            plugins.append(record.replace(owner=link.get('owner')) if link.get('owner') else record)
+    return plugins
+
+
+def owner_counts(db):
+    """Aantal owners per project_id (catalogus koppelingen tellen niet mee)"""
+    counts = {}
+    for link in db.iter_rows(LINKS):
+        if link.get('owner'):
+            counts[link.get('project_id')] = counts.get(link.get('project_id'), 0) + 1
+    return counts
+
+
+def add_plugin(db, owner, record, refresh=False):
+    """
+    Koppel record aan owner (None: catalogus plugin). Een nieuw project krijgt de metadata van
+    record; een bestaand project alleen met refresh, zodat één gebruiker de gedeelde
+    metadata niet overschrijft.
+    """
+    record = record.replace(url=canonical_url(record.url), owner=None)
+    key = record.key
+    with db.transaction(PROJECTS) as projects, db.transaction(LINKS) as links, \
+            db.transaction(CHANGES) as changes:
+        changed = False
+        for i, row in enumerate(projects):
+            if row.get('project_id') == key:
+                if refresh and row != _project_row(record):
+                    projects[i] = _project_row(record)
+                    changed = True
+                break
+        else:
+            projects.append(_project_row(record))
+            changed = True
+        if not any(link.get('project_id') == key and link.get('owner') == owner for link in links):
+            links.append({'owner': owner, 'project_id': key})
+            changed = True
+        if changed:
+            _log_changes(changes, [key])
+    return key
+
+
+def add_plugins(db, owner, records, refresh=False):
+    """
+    Zoals add_plugin, maar voor veel records in één commit (bulk import). Dubbele projecten
+    in records tellen één keer. Retourneert de project_ids in volgorde van records.
+    """
+    keys = []
+    changed = []
+    with db.transaction(PROJECTS) as projects, db.transaction(LINKS) as links, \
+            db.transaction(CHANGES) as changes:
+        index = {row.get('project_id'): i for i, row in enumerate(projects)}
+        linked = {link.get('project_id') for link in links if link.get('owner') == owner}
+        for record in records:
+            record = record.replace(url=canonical_url(record.url), owner=None)
+            key = record.key
+            if key not in index:
+                index[key] = len(projects)
+                projects.append(_project_row(record))
+                changed.append(key)
+            elif refresh and projects[index[key]] != _project_row(record):
+                projects[index[key]] = _project_row(record)
+                changed.append(key)
+            if key not in linked:
+                linked.add(key)
+                links.append({'owner': owner, 'project_id': key})
+                changed.append(key)
+            keys.append(key)
+        _log_changes(changes, changed)
+    return keys
+
+
+def save_project(db, key, record):
+    """Ververs de metadata van een bestaand project; False als het project intussen weg is"""
+    row = _project_row(record.replace(url=canonical_url(record.url)))
+    row['project_id'] = key
+    if db.execute(f"UPDATE {PROJECTS} SET DATA={serializer.dumps(row)} WHERE project_id = {_quote(key)}") > 0:
+        with db.transaction(CHANGES) as changes:
+            _log_changes(changes, [key])
+        return True
+    return False
+
+
+def save_projects(db, records):
+    """
+    Ververs de metadata van meerdere projecten ({project_id: PluginRecord}) in één commit.
+    Retourneert de project_ids die echt gewijzigd zijn (verwijderde projecten vallen weg).
+    """
+    updates = {}
+    for key, record in records.items():
+        row = _project_row(record.replace(url=canonical_url(record.url)))
+        row['project_id'] = key
+        updates[key] = row
+    updated = db.update_rows(PROJECTS, 'project_id', updates)
+    if updated:
+        # na de commit van projects: wie het log leest ziet de nieuwe metadata
+        with db.transaction(CHANGES) as changes:
+            _log_changes(changes, sorted(updated))
+    return updated
+
+
+def remove_plugin(db, url, owner=ANY_OWNER):
+    """
+    Verwijder de koppeling(en) van owner (standaard: iedereen) met het project van url en
+    ruim het project op als er geen koppelingen meer naar wijzen. Retourneert het aantal
+    verwijderde koppelingen.
+    """
+    key = project_id(url)
+    with db.transaction(PROJECTS) as projects, db.transaction(LINKS) as links, \
+            db.transaction(CHANGES) as changes:
+        kept = [link for link in links if not (link.get('project_id') == key and _same_owner(link, owner))]
+        removed = len(links) - len(kept)
+        links[:] = kept
+        if not any(link.get('project_id') == key for link in kept):
+            projects[:] = [row for row in projects if row.get('project_id') != key]
+        if removed:
+            _log_changes(changes, [key])
+    return removed
@@ -0,0 +1,129 @@
+import sys
+
+import serializer
+from fetchers.router import plugin_key
+from fetchers.mcversions import normalize_versions
+
+# Eén vast record type voor plugins in plaats van losse dicts. __slots__ houdt
+# het geheugen per plugin klein (geen __dict__ per object) en veelvoorkomende
+# strings (versies, owners) worden geïnterned, zodat caches met veel plugins
+# compact blijven. Onbekende velden uit de table gaan niet verloren (extra).
+
+FIELDS = ('url', 'title', 'description', 'author', 'icon', 'icon_source', 'versions', 'owner')
+# velden die alleen in de JSON komen als ze een waarde hebben
+OPTIONAL_FIELDS = ('icon_source', 'owner')
+
+# Genormaliseerde versie tuples per invoer. De meeste plugins delen een handvol
+# versie combinaties, dus records delen daarmee ook dezelfde tuple.
+VERSION_CACHE_SIZE = 4096
+_version_tuples = {}
+
+
+def _versions(value):
+    """Versies als gesorteerde tuple van geïnternde strings (gedeeld tussen records)"""
+    if not value:
+        return ()
+    try:
+        cache_key = value if isinstance(value, str) else tuple(value)
+        cached = _version_tuples.get(cache_key)
+    except TypeError:
+        cache_key, cached = None, None
+    if cached is None:
+        cached = tuple(sys.intern(v) for v in normalize_versions(value))
+        if cache_key is not None and len(_version_tuples) < VERSION_CACHE_SIZE:
+            _version_tuples[cache_key] = cached
+    return cached
+
+
+class PluginRecord:
+    """Plugin metadata (plus owner) zoals opgeslagen in de plugins table"""
+
+    __slots__ = FIELDS + ('extra',)
+
+    def __init__(self, url, title='', description='', author='', icon='', icon_source=None,
+                 versions=(), owner=None, extra=None):
+        self.url = url
+        self.title = title
+        self.description = description
+        self.author = author
+        self.icon = icon
+        self.icon_source = icon_source
+        self.versions = _versions(versions)
+        self.owner = sys.intern(owner) if isinstance(owner, str) else owner
+        self.extra = extra or None
+
+    @classmethod
+    def from_dict(cls, data):
+        """Record uit een table row of fetch resultaat; onbekende keys komen in extra"""
+        extra = {k: v for k, v in data.items() if k not in FIELDS}
+        return cls(
+            url=data.get('url') or '',
+            title=data.get('title') or '',
+            description=data.get('description') or '',
+            author=data.get('author') or '',
+            icon=data.get('icon') or '',
+            icon_source=data.get('icon_source'),
+            versions=data.get('versions'),
+            owner=data.get('owner'),
+            extra=extra,
+        )
+
+    @classmethod
+    def from_json(cls, text):
+        return cls.from_dict(serializer.loads(text))
+
+    def to_dict(self):
+        """Dict in de vorm van de table rows en de API responses"""
+        data = {
+            'url': self.url,
+            'title': self.title,
+            'description': self.description,
+            'author': self.author,
+            'icon': self.icon,
+            'versions': list(self.versions),
+        }
+        for name in OPTIONAL_FIELDS:
+            value = getattr(self, name)
+            if value is not None:
+                data[name] = value
+        if self.extra:
+            data.update(self.extra)
+        return data
+
+    def to_json(self, indent=None):
+        """Compacte JSON (voor de table en de API), of ingesprongen met indent"""
+        if indent is not None:
+            return serializer.dumps_pretty(self.to_dict(), indent=indent)
+        return serializer.dumps(self.to_dict())
+
+    @property
+    def key(self):
+        """Canonieke project key ('platform:project_id'), of de URL voor onbekende platforms"""
+        return plugin_key(self.url) or self.url
+
+    def replace(self, **changes):
+        """Kopie met gewijzigde velden"""
+        values = {name: getattr(self, name) for name in self.__slots__}
+        values.update(changes)
+        return PluginRecord(**values)
+
+    def __eq__(self, other):
+        if not isinstance(other, PluginRecord):
+            return NotImplemented
+        return all(getattr(self, name) == getattr(other, name) for name in self.__slots__)
+
+    __hash__ = None
+
+    def __repr__(self):
+        return f"PluginRecord(url={self.url!r}, title={self.title!r}, owner={self.owner!r})"
+
+
+def records_from_rows(rows):
+    """Table rows (lijst dicts, of een foutmelding van de database) naar records"""
+    if not isinstance(rows, list):
+        return []
+    return [PluginRecord.from_dict(row) for row in rows if isinstance(row, dict)]
+
+
+def rows_from_records(records):
+    return [record.to_dict() for record in records]
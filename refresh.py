@@ -0,0 +1,550 @@
+import heapq
+import os
+import random
+import time
+from collections import Counter, deque
+
+from fetchers.router import route
+from jobqueue import (
+    DONE, FAILED, PRIORITY_REFRESH,
+    ERROR_NOT_FOUND, ERROR_UNAVAILABLE, ERROR_TIMEOUT, ERROR_OTHER,
+)
+from records import PluginRecord
+import projects
+
+# Refresh van alle projecten door cron.py, met oog voor falende upstreams:
+#
+# - per project een backoff: na elke mislukte refresh wacht het project
+#   exponentieel langer (REFRESH_BACKOFF_BASE * 2^(n-1), max REFRESH_BACKOFF_MAX),
+#   en een project dat upstream niet meer bestaat wordt REFRESH_NOT_FOUND_TTL
+#   niet meer geprobeerd (negatieve cache). De stand staat in de refresh_state
+#   table zodat een herstart van cron.py niet alles opnieuw probeert.
+# - per platform een circuit breaker: na CIRCUIT_THRESHOLD storingen op rij
+#   (onbereikbaar of timeout) gaat er even niets meer naar dat platform; daarna
+#   test één job (half-open) of het weer werkt. Projecten op een platform met
+#   een open breaker schuiven door naar de volgende run.
+# - een begrensd aantal jobs tegelijk in de queue (REFRESH_WINDOW), zodat een
+#   storing niet honderden jobs tegelijk laat hangen.
+# - een scheduler met per project het volgende refresh moment in een heap, in
+#   plaats van elk uur alles tegelijk: refreshes zijn gespreid over het interval
+#   en nieuwe of populaire projecten komen vaker aan de beurt. De planning staat
+#   in de refresh_schedule table, zodat een herstart verder gaat waar hij was.
+# - een streaming pipeline (lezen -> ophalen -> vergelijken -> schrijven) in
+#   batches van REFRESH_BATCH projecten: per batch één commit, alleen voor
+#   projecten waarvan de data echt veranderd is, en nooit de hele catalogus in
+#   het geheugen.
+
+REFRESH_STATE = 'refresh_state'
+REFRESH_SCHEDULE = 'refresh_schedule'
+
+# refresh interval per project: standaard, populair (veel owners) en net toegevoegd
+REFRESH_INTERVAL = float(os.environ.get('REFRESH_INTERVAL', 3600))
+REFRESH_INTERVAL_POPULAR = float(os.environ.get('REFRESH_INTERVAL_POPULAR', 1800))
+REFRESH_INTERVAL_NEW = float(os.environ.get('REFRESH_INTERVAL_NEW', 900))
+REFRESH_POPULAR_OWNERS = int(os.environ.get('REFRESH_POPULAR_OWNERS', 5))
+# hoe lang een project als "nieuw" geldt
+REFRESH_NEW_PERIOD = float(os.environ.get('REFRESH_NEW_PERIOD', 86400))
+
+REFRESH_BACKOFF_BASE = float(os.environ.get('REFRESH_BACKOFF_BASE', 3600))
+REFRESH_BACKOFF_MAX = float(os.environ.get('REFRESH_BACKOFF_MAX', 7 * 86400))
+REFRESH_NOT_FOUND_TTL = float(os.environ.get('REFRESH_NOT_FOUND_TTL', 7 * 86400))
+# spreiding van de wachttijd (+/- 10%) zodat mislukte projecten niet tegelijk terugkomen
+REFRESH_JITTER = 0.1
+
+CIRCUIT_THRESHOLD = int(os.environ.get('CIRCUIT_THRESHOLD', 5))
+CIRCUIT_COOLDOWN = float(os.environ.get('CIRCUIT_COOLDOWN', 300))
+CIRCUIT_COOLDOWN_MAX = float(os.environ.get('CIRCUIT_COOLDOWN_MAX', 3600))
+
+REFRESH_WINDOW = int(os.environ.get('REFRESH_WINDOW', 16))
+# projecten per batch (en per commit) in de pipeline
+REFRESH_BATCH = int(os.environ.get('REFRESH_BATCH', 64))
+# Maximale wachttijd per plugin (launcher.py timeout + marge voor de queue)
+JOB_TIMEOUT = 600
+POLL_INTERVAL = 0.5
+
+# fouten die iets over het platform zeggen (en niet over één project)
+PLATFORM_ERRORS = (ERROR_UNAVAILABLE, ERROR_TIMEOUT)
+
+
+def _kept(row, scope, others):
+    """Blijft een row van een andere worker staan bij het wegschrijven?"""
+    key = row.get('project_id')
+    return others is not None and scope is not None and key not in scope and key in others
+
+
+def platform_of(url):
+    r = route(url) if url else None
+    return r.platform if r else 'unknown'
+
+
+# -------------------------
+# Backoff en negatieve cache per project
+# -------------------------
+class FailureTracker:
+    """Mislukte refreshes per project_id, bewaard in de refresh_state table"""
+
+    def __init__(self, db, clock=time.time):
+        self.db = db
+        self.clock = clock
+        self._state = {}
+        self._dirty = False
+        # met meerdere workers (leases.py): de projecten van deze worker en de keys van
+        # de rest, waarvan de rows bij flush() blijven staan
+        self._scope = None
+        self._others = None
+        self.load()
+
+    def load(self):
+        rows = self.db.execute(f"SELECT * FROM {REFRESH_STATE}")
+        self._state = {row['project_id']: row for row in rows if row.get('project_id')}
+        self._dirty = False
+
+    def flush(self):
+        """Schrijf de stand weg (één keer per run in plaats van per mislukte job)"""
+        if not self._dirty:
+            return
+        with self.db.transaction(REFRESH_STATE) as rows:
+            kept = [row for row in rows if _kept(row, self._scope, self._others)]
+            rows[:] = kept + list(self._state.values())
+        self._dirty = False
+
+    def get(self, key):
+        return self._state.get(key)
+
+    def is_due(self, key):
+        row = self._state.get(key)
+        return row is None or row.get('next_attempt_at', 0) <= self.clock()
+
+    def success(self, key):
+        if self._state.pop(key, None) is not None:
+            self._dirty = True
+
+    def failure(self, key, kind, error=None):
+        """Registreer een mislukte refresh en retourneer de wachttijd tot de volgende poging"""
+        row = self._state.get(key) or {'project_id': key, 'failures': 0}
+        failures = row['failures'] + 1
+        if kind == ERROR_NOT_FOUND:
+            delay = REFRESH_NOT_FOUND_TTL
+        else:
+            delay = min(REFRESH_BACKOFF_BASE * 2 ** (failures - 1), REFRESH_BACKOFF_MAX)
+        delay *= random.uniform(1 - REFRESH_JITTER, 1 + REFRESH_JITTER)
+        self._state[key] = dict(
+            row,
+            failures=failures,
+            error_kind=kind,
+            last_error=(error or '')[:500],
+            next_attempt_at=self.clock() + delay,
+        )
+        self._dirty = True
+        return delay
+
+    def prune(self, keys, others=None):
+        """
+        Beperk de stand tot keys: projecten die niet meer bestaan (of naar een andere worker
+        zijn gegaan) worden vergeten. others: keys van andere workers, die in de table blijven.
+        Projecten die er nieuw bij komen krijgen hun stand uit de table.
+        """
+        keys = set(keys)
+        if self._scope is not None and keys - self._scope:
+            added = keys - self._scope
+            for row in self.db.iter_rows(REFRESH_STATE):
+                if row.get('project_id') in added:
+                    self._state.setdefault(row['project_id'], row)
+        for key in [k for k in self._state if k not in keys]:
+            del self._state[key]
+            self._dirty = True
+        self._scope = keys
+        self._others = others
+
+
+# -------------------------
+# Circuit breaker per platform
+# -------------------------
+class CircuitBreaker:
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half-open'
+
+    def __init__(self, platform, threshold=CIRCUIT_THRESHOLD, cooldown=CIRCUIT_COOLDOWN,
+                 max_cooldown=CIRCUIT_COOLDOWN_MAX, clock=time.time):
+        self.platform = platform
+        self.threshold = threshold
+        self.base_cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self.clock = clock
+        self.state = self.CLOSED
+        self.failures = 0
+        self.cooldown = cooldown
+        self.open_until = 0
+        self._probing = False
+
+    def allow(self):
+        """Mag er een job naar dit platform? In half-open precies één (de test job)"""
+        if self.state == self.OPEN and self.clock() >= self.open_until:
+            self.state = self.HALF_OPEN
+            self._probing = False
+        if self.state == self.CLOSED:
+            return True
+        if self.state == self.HALF_OPEN and not self._probing:
+            self._probing = True
+            return True
+        return False
+
+    def record(self, kind=None):
+        """Uitkomst van een job: None bij succes, anders de error_kind"""
+        self._probing = False
+        if kind in PLATFORM_ERRORS:
+            self.failures += 1
+            if self.state == self.HALF_OPEN:
+                # test job mislukt: langer dicht
+                self._open(min(self.cooldown * 2, self.max_cooldown))
+            elif self.failures >= self.threshold:
+                self._open(self.base_cooldown)
+        elif kind is None or kind == ERROR_NOT_FOUND:
+            # het platform antwoordde (ook een 404 is een antwoord)
+            self.state = self.CLOSED
+            self.failures = 0
+            self.cooldown = self.base_cooldown
+
+    def _open(self, cooldown):
+        self.state = self.OPEN
+        self.cooldown = cooldown
+        self.open_until = self.clock() + cooldown
+        print(f"Circuit breaker {self.platform} open voor {cooldown:.0f}s na {self.failures} storing(en)")
+
+
+class Breakers(dict):
+    """{platform: CircuitBreaker}, aangemaakt bij eerste gebruik"""
+
+    def __missing__(self, platform):
+        breaker = self[platform] = CircuitBreaker(platform)
+        return breaker
+
+
+# -------------------------
+# Refresh run
+# -------------------------
+def refresh_projects(plugins, job_queue, save, tracker, breakers, window=REFRESH_WINDOW,
+                     timeout=JOB_TIMEOUT, poll_interval=POLL_INTERVAL, on_result=None):
+    """
+    Ververs {project_id: PluginRecord} via de job queue; save(key, record) slaat een gelukte
+    refresh op. Retourneert een Counter met de uitkomsten (updated, failed, not_found,
+    backoff, deferred, skipped); on_result(key, uitkomst) wordt per project aangeroepen.
+    """
+    stats = Counter()
+
+    def done(key, outcome):
+        stats[outcome] += 1
+        if on_result is not None:
+            on_result(key, outcome)
+
+    # per platform een eigen wachtrij: een open breaker blokkeert alleen zijn eigen platform
+    pending = {}
+    for key, plugin in plugins.items():
+        if not plugin.url:
+            print("Plugin zonder URL gevonden, overslaan...")
+            done(key, 'skipped')
+        elif not tracker.is_due(key):
+            done(key, 'backoff')
+        else:
+            pending.setdefault(platform_of(plugin.url), deque()).append((key, plugin))
+
+    in_flight = {}  # job_id -> (key, plugin, platform, submitted_at)
+    while pending or in_flight:
+        # jobs indienen, om en om per platform, tot het window vol is
+        busy = Counter(platform for _, _, platform, _ in in_flight.values())
+        progress = True
+        while progress and len(in_flight) < window:
+            progress = False
+            for platform in list(pending):
+                if len(in_flight) >= window:
+                    break
+                breaker = breakers[platform]
+                if not breaker.allow():
+                    if not busy[platform]:
+                        # geen test job meer onderweg: de rest van dit platform naar de volgende run
+                        deferred = pending.pop(platform)
+                        for key, _ in deferred:
+                            done(key, 'deferred')
+                        print(f"{len(deferred)} project(en) op {platform} uitgesteld (circuit breaker {breaker.state})")
+                    continue
+                key, plugin = pending[platform].popleft()
+                if not pending[platform]:
+                    del pending[platform]
+                print(f"Bijwerken plugin: {plugin.url}")
+                job_id = job_queue.submit(plugin.url, priority=PRIORITY_REFRESH)
+                in_flight[job_id] = (key, plugin, platform, time.time())
+                busy[platform] += 1
+                progress = True
+
+        if not in_flight:
+            continue
+        time.sleep(poll_interval)
+
+        # afgeronde (of te lang lopende) jobs verwerken
+        for job_id, (key, plugin, platform, submitted_at) in list(in_flight.items()):
+            job = job_queue.get(job_id)
+            status = job['status'] if job else FAILED
+            if status not in (DONE, FAILED) and time.time() - submitted_at < timeout:
+                continue
+            del in_flight[job_id]
+
+            if status == DONE:
+                breakers[platform].record(None)
+                tracker.success(key)
+                if save(key, PluginRecord.from_dict(job['result'])):
+                    print(f"Plugin succesvol bijgewerkt: {plugin.url}")
+                    done(key, 'updated')
+                else:
+                    # het project is intussen verwijderd
+                    done(key, 'failed')
+                continue
+
+            if status == FAILED:
+                kind, error = job.get('error_kind'), job.get('error')
+            elif job is None:
+                kind, error = ERROR_OTHER, 'job niet gevonden'
+            else:
+                kind, error = ERROR_TIMEOUT, f"geen resultaat binnen {timeout}s"
+            breakers[platform].record(kind)
+            delay = tracker.failure(key, kind, error)
+            done(key, 'not_found' if kind == ERROR_NOT_FOUND else 'failed')
+            print(f"Fout bij bijwerken plugin {plugin.url} ({kind}), volgende poging over {delay / 3600:.1f} uur:")
+            print(f"Error output: {error}")
+            print(f"Originele data behouden voor: {plugin.url}")
+
+    tracker.flush()
+    return stats
+
+
+# -------------------------
+# Scheduler
+# -------------------------
+class RefreshScheduler:
+    """
+    Volgende refresh moment per project_id in een heap (met lazy delete: een entry telt
+    alleen als hij gelijk is aan het moment in self._due). Bewaard in refresh_schedule.
+    """
+
+    def __init__(self, db, clock=time.time):
+        self.db = db
+        self.clock = clock
+        self._due = {}         # project_id -> next_due_at
+        self._first_seen = {}  # project_id -> moment waarop de scheduler het project zag
+        self._owners = {}      # project_id -> aantal owners
+        self._running = set()  # uitgedeeld door pop_due, nog geen resultaat
+        self._others = None    # keys van andere workers (zie FailureTracker)
+        self._heap = []
+        self._restored = False
+        self.load()
+
+    def load(self):
+        """Planning uit de checkpoint (refresh_schedule) terugzetten"""
+        self._due = {}
+        self._first_seen = {}
+        for row in self.db.iter_rows(REFRESH_SCHEDULE):
+            key = row.get('project_id')
+            if key:
+                self._due[key] = row.get('next_due_at', 0)
+                self._first_seen[key] = row.get('first_seen', 0)
+        self._heap = [(due, key) for key, due in self._due.items()]
+        heapq.heapify(self._heap)
+        self._restored = bool(self._due)
+
+    def checkpoint(self):
+        """Schrijf de planning weg"""
+        scope = set(self._due)
+        self.db.write_rows(REFRESH_SCHEDULE, (
+            {'project_id': key, 'next_due_at': due, 'first_seen': self._first_seen.get(key, 0)}
+            for key, due in list(self._due.items())
+        ), keep=lambda row: _kept(row, scope, self._others))
+
+    def __len__(self):
+        return len(self._due)
+
+    def interval(self, key):
+        """Refresh interval van een project: korter voor nieuwe en populaire projecten"""
+        if self.clock() - self._first_seen.get(key, 0) < REFRESH_NEW_PERIOD:
+            return REFRESH_INTERVAL_NEW
+        if self._owners.get(key, 0) >= REFRESH_POPULAR_OWNERS:
+            return REFRESH_INTERVAL_POPULAR
+        return REFRESH_INTERVAL
+
+    def schedule(self, key, at):
+        self._due[key] = at
+        heapq.heappush(self._heap, (at, key))
+
+    def schedule_next(self, key):
+        """Volgende refresh na een interval, met jitter zodat projecten niet gaan samenklonteren"""
+        interval = self.interval(key)
+        self.schedule(key, self.clock() + interval * random.uniform(1 - REFRESH_JITTER, 1 + REFRESH_JITTER))
+
+    def sync(self, keys, owners=None, others=None):
+        """
+        Neem de huidige projecten over: nieuwe projecten krijgen een plek, verwijderde
+        verdwijnen. Bij de allereerste start (geen checkpoint) worden alle projecten
+        gelijkmatig over één interval verdeeld in plaats van allemaal meteen. Met meerdere
+        workers zijn keys de projecten van deze worker en others die van de rest; een project
+        dat van een andere worker komt neemt zijn planning uit de checkpoint mee.
+        """
+        now = self.clock()
+        keys = set(keys)
+        self._owners = dict(owners or {})
+        self._others = others
+        for key in [k for k in self._due if k not in keys]:
+            del self._due[key]
+            self._first_seen.pop(key, None)
+        added = keys - self._due.keys()
+        if added and self._restored:
+            for row in self.db.iter_rows(REFRESH_SCHEDULE):
+                key = row.get('project_id')
+                if key in added:
+                    added.discard(key)
+                    self._first_seen[key] = row.get('first_seen', 0)
+                    self.schedule(key, row.get('next_due_at', 0))
+        for key in added:
+            if self._restored:
+                # net toegevoegd: de launcher heeft de data al vers opgehaald
+                self._first_seen[key] = now
+                self.schedule_next(key)
+            else:
+                self._first_seen[key] = 0
+                self.schedule(key, now + random.uniform(0, self.interval(key)))
+        self._restored = True
+        self._running &= keys
+        if len(self._heap) > 2 * len(self._due) + 64:
+            # te veel verlopen heap entries: opnieuw opbouwen
+            self._heap = [(due, key) for key, due in self._due.items() if key not in self._running]
+            heapq.heapify(self._heap)
+
+    def pop_due(self, limit):
+        """Tot limit projecten die aan de beurt zijn (vroegste eerst)"""
+        now = self.clock()
+        due = []
+        while self._heap and len(due) < limit:
+            at, key = self._heap[0]
+            if self._due.get(key) != at or key in self._running:
+                heapq.heappop(self._heap)
+                continue
+            if at > now:
+                break
+            heapq.heappop(self._heap)
+            # zonder heap entry wordt hij niet opnieuw uitgedeeld tot completed(); in de
+            # checkpoint blijft het oude moment staan, zodat een crash hem niet overslaat
+            self._running.add(key)
+            due.append(key)
+        return due
+
+    def iter_due(self):
+        """Projecten die aan de beurt zijn, lazy: wat tijdens het verwerken due wordt komt er ook bij"""
+        while True:
+            due = self.pop_due(1)
+            if not due:
+                return
+            yield due[0]
+
+    def drop(self, key):
+        """Vergeet een project (bv. omdat een andere worker het slot nu heeft); zijn checkpoint row blijft"""
+        self._due.pop(key, None)
+        self._first_seen.pop(key, None)
+        self._running.discard(key)
+
+    def release(self):
+        """Zet uitgedeelde projecten zonder resultaat (bv. na een fout in de run) terug"""
+        for key in self._running:
+            if key in self._due:
+                heapq.heappush(self._heap, (self._due[key], key))
+        self._running.clear()
+
+    def next_due(self):
+        """Moment van de eerstvolgende refresh, of None"""
+        while self._heap and (self._due.get(self._heap[0][1]) != self._heap[0][0]
+                              or self._heap[0][1] in self._running):
+            heapq.heappop(self._heap)
+        return self._heap[0][0] if self._heap else None
+
+    def completed(self, key, outcome, tracker, retry_at=None):
+        """
+        Plan een project opnieuw in na een refresh (uitkomst van refresh_projects). Na een
+        fout bepaalt de backoff van de FailureTracker de volgende poging; een project op een
+        platform met open circuit breaker komt terug op retry_at (einde van de cooldown).
+        """
+        self._running.discard(key)
+        if key not in self._due:
+            return
+        row = tracker.get(key)
+        if outcome in ('failed', 'not_found', 'backoff') and row:
+            self.schedule(key, row['next_attempt_at'])
+        elif outcome == 'deferred':
+            self.schedule(key, max(retry_at or 0, self.clock() + CIRCUIT_COOLDOWN))
+        else:
+            self.schedule_next(key)
+
+
+# -------------------------
+# Streaming pipeline: lezen -> ophalen -> vergelijken -> schrijven
+# -------------------------
+def _chunks(iterable, size):
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def read_batches(db, keys, size=REFRESH_BATCH):
+    """Per batch (project_ids, {project_id: PluginRecord}); verwijderde projecten ontbreken in de dict"""
+    for chunk in _chunks(keys, size):
+        batch = {}
+        for key in chunk:
+            record = projects.get_project(db, key)
+            if record is not None:
+                batch[key] = record
+        yield chunk, batch
+
+
+def fetch_batches(batches, job_queue, tracker, breakers, prefetch=None, **options):
+    """Per batch de opgehaalde records ({project_id: PluginRecord}) en de uitkomst per project"""
+    for chunk, batch in batches:
+        if prefetch is not None and batch:
+            prefetch(batch)
+        fetched = {}
+        outcomes = [(key, 'removed') for key in chunk if key not in batch]
+
+        def collect(key, record):
+            fetched[key] = record
+            return True
+
+        stats = refresh_projects(batch, job_queue, collect, tracker, breakers,
+                                 on_result=lambda key, outcome: outcomes.append((key, outcome)), **options)
+        stats['removed'] = len(chunk) - len(batch)
+        yield batch, fetched, outcomes, stats
+
+
+def write_batches(db, fetched_batches):
+    """Schrijf per batch alleen de gewijzigde projecten, in één commit"""
+    for batch, fetched, outcomes, stats in fetched_batches:
+        changed = {key: record for key, record in fetched.items() if record != batch[key]}
+        written = projects.save_projects(db, changed)
+        stats['unchanged'] = len(fetched) - len(changed)
+        stats['written'] = len(written)
+        yield batch, outcomes, stats
+
+
+def refresh_pipeline(db, keys, job_queue, tracker, breakers, batch_size=REFRESH_BATCH, prefetch=None,
+                     on_result=None, **options):
+    """
+    Ververs de projecten in keys (een iterable, mag lazy zijn) in batches van batch_size.
+    prefetch(batch) kan per batch upstream data vooraf ophalen; on_result(key, uitkomst, record)
+    volgt per project na de commit van zijn batch. Yields een Counter met uitkomsten per batch.
+    """
+    batches = read_batches(db, keys, batch_size)
+    fetched = fetch_batches(batches, job_queue, tracker, breakers, prefetch=prefetch, **options)
+    for batch, outcomes, stats in write_batches(db, fetched):
+        if on_result is not None:
+            for key, outcome in outcomes:
+                on_result(key, outcome, batch.get(key))
+        yield stats
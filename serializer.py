@@ -0,0 +1,44 @@
+import json
+
+try:
+    import orjson
+except ImportError:  # optionele dependency: zonder orjson via de stdlib json module
+    orjson = None
+
+# Eén plek voor JSON encode/decode: API responses, table rows (storage.py), job
+# resultaten en de launcher output. Met orjson (indien geïnstalleerd) een
+# stuk sneller; de output is compact en altijd UTF-8 (geen \uXXXX escapes).
+
+BACKEND = 'orjson' if orjson is not None else 'json'
+
+_SEPARATORS = (',', ':')
+
+
+def dumpb(obj, default=None):
+    """Compacte JSON als UTF-8 bytes; default(obj) voor types die JSON niet kent"""
+    if orjson is not None:
+        try:
+            return orjson.dumps(obj, default=default)
+        except TypeError:
+            # bv. niet-string dict keys of ints buiten 64 bit: de stdlib kan dat wel
+            pass
+    return json.dumps(obj, ensure_ascii=False, separators=_SEPARATORS, default=default).encode('utf-8')
+
+
+def dumps(obj, default=None):
+    """Compacte JSON als str"""
+    if orjson is not None:
+        return dumpb(obj, default=default).decode('utf-8')
+    return json.dumps(obj, ensure_ascii=False, separators=_SEPARATORS, default=default)
+
+
+def dumps_pretty(obj, indent=4):
+    """Ingesprongen JSON voor mensen (launcher output, .meta files)"""
+    return json.dumps(obj, ensure_ascii=False, indent=indent)
+
+
+def loads(data):
+    """JSON uit str of bytes; ValueError bij ongeldige JSON"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
@@ -0,0 +1,88 @@
+import argparse
+import os
+import sys
+
+# Productie entry point: draait webserver.app onder gunicorn (meerdere processen
+# met elk meerdere threads), of onder waitress op Windows waar gunicorn niet werkt.
+#
+#   python serve.py --workers 4 --threads 8
+#
+# Alle workers delen de session key (webserver.load_secret_key), de database
+# (storage.py: een file lock per table, writes via temp file + rename) en de job
+# queue (jobs.db). In-memory caches zijn per worker; ze vergelijken de stamp van
+# catalogue_changes (webserver._changes_stamp) en bouwen opnieuw op zodra een
+# ander proces de catalogus gewijzigd heeft.
+#
+# /metrics: upstream_requests_total komt uit jobs.db en geldt voor alle processen;
+# de overige metrics (latency, db calls, fetch job tijd) zijn per worker.
+
+DEFAULT_WORKERS = int(os.environ.get('WEB_WORKERS', (os.cpu_count() or 1) * 2 + 1))
+DEFAULT_THREADS = int(os.environ.get('WEB_THREADS', 4))
+DEFAULT_HOST = os.environ.get('WEB_HOST', '0.0.0.0')
+DEFAULT_PORT = int(os.environ.get('WEB_PORT', 5000))
+# open /api/plugins/stream verbindingen per proces; elke stream houdt een thread bezet
+# (standaard de helft van de threads, 0 zet live updates uit)
+DEFAULT_STREAMS = int(os.environ['STREAM_MAX_CONNECTIONS']) if os.environ.get('STREAM_MAX_CONNECTIONS') else None
+# fetch jobs draaien in de achtergrond, dus requests zelf blijven kort
+REQUEST_TIMEOUT = int(os.environ.get('WEB_TIMEOUT', 60))
+
+
+def serve_gunicorn(host, port, workers, threads):
+    from gunicorn.app.base import BaseApplication
+
+    class Application(BaseApplication):
+        def load_config(self):
+            self.cfg.set('bind', f"{host}:{port}")
+            self.cfg.set('workers', workers)
+            self.cfg.set('threads', threads)
+            self.cfg.set('worker_class', 'gthread')
+            self.cfg.set('timeout', REQUEST_TIMEOUT)
+            if os.environ.get('WEB_ACCESS_LOG'):
+                self.cfg.set('accesslog', os.environ['WEB_ACCESS_LOG'])
+            # niet preloaden: elke worker importeert de app zelf (eigen db handles en threads)
+            self.cfg.set('preload_app', False)
+
+        def load(self):
+            from webserver import app
+            return app
+
+    Application().run()
+
+
+def serve_waitress(host, port, workers, threads):
+    from waitress import serve
+    from webserver import app
+
+    # waitress is één proces: gebruik evenveel threads als workers * threads
+    serve(app, host=host, port=port, threads=max(1, workers * threads))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Start de plugin repository webserver (productie)")
+    parser.add_argument('--host', default=DEFAULT_HOST)
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS,
+                        help="aantal processen (standaard $WEB_WORKERS of 2 * cpu's + 1)")
+    parser.add_argument('--threads', type=int, default=DEFAULT_THREADS,
+                        help="threads per proces (standaard $WEB_THREADS of 4)")
+    parser.add_argument('--streams', type=int, default=DEFAULT_STREAMS,
+                        help="open live streams per proces (standaard $STREAM_MAX_CONNECTIONS of threads / 2)")
+    args = parser.parse_args(argv)
+
+    streams = args.streams if args.streams is not None else args.threads // 2
+    if not 0 <= streams < args.threads:
+        parser.error("--streams moet kleiner zijn dan --threads: gewone requests hebben minstens één thread nodig")
+    if sys.platform == 'win32':
+        # waitress is één proces met workers * threads threads
+        streams *= args.workers
+    # webserver leest dit bij het importeren (gunicorn workers erven de environment)
+    os.environ['STREAM_MAX_CONNECTIONS'] = str(streams)
+
+    if sys.platform == 'win32':
+        serve_waitress(args.host, args.port, args.workers, args.threads)
+    else:
+        serve_gunicorn(args.host, args.port, args.workers, args.threads)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,714 @@
+import json
+import mmap
+import os
+import re
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+
+import serializer
+
+try:
+    import fcntl
+except ImportError:  # Windows: msvcrt kent alleen exclusieve locks
+    fcntl = None
+    import msvcrt
+
+# Opslag van de tables in soketDB/<project>/<table>.json (+ .meta), met
+# dezelfde execute() interface als soketdb. Elke table heeft een advisory
+# lock file: SELECT neemt een gedeelde lock, schrijvende statements een
+# exclusieve lock rond lezen -> wijzigen -> schrijven. Schrijven gaat via een
+# temp file + fsync + atomic rename, zodat lezers (ook in andere processen:
+# serve.py workers, cron.py, launcher.py) nooit een half bestand zien.
+
+DB_ROOT = os.environ.get('DB_ROOT', 'soketDB')
+LOCK_TIMEOUT = float(os.environ.get('DB_LOCK_TIMEOUT', 30))
+# bij contention opnieuw proberen met oplopende wachttijd
+LOCK_RETRY_SECONDS = 0.001
+LOCK_RETRY_MAX_SECONDS = 0.02
+# os.replace kan op Windows falen zolang een lezer het bestand open heeft
+REPLACE_RETRIES = 10
+
+
+class StorageError(Exception):
+    """Ongeldige query of onleesbare table"""
+
+
+# -------------------------
+# Locks
+# -------------------------
+# schrijvers binnen één proces wachten op elkaar via een thread lock in plaats van flock te pollen
+_thread_locks = {}
+_thread_locks_guard = threading.Lock()
+
+
+def _thread_lock(path):
+    with _thread_locks_guard:
+        lock = _thread_locks.get(path)
+        if lock is None:
+            lock = _thread_locks[path] = threading.Lock()
+        return lock
+
+
+@contextmanager
+def file_lock(path, shared=False, timeout=None):
+    """
+    Houd een advisory lock op path vast (gedeeld voor lezers, exclusief voor schrijvers).
+    Werkt tussen processen én tussen threads: elke aanroep opent een eigen file descriptor.
+    Bij contention wordt opnieuw geprobeerd; TimeoutError als de lock niet binnen timeout vrijkomt.
+    """
+    deadline = None if timeout is None else time.monotonic() + timeout
+    local = None if shared else _thread_lock(os.path.abspath(path))
+    if local is not None and not local.acquire(timeout=-1 if timeout is None else timeout):
+        raise TimeoutError(f"Lock op {path} niet verkregen binnen {timeout}s")
+    try:
+        with _flock(path, shared, deadline, timeout):
+            yield
+    finally:
+        if local is not None:
+            local.release()
+
+
+@contextmanager
+def _flock(path, shared, deadline, timeout):
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+    delay = LOCK_RETRY_SECONDS
+    try:
+        while True:
+            try:
+                if fcntl is not None:
+                    mode = fcntl.LOCK_SH if shared else fcntl.LOCK_EX
+                    fcntl.flock(fd, mode | (fcntl.LOCK_NB if deadline is not None else 0))
+                else:
+                    msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+                break
+            except OSError:
+                if fcntl is not None and deadline is None:
+                    raise
+                if deadline is not None and time.monotonic() > deadline:
+                    raise TimeoutError(f"Lock op {path} niet verkregen binnen {timeout}s")
+                time.sleep(delay)
+                delay = min(delay * 2, LOCK_RETRY_MAX_SECONDS)
+        yield
+    finally:
+        try:
+            if fcntl is not None:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+            else:
+                os.lseek(fd, 0, os.SEEK_SET)
+                msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+        except OSError:
+            pass
+        os.close(fd)
+
+
+# -------------------------
+# Bestanden
+# -------------------------
+def _fsync_dir(path):
+    if os.name == 'nt':
+        return
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def write_atomic(path, data):
+    """
+    Schrijf bytes (of een iterable van bytes stukken) via temp file + fsync + rename; een
+    crash laat het oude of het nieuwe bestand achter
+    """
+    directory = os.path.dirname(path) or '.'
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=directory, prefix='.tmp-')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            if isinstance(data, (bytes, bytearray)):
+                f.write(data)
+            else:
+                for chunk in data:
+                    f.write(chunk)
+            f.flush()
+            os.fsync(f.fileno())
+        for attempt in range(REPLACE_RETRIES):
+            try:
+                os.replace(tmp, path)
+                break
+            except PermissionError:
+                if attempt == REPLACE_RETRIES - 1:
+                    raise
+                time.sleep(LOCK_RETRY_MAX_SECONDS * (attempt + 1))
+        _fsync_dir(directory)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+
+def dump_rows(rows):
+    """Table als JSON array met één compacte row per regel (geldige JSON, kleine diffs)"""
+    if not rows:
+        return b"[]\n"
+    return b"[\n" + b",\n".join(serializer.dumpb(row) for row in rows) + b"\n]\n"
+
+
+def iter_dump_rows(rows):
+    """Zelfde formaat als dump_rows, maar per row als bytes stuk (voor tables die niet in het geheugen hoeven)"""
+    first = True
+    for row in rows:
+        yield (b"[\n" if first else b",\n") + serializer.dumpb(row)
+        first = False
+    yield b"[]\n" if first else b"\n]\n"
+
+
+def _iter_lines(f):
+    """Rows uit een open table file met één row per regel"""
+    for line in f:
+        line = line.strip().rstrip(b',')
+        if line and line not in (b'[', b']'):
+            yield serializer.loads(line)
+
+
+def _compact(path):
+    """Heeft het table bestand één row per regel (het formaat van dump_rows)?"""
+    with open(path, 'rb') as f:
+        return f.read(3) == b'[\n{'
+
+
+def _iter_file(path):
+    """Rows uit een table file met één row per regel; het bestand is dicht zodra alles gelezen is"""
+    with open(path, 'rb') as f:
+        yield from _iter_lines(f)
+
+
+class _Unchanged(Exception):
+    """Intern: een streamende update wijzigde geen enkele row; het temp bestand wordt weggegooid"""
+
+
+# -------------------------
+# Query parser (de subset die webserver.py gebruikt)
+# -------------------------
+_TOKEN = re.compile(r"""\s*(?:
+    (?P<string>'(?:[^']|'')*')
+  | (?P<number>-?\d+(?:\.\d+)?)(?![\w.])
+  | (?P<word>[A-Za-z_]\w*)
+  | (?P<op>[=,*;])
+)""", re.VERBOSE)
+_DATA = re.compile(r"\bDATA\s*=\s*", re.IGNORECASE)
+_KEYWORDS = {'NULL': None, 'TRUE': True, 'FALSE': False}
+
+
+def _tokenize(text):
+    tokens = []
+    pos = 0
+    text = text.rstrip()
+    while pos < len(text):
+        match = _TOKEN.match(text, pos)
+        if not match or match.end() == pos:
+            raise StorageError(f"Ongeldige query bij: {text[pos:pos + 30]!r}")
+        pos = match.end()
+        kind = match.lastgroup
+        value = match.group(kind)
+        if kind == 'string':
+            value = value[1:-1].replace("''", "'")
+        elif kind == 'number':
+            value = float(value) if '.' in value else int(value)
+        tokens.append((kind, value))
+    return tokens
+
+
+class _Parser:
+    def __init__(self, tokens):
+        self.tokens = tokens
+        self.pos = 0
+
+    def peek_word(self):
+        if self.pos < len(self.tokens) and self.tokens[self.pos][0] == 'word':
+            return self.tokens[self.pos][1].upper()
+        return None
+
+    def take(self, kind=None, value=None):
+        if self.pos >= len(self.tokens):
+            raise StorageError("Onverwacht einde van de query")
+        token = self.tokens[self.pos]
+        if kind and token[0] != kind:
+            raise StorageError(f"Verwacht {kind}, kreeg {token[1]!r}")
+        if value and str(token[1]).upper() != value:
+            raise StorageError(f"Verwacht {value}, kreeg {token[1]!r}")
+        self.pos += 1
+        return token[1]
+
+    def keyword(self, word):
+        self.take('word', word)
+
+    def name(self):
+        return self.take('word')
+
+    def literal(self):
+        kind, value = self.tokens[self.pos] if self.pos < len(self.tokens) else (None, None)
+        if kind in ('string', 'number'):
+            self.pos += 1
+            return value
+        if kind == 'word' and value.upper() in _KEYWORDS:
+            self.pos += 1
+            return _KEYWORDS[value.upper()]
+        raise StorageError(f"Verwacht een waarde, kreeg {value!r}")
+
+    def where(self):
+        """[WHERE col = waarde [AND col = waarde ...]] -> lijst van (col, waarde)"""
+        conditions = []
+        if self.peek_word() == 'WHERE':
+            self.keyword('WHERE')
+            while True:
+                column = self.name()
+                self.take('op', '=')
+                conditions.append((column, self.literal()))
+                if self.peek_word() != 'AND':
+                    break
+                self.keyword('AND')
+        return conditions
+
+    def end(self):
+        if self.pos < len(self.tokens) and self.tokens[self.pos] == ('op', ';'):
+            self.pos += 1
+        if self.pos != len(self.tokens):
+            raise StorageError(f"Onverwacht {self.tokens[self.pos][1]!r} in query")
+
+
+def _parse_data(text):
+    try:
+        data = serializer.loads(text.strip().rstrip(';'))
+    except ValueError as e:
+        raise StorageError(f"Ongeldige DATA: {e}")
+    rows = data if isinstance(data, list) else [data]
+    if not all(isinstance(r, dict) for r in rows):
+        raise StorageError("DATA moet een object of een lijst van objecten zijn")
+    return rows
+
+
+def parse(query):
+    """Vertaal een query naar een dict met 'op', 'table' en de onderdelen van dat statement"""
+    head, tail = query, ''
+    data = None
+    # INSERT ... DATA={json} en UPDATE ... SET DATA={json} WHERE ...: de JSON apart parsen
+    match = _DATA.search(query)
+    kind = query.lstrip()[:6].upper()
+    if match and kind == 'INSERT':
+        head, data = query[:match.start()], _parse_data(query[match.end():])
+    elif match and kind == 'UPDATE':
+        try:
+            data, end = json.JSONDecoder().raw_decode(query, match.end())
+        except ValueError as e:
+            raise StorageError(f"Ongeldige DATA in UPDATE: {e}")
+        if not isinstance(data, dict):
+            raise StorageError("DATA in UPDATE moet een object zijn")
+        head, tail = query[:match.start()], query[end:]
+
+    p = _Parser(_tokenize(head))
+    op = p.take('word').upper()
+    if op == 'SELECT':
+        columns = []
+        if p.tokens[p.pos] == ('op', '*'):
+            p.pos += 1
+        else:
+            columns.append(p.name())
+            while p.pos < len(p.tokens) and p.tokens[p.pos] == ('op', ','):
+                p.pos += 1
+                columns.append(p.name())
+        p.keyword('FROM')
+        statement = {'op': op, 'table': p.name(), 'columns': columns, 'where': p.where()}
+    elif op == 'INSERT':
+        p.keyword('INTO')
+        statement = {'op': op, 'table': p.name(), 'rows': data}
+        if data is None:
+            raise StorageError("INSERT zonder DATA=")
+    elif op == 'DELETE':
+        p.keyword('FROM')
+        statement = {'op': op, 'table': p.name(), 'where': p.where()}
+    elif op == 'UPDATE':
+        table = p.name()
+        p.keyword('SET')
+        values = {}
+        if data is not None:
+            # UPDATE t SET DATA={json} [WHERE ...]: velden samenvoegen met de bestaande row
+            p.end()
+            values = data
+            p = _Parser(_tokenize(tail))
+        else:
+            while True:
+                column = p.name()
+                p.take('op', '=')
+                values[column] = p.literal()
+                if p.pos < len(p.tokens) and p.tokens[p.pos] == ('op', ','):
+                    p.pos += 1
+                    continue
+                break
+        statement = {'op': op, 'table': table, 'values': values, 'where': p.where()}
+    else:
+        raise StorageError(f"Niet ondersteund statement: {op}")
+    p.end()
+    return statement
+
+
+def _matches(row, conditions):
+    for column, expected in conditions:
+        value = row.get(column)
+        if value is None or expected is None:
+            if value is not expected:
+                return False
+        elif isinstance(expected, str):
+            # getallen/booleans in de row ook als string vergelijken (soketdb gedrag)
+            if value != expected and (not isinstance(value, (int, float)) or str(value) != expected):
+                return False
+        elif value != expected:
+            return False
+    return True
+
+
+# -------------------------
+# Offset index (mmap read path)
+# -------------------------
+# een JSON scalar direct na '"kolom":' (of '"kolom": ' in oudere tables) in een row regel
+_SCALAR = rb'("(?:[^"\\]|\\.)*"|-?\d+(?:\.\d+)?(?:[eE][+-]?\d+)?|true|false|null)'
+
+
+def _index_keys(value):
+    """
+    Index keys (hashes) van een opgeslagen waarde, zo dat _matches() semantiek behouden blijft.
+    Alleen hashes bewaren houdt de index klein; botsingen vallen weg bij het controleren van de rows.
+    """
+    if isinstance(value, str):
+        return (hash(value),)
+    # 1, 1.0 en True zijn gelijk (en hashen gelijk); als string matchen ze op str(value)
+    return (hash(('v', value)), hash(str(value)))
+
+
+def _lookup_key(expected):
+    return hash(expected) if isinstance(expected, str) else hash(('v', expected))
+
+
+class TableIndex:
+    """
+    Per kolom een lazy index waarde -> byte offsets van de rows, voor een table file met één
+    row per regel (zie dump_rows). Gebouwd met een regex over de ruwe bytes, zonder rows te
+    decoderen; geldig zolang het bestand niet wijzigt (signature).
+    """
+
+    def __init__(self, signature):
+        self.signature = signature
+        self.columns = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def supports(buf):
+        """False voor bestanden die niet één row per regel hebben (bv. een oude ingesprongen table)"""
+        return buf[:2] == b'[]' or buf[:3] == b'[\n{'
+
+    @staticmethod
+    def row(buf, offset):
+        end = buf.find(b'\n', offset)
+        line = buf[offset:end if end != -1 else len(buf)]
+        return serializer.loads(line.rstrip(b','))
+
+    def column(self, buf, name):
+        """Index hash(waarde) -> row offset(s) voor kolom name (eenmalig per bestandsversie)"""
+        with self._lock:
+            index = self.columns.get(name)
+            if index is not None:
+                return index
+            index = {}
+            pattern = re.compile(re.escape(serializer.dumpb(name)) + rb': ?' + _SCALAR)
+            for match in pattern.finditer(buf):
+                token = match.group(1)
+                if token[:1] == b'"' and b'\\' not in token:
+                    value = token[1:-1].decode('utf-8')
+                else:
+                    value = serializer.loads(token)
+                offset = buf.rfind(b'\n', 0, match.start()) + 1
+                for key in _index_keys(value):
+                    # één row: kale int (scheelt een lijst per unieke waarde)
+                    current = index.get(key)
+                    if current is None:
+                        index[key] = offset
+                    elif isinstance(current, int):
+                        if current != offset:
+                            index[key] = [current, offset]
+                    elif current[-1] != offset:
+                        current.append(offset)
+            self.columns[name] = index
+            return index
+
+    def candidates(self, buf, conditions):
+        """Offsets van rows die aan de WHERE kunnen voldoen (in table volgorde), of None"""
+        best = None
+        for column, expected in conditions:
+            # '= NULL' matcht ook rows zonder de kolom: dat kan de index niet zien
+            if expected is None:
+                continue
+            found = self.column(buf, column).get(_lookup_key(expected), ())
+            offsets = {found} if isinstance(found, int) else set(found)
+            if best is None or len(offsets) < len(best):
+                best = offsets
+            if not best:
+                break
+        return None if best is None else sorted(best)
+
+
+# -------------------------
+# Database
+# -------------------------
+class Database:
+    """
+    Drop-in vervanging voor soketdb.database(name) op de soketDB/<name>/<table>.json layout.
+    Ondersteunt SELECT (* of kolommen), INSERT INTO t DATA={..}, DELETE en UPDATE ... SET,
+    met WHERE kolom = waarde [AND ...]. SELECT geeft een lijst dicts, de rest het aantal rows.
+    """
+
+    def __init__(self, name, root=DB_ROOT, lock_timeout=LOCK_TIMEOUT):
+        self.path = os.path.join(root, name)
+        self.lock_timeout = lock_timeout
+        # per table: (stat signature, rows) zodat ongewijzigde tables niet opnieuw geparsed worden
+        self._cache = {}
+        # per table: TableIndex van de laatst geziene bestandsversie
+        self._indexes = {}
+        self._cache_lock = threading.Lock()
+
+    def table_path(self, table):
+        if not re.match(r"^\w+$", table):
+            raise StorageError(f"Ongeldige table naam: {table!r}")
+        return os.path.join(self.path, f"{table}.json")
+
+    def _lock(self, table, shared):
+        return file_lock(self.table_path(table) + '.lock', shared=shared, timeout=self.lock_timeout)
+
+    def _lookup(self, table, conditions):
+        """
+        Rows die aan conditions voldoen via mmap + offset index, zonder de hele table te decoderen.
+        None als dat niet kan (oud table formaat of alleen '= NULL' condities).
+        Aanroepen met een (gedeelde) lock.
+        """
+        path = self.table_path(table)
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            return []
+        if st.st_size == 0:
+            return []
+        signature = (st.st_mtime_ns, st.st_size, st.st_ino)
+        with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+            if not TableIndex.supports(buf):
+                return None
+            with self._cache_lock:
+                index = self._indexes.get(table)
+                if index is None or index.signature != signature:
+                    index = self._indexes[table] = TableIndex(signature)
+            candidates = index.candidates(buf, conditions)
+            if candidates is None:
+                return None
+            rows = (index.row(buf, offset) for offset in candidates)
+            return [r for r in rows if _matches(r, conditions)]
+
+    def _read(self, table):
+        """Alle rows van table (aanroepen met een lock); gedeelde objecten, niet muteren"""
+        path = self.table_path(table)
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            return []
+        signature = (st.st_mtime_ns, st.st_size, st.st_ino)
+        with self._cache_lock:
+            cached = self._cache.get(table)
+        if cached and cached[0] == signature:
+            return cached[1]
+        with open(path, 'rb') as f:
+            try:
+                rows = serializer.loads(f.read())
+            except ValueError as e:
+                raise StorageError(f"Table {table} is onleesbaar: {e}")
+        if not isinstance(rows, list):
+            raise StorageError(f"Table {table} is geen lijst")
+        with self._cache_lock:
+            self._cache[table] = (signature, rows)
+        return rows
+
+    def _write(self, table, rows):
+        """Schrijf table + .meta atomisch (aanroepen met een exclusieve lock)"""
+        path = self.table_path(table)
+        write_atomic(path, dump_rows(rows))
+        columns = []
+        for row in rows:
+            columns.extend(c for c in row if c not in columns)
+        self._write_meta(path, columns)
+        st = os.stat(path)
+        with self._cache_lock:
+            self._cache[table] = ((st.st_mtime_ns, st.st_size, st.st_ino), rows)
+
+    def _write_meta(self, path, columns):
+        """Vul de kolommen in de .meta file aan (soketDB layout)"""
+        meta_path = path + '.meta'
+        try:
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                old_columns = json.load(f).get('columns', [])
+        except (OSError, ValueError):
+            old_columns = []
+        merged = old_columns + [c for c in columns if c not in old_columns]
+        if merged != old_columns:
+            write_atomic(meta_path, serializer.dumps_pretty({'columns': merged}).encode('utf-8'))
+
+    def _forget(self, table):
+        """Geen rows van table in het geheugen houden (na een streamende write)"""
+        with self._cache_lock:
+            self._cache.pop(table, None)
+
+    @contextmanager
+    def transaction(self, table):
+        """
+        Lees -> wijzig -> schrijf onder één exclusieve lock:
+            with db.transaction('plugins') as rows: rows.append({...})
+        De lijst wordt alleen teruggeschreven als het blok zonder exceptie eindigt en iets
+        gewijzigd heeft.
+        """
+        with self._lock(table, shared=False):
+            original = self._read(table)
+            rows = [dict(r) for r in original]
+            yield rows
+            if rows != original:
+                self._write(table, rows)
+
+    # -------------------------
+    # Streaming (constant geheugen, voor grote tables)
+    # -------------------------
+    def iter_rows(self, table):
+        """
+        Rows van table één voor één, zonder de table in het geheugen (of de cache) te laden.
+        De lock is alleen nodig om het bestand te openen: schrijvers vervangen het bestand
+        met een rename, dus de open file blijft een consistente momentopname.
+        """
+        path = self.table_path(table)
+        with self._lock(table, shared=True):
+            try:
+                f = open(path, 'rb')
+            except FileNotFoundError:
+                return
+        with f:
+            head = f.read(3)
+            f.seek(0)
+            if head != b'[\n{':
+                # leeg, of een oude (ingesprongen) table: gewoon in één keer
+                try:
+                    rows = serializer.loads(f.read() or b'[]')
+                except ValueError as e:
+                    raise StorageError(f"Table {table} is onleesbaar: {e}")
+                yield from rows
+                return
+            yield from _iter_lines(f)
+
+    def write_rows(self, table, rows, keep=None):
+        """
+        Vervang alle rows van table door rows (iterable), streamend weggeschreven. Met keep
+        blijven bestaande rows waarvoor keep(row) waar is staan (voor de nieuwe rows), onder
+        dezelfde lock gelezen.
+        """
+        path = self.table_path(table)
+        columns = []
+
+        def tracked():
+            if keep is not None and os.path.exists(path):
+                for row in (_iter_file(path) if _compact(path) else self._read(table)):
+                    if keep(row):
+                        yield row
+            for row in rows:
+                columns.extend(c for c in row if c not in columns)
+                yield row
+
+        with self._lock(table, shared=False):
+            write_atomic(path, iter_dump_rows(tracked()))
+            self._write_meta(path, columns)
+            self._forget(table)
+
+    def update_rows(self, table, key, updates):
+        """
+        UPDATE van veel rows in één commit: updates is {waarde van kolom key: {kolom: waarde}}.
+        De table wordt regel voor regel herschreven (constant geheugen) en alleen vervangen
+        als er een row wijzigt. Retourneert de set keys van de bijgewerkte rows.
+        """
+        if not updates:
+            return set()
+        path = self.table_path(table)
+        updated = set()
+        columns = []
+
+        def merged(rows):
+            for row in rows:
+                values = updates.get(row.get(key))
+                if values is not None:
+                    new = dict(row, **values)
+                    if new != row:
+                        updated.add(row.get(key))
+                        columns.extend(c for c in values if c not in columns)
+                        row = new
+                yield row
+            if not updated:
+                raise _Unchanged()
+
+        with self._lock(table, shared=False):
+            if not os.path.exists(path):
+                return set()
+            try:
+                if _compact(path):
+                    # _iter_file sluit het bestand voor de rename (Windows)
+                    write_atomic(path, iter_dump_rows(merged(_iter_file(path))))
+                    self._write_meta(path, columns)
+                    self._forget(table)
+                else:
+                    # oude (ingesprongen) table layout: in één keer
+                    self._write(table, list(merged(self._read(table))))
+            except _Unchanged:
+                return set()
+        return updated
+
+    def execute(self, query):
+        statement = parse(query)
+        table = statement['table']
+        op = statement['op']
+
+        if op == 'SELECT':
+            with self._lock(table, shared=True):
+                result = self._lookup(table, statement['where']) if statement['where'] else None
+                if result is None:
+                    result = [dict(r) for r in self._read(table) if _matches(r, statement['where'])]
+            if statement['columns']:
+                return [{c: r.get(c) for c in statement['columns']} for r in result]
+            return result
+
+        with self._lock(table, shared=False):
+            rows = self._read(table)
+            if op == 'INSERT':
+                rows = rows + [dict(r) for r in statement['rows']]
+                count = len(statement['rows'])
+            elif op == 'DELETE':
+                keep = [r for r in rows if not _matches(r, statement['where'])]
+                count = len(rows) - len(keep)
+                rows = keep
+            else:
+                count = 0
+                updated = []
+                for row in rows:
+                    if _matches(row, statement['where']):
+                        row = dict(row, **statement['values'])
+                        count += 1
+                    updated.append(row)
+                rows = updated
+            # niets gewijzigd: bestand (en de cache van andere processen) ongemoeid laten
+            if count:
+                self._write(table, rows)
+            return count
+
+
+def database(name, root=DB_ROOT):
+    """Zelfde aanroep als soketdb.database(name)"""
+    return Database(name, root=root)
@@ -0,0 +1,436 @@
+import bisect
+import heapq
+import itertools
+import re
+import threading
+import unicodedata
+from collections import Counter, OrderedDict
+
+# Typeahead index over de titels en auteurs van de catalogus (één entry per
+# project), voor /api/plugins/suggest.
+#
+# Prefix: alle woorden (tokens) staan gesorteerd in één lijst. De woorden met een
+# gegeven prefix vormen daarin een aaneengesloten reeks, gevonden met bisect: een
+# trie zonder object per letter. Korte prefixen ("l", "lu") raken duizenden
+# projecten; hun kandidaten en een top lijst worden bewaard en bij elke wijziging
+# bijgewerkt in plaats van opnieuw berekend.
+#
+# Typo's: een trigram index over dezelfde woorden. Heeft een woord geen prefix
+# match, dan telt het woord met de meeste gedeelde trigrams (Dice coëfficiënt)
+# als prefix, zodat ook een zoekopdracht met een typo de bewaarde top lijsten
+# gebruikt. Het gevonden woord wordt per zoekwoord onthouden.
+
+SUGGEST_LIMIT = 8
+# woorden in een zoekopdracht die meetellen
+MAX_WORDS = 5
+FUZZY_MIN_LENGTH = 3
+FUZZY_MIN_SIMILARITY = 0.4
+# prefixen met minstens zoveel kandidaten worden bewaard (LRU)
+PREFIX_CACHE_MIN = 500
+PREFIX_CACHE_SIZE = 512
+# lengte van de bewaarde top lijst per prefix; daaronder wordt hij opnieuw berekend
+RANKED_SIZE = 64
+RANKED_MIN = 32
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+# groter dan elk token teken: bisect grens voor "alles met dit prefix"
+_PREFIX_END = '\x7f'
+
+
+def normalize(text):
+    """Kleine letters zonder accenten"""
+    text = unicodedata.normalize('NFKD', text or '').encode('ascii', 'ignore').decode('ascii')
+    return text.lower()
+
+
+def tokenize(text):
+    return _TOKEN_RE.findall(normalize(text))
+
+
+def trigrams(token):
+    """Trigrams met padding vooraan (het begin van een woord telt het zwaarst)"""
+    padded = '  ' + token
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def _score(score, fuzzy):
+    """Score van één zoekwoord: een match via een typo telt half"""
+    return score // 2 if fuzzy else score
+
+
+class _Entry:
+    __slots__ = ('key', 'title', 'author', 'url', 'icon', 'owners', 'public', 'title_tokens', 'author_tokens')
+
+
+class _Prefix:
+    """Bewaarde kandidaten van één prefix plus de top lijst (op sorteer key, oplopend)"""
+    __slots__ = ('title', 'author', 'lead', 'ranked', 'complete')
+
+    def __init__(self, title, author, lead):
+        self.title = title
+        self.author = author
+        # de entries waarvan het eerste woord van de titel met het prefix begint
+        self.lead = lead
+        self.ranked = None
+        self.complete = False
+
+    def offer(self, item):
+        if self.ranked is None:
+            return
+        if self.complete or len(self.ranked) < RANKED_SIZE or item < self.ranked[-1]:
+            bisect.insort(self.ranked, item)
+            if len(self.ranked) > RANKED_SIZE:
+                self.ranked.pop()
+                self.complete = False
+
+    def drop(self, entry_id):
+        if self.ranked is None:
+            return
+        self.ranked = [item for item in self.ranked if item[-1] != entry_id]
+        if not self.complete and len(self.ranked) < RANKED_MIN:
+            self.ranked = None
+
+
+class SuggestIndex:
+    """
+    Thread-safe typeahead index. update() houdt hem per project bij; suggest() geeft de
+    best passende projecten voor een (gedeeltelijke) zoekopdracht.
+    """
+
+    def __init__(self, cache_size=PREFIX_CACHE_SIZE, cache_min=PREFIX_CACHE_MIN):
+        self.cache_size = cache_size
+        self.cache_min = cache_min
+        # change version van de catalogus waarop de index bijgewerkt is (zie webserver.py)
+        self.version = 0
+        self._ids = {}          # project key -> entry id
+        self._entries = {}      # entry id -> _Entry
+        # entry id -> (-owners, lengte titel, entry id): de sorteer key binnen dezelfde kwaliteit
+        self._order = {}
+        self._public = set()    # entry ids van publieke projecten
+        self._next_id = 0
+        self._title = {}        # token -> set(entry ids) met het token in de titel
+        self._author = {}       # token -> set(entry ids) met het token in de auteur
+        self._lead = {}         # token -> set(entry ids) met het token als eerste woord van de titel
+        self._sorted = []       # alle tokens, gesorteerd
+        self._trigrams = {}     # trigram -> set(tokens)
+        self._cache = OrderedDict()
+        # zoekwoord -> (vocabulaire versie, meest gelijkend woord)
+        self._fuzzy = OrderedDict()
+        # verhoogd als er een woord bijkomt of verdwijnt (maakt _fuzzy ongeldig)
+        self._vocabulary = 0
+        self._lock = threading.RLock()
+
+    @classmethod
+    def build(cls, items, **options):
+        """Index over items: (key, PluginRecord, aantal owners, publiek)"""
+        index = cls(**options)
+        tokens = set()
+        with index._lock:
+            for key, record, owners, public in items:
+                tokens.update(index._add(key, record, owners, public, sort=False))
+            index._sorted = sorted(t for t in tokens if t in index._title or t in index._author)
+            index._warm()
+        return index
+
+    def _warm(self):
+        """
+        Vul de cache met de korte prefixen (één en twee tekens) die de meeste projecten raken:
+        die zijn het duurst om voor het eerst te berekenen en worden bij elke typeahead getypt.
+        """
+        prefixes = {token[:n] for token in self._sorted for n in (1, 2) if len(token) >= n}
+        for prefix in sorted(prefixes, key=len, reverse=True):
+            # twee tekens eerst: de LRU houdt bij een volle cache de één-teken prefixen
+            if self._match(prefix) is not None and prefix in self._cache:
+                self._ranked(prefix)
+
+    def __len__(self):
+        return len(self._entries)
+
+    @property
+    def public_count(self):
+        return len(self._public)
+
+    # -------------------------
+    # Bijwerken
+    # -------------------------
+    def update(self, key, record, owners=0, public=False):
+        """Zet project key op record (None: verwijderen) en werk de bewaarde prefixen bij"""
+        with self._lock:
+            old = self._remove(key)
+            new = None
+            if record is not None:
+                self._add(key, record, owners, public)
+                new = self._entries[self._ids[key]]
+            entry_id = self._ids.get(key) if record is not None else self._ids.pop(key, None)
+            # alleen de bewaarde prefixen van de eigen woorden kunnen geraakt zijn
+            prefixes = set()
+            for entry in (old, new):
+                if entry is not None:
+                    for token in entry.title_tokens + entry.author_tokens:
+                        prefixes.update(token[:n] for n in range(1, len(token) + 1))
+            for prefix in prefixes:
+                cached = self._cache.get(prefix)
+                if cached is None:
+                    continue
+                if old is not None and self._matches(old, prefix):
+                    cached.title.discard(entry_id)
+                    cached.author.discard(entry_id)
+                    cached.lead.discard(entry_id)
+                    cached.drop(entry_id)
+                if new is not None and self._matches(new, prefix):
+                    if any(t.startswith(prefix) for t in new.title_tokens):
+                        cached.title.add(entry_id)
+                        if new.title_tokens[0].startswith(prefix):
+                            cached.lead.add(entry_id)
+                    if any(t.startswith(prefix) for t in new.author_tokens):
+                        cached.author.add(entry_id)
+                    # dezelfde key als een zoekopdracht van alleen dit prefix (zie _ranked)
+                    cached.offer(self._rank_key(entry_id, [(cached.title, cached.author, False, prefix, cached.lead)]))
+
+    @staticmethod
+    def _matches(entry, prefix):
+        return any(t.startswith(prefix) for t in entry.title_tokens) or \
+            any(t.startswith(prefix) for t in entry.author_tokens)
+
+    def _add(self, key, record, owners, public, sort=True):
+        entry_id = self._ids.get(key)
+        if entry_id is None:
+            entry_id = self._ids[key] = self._next_id
+            self._next_id += 1
+        entry = _Entry()
+        entry.key = key
+        entry.title = record.title or ''
+        entry.author = record.author or ''
+        entry.url = record.url
+        entry.icon = record.icon or ''
+        entry.owners = owners
+        entry.public = bool(public)
+        entry.title_tokens = tuple(dict.fromkeys(tokenize(entry.title)))
+        entry.author_tokens = tuple(dict.fromkeys(tokenize(entry.author)))
+        self._entries[entry_id] = entry
+        self._order[entry_id] = (-owners, len(entry.title), entry_id)
+        if entry.public:
+            self._public.add(entry_id)
+        for token in entry.title_tokens:
+            self._add_token(token, entry_id, self._title, sort)
+        for token in entry.author_tokens:
+            self._add_token(token, entry_id, self._author, sort)
+        if entry.title_tokens:
+            self._lead.setdefault(entry.title_tokens[0], set()).add(entry_id)
+        return entry.title_tokens + entry.author_tokens
+
+    def _remove(self, key):
+        entry_id = self._ids.get(key)
+        entry = self._entries.pop(entry_id, None) if entry_id is not None else None
+        if entry is None:
+            return None
+        del self._order[entry_id]
+        self._public.discard(entry_id)
+        for token in entry.title_tokens:
+            self._remove_token(token, entry_id, self._title)
+        for token in entry.author_tokens:
+            self._remove_token(token, entry_id, self._author)
+        if entry.title_tokens:
+            lead = self._lead.get(entry.title_tokens[0])
+            if lead is not None:
+                lead.discard(entry_id)
+                if not lead:
+                    del self._lead[entry.title_tokens[0]]
+        return entry
+
+    def _add_token(self, token, entry_id, postings, sort):
+        known = token in self._title or token in self._author
+        postings.setdefault(token, set()).add(entry_id)
+        if not known:
+            self._vocabulary += 1
+            if sort:
+                bisect.insort(self._sorted, token)
+            for gram in trigrams(token):
+                self._trigrams.setdefault(gram, set()).add(token)
+
+    def _remove_token(self, token, entry_id, postings):
+        ids = postings.get(token)
+        if ids is None:
+            return
+        ids.discard(entry_id)
+        if ids:
+            return
+        del postings[token]
+        if token in self._title or token in self._author:
+            return
+        i = bisect.bisect_left(self._sorted, token)
+        if i < len(self._sorted) and self._sorted[i] == token:
+            del self._sorted[i]
+        self._vocabulary += 1
+        for gram in trigrams(token):
+            tokens = self._trigrams.get(gram)
+            if tokens is not None:
+                tokens.discard(token)
+                if not tokens:
+                    del self._trigrams[gram]
+
+    # -------------------------
+    # Zoeken
+    # -------------------------
+    def suggest(self, query, limit=SUGGEST_LIMIT):
+        """
+        De limit best passende projecten voor query als dicts. Elk woord moet als prefix van
+        een woord in titel of auteur voorkomen (of er met een typo op lijken). Ranking: titel
+        boven auteur, begin van de titel eerst, dan het aantal owners, dan de kortste titel.
+        """
+        words = tokenize(query)[:MAX_WORDS]
+        if not words or limit <= 0:
+            return []
+        with self._lock:
+            matches = []
+            for word in words:
+                match = self._match(word)
+                if match is None:
+                    return []
+                matches.append(match)
+            public_only = self.public_count > 0
+
+            if len(matches) == 1 and matches[0][3] in self._cache:
+                # één (prefix) woord: de bijgehouden top lijst
+                ranked, complete = self._ranked(matches[0][3])
+                ids = [item[-1] for item in ranked if not public_only or self._entries[item[-1]].public]
+                if len(ids) >= limit or complete:
+                    return [self._suggestion(i, matches) for i in ids[:limit]]
+
+            # de kleinste match als basis; elk volgend woord filtert met set doorsneden (in C),
+            # zonder een vereniging van grote sets te maken
+            ordered = sorted(matches, key=lambda m: len(m[0]) + len(m[1]))
+            title, author = ordered[0][:2]
+            candidates = title | author
+            for title, author, _, _, _ in ordered[1:]:
+                candidates = (candidates & title) | (candidates & author)
+                if not candidates:
+                    return []
+            if public_only:
+                candidates &= self._public
+            return [self._suggestion(item[-1], matches) for item in self._top(candidates, matches, limit)]
+
+    def _match(self, word):
+        """
+        (titel ids, auteur ids, fuzzy, prefix, ids met het prefix vooraan de titel) voor een
+        zoekwoord, of None zonder enige match. Zonder prefix match telt het meest gelijkende
+        woord (fuzzy) als prefix.
+        """
+        cached = self._cache.get(word)
+        if cached is not None:
+            self._cache.move_to_end(word)
+            return cached.title, cached.author, False, word, cached.lead
+        lo = bisect.bisect_left(self._sorted, word)
+        hi = bisect.bisect_left(self._sorted, word + _PREFIX_END, lo)
+        if lo < hi:
+            title, author, lead = set(), set(), set()
+            for token in self._sorted[lo:hi]:
+                title.update(self._title.get(token, ()))
+                author.update(self._author.get(token, ()))
+                lead.update(self._lead.get(token, ()))
+            if len(title) + len(author) >= self.cache_min:
+                self._cache[word] = _Prefix(title, author, lead)
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+            return title, author, False, word, lead
+        if len(word) < FUZZY_MIN_LENGTH:
+            return None
+        closest = self._closest(word)
+        if closest is None:
+            return None
+        title, author, _, _, lead = self._match(closest)
+        return title, author, True, closest, lead
+
+    def _closest(self, word):
+        """Het woord met de hoogste Dice coëfficiënt op trigrams (minstens FUZZY_MIN_SIMILARITY), of None"""
+        cached = self._fuzzy.get(word)
+        if cached is not None and cached[0] == self._vocabulary:
+            return cached[1]
+        grams = trigrams(word)
+        counts = Counter()
+        for gram in grams:
+            counts.update(self._trigrams.get(gram, ()))
+        # gedeelde trigrams nodig voor de drempel, ook voor het kortste woord
+        needed = FUZZY_MIN_SIMILARITY * (len(grams) + 1) / 2
+        best, best_key = None, None
+        for token, shared in counts.items():
+            if shared < needed:
+                continue
+            # een woord heeft (met de padding vooraan) len(token) trigrams, op herhalingen na
+            similarity = 2 * shared / (len(grams) + len(token))
+            if similarity < FUZZY_MIN_SIMILARITY:
+                continue
+            key = (similarity, len(self._title.get(token, ())) + len(self._author.get(token, ())), token)
+            if best_key is None or key > best_key:
+                best, best_key = token, key
+        self._fuzzy[word] = (self._vocabulary, best)
+        while len(self._fuzzy) > self.cache_size:
+            self._fuzzy.popitem(last=False)
+        return best
+
+    def _ranked(self, prefix):
+        """(top lijst, compleet) van een bewaard prefix; zo nodig opnieuw berekend"""
+        cached = self._cache[prefix]
+        if cached.ranked is None:
+            matches = [(cached.title, cached.author, False, prefix, cached.lead)]
+            candidates = cached.title | cached.author
+            cached.ranked = self._top(candidates, matches, RANKED_SIZE)
+            cached.complete = len(candidates) <= RANKED_SIZE
+        return cached.ranked, cached.complete
+
+    def _top(self, candidates, matches, limit):
+        """
+        Sorteer keys (zie _rank_key) van de limit beste candidates, oplopend. De kwaliteit hangt
+        alleen af van in welke sets een entry zit, dus de candidates worden met set operaties in
+        kwaliteitsgroepen verdeeld; alleen in de beste groepen wordt per entry gesorteerd.
+        """
+        groups = [(0, candidates)]
+        for i, (title, author, fuzzy, prefix, lead) in enumerate(matches):
+            split = []
+            for quality, ids in groups:
+                in_title = ids & title
+                # de rest matcht dit woord in de auteur
+                split.append((quality + _score(2, fuzzy), ids - in_title if in_title else ids))
+                if in_title and i == 0:
+                    # het eerste woord aan het begin van de titel telt het zwaarst
+                    first = in_title & lead
+                    split.append((quality + _score(6, fuzzy), first))
+                    in_title -= first
+                split.append((quality + _score(4, fuzzy), in_title))
+            groups = [(quality, ids) for quality, ids in split if ids]
+
+        by_quality = {}
+        for quality, ids in groups:
+            by_quality.setdefault(quality, []).append(ids)
+        order = self._order
+        top = []
+        for quality in sorted(by_quality, reverse=True):
+            needed = limit - len(top)
+            best = heapq.nsmallest(needed, itertools.chain.from_iterable(by_quality[quality]), key=order.__getitem__)
+            top.extend((-quality,) + order[entry_id] for entry_id in best)
+            if len(top) >= limit:
+                break
+        return top
+
+    def _rank_key(self, entry_id, matches):
+        """Oplopende sorteer key (beste eerst), met het entry id als laatste element"""
+        entry = self._entries[entry_id]
+        quality = 0
+        for i, (title, author, fuzzy, prefix, _) in enumerate(matches):
+            if entry_id in title:
+                first = i == 0 and bool(entry.title_tokens) and entry.title_tokens[0].startswith(prefix)
+                quality += _score(6 if first else 4, fuzzy)
+            else:
+                quality += _score(2, fuzzy)
+        return (-quality,) + self._order[entry_id]
+
+    def _suggestion(self, entry_id, matches):
+        entry = self._entries[entry_id]
+        return {
+            'project_id': entry.key,
+            'title': entry.title,
+            'author': entry.author,
+            'url': entry.url,
+            'icon': entry.icon,
+            'fuzzy': any(fuzzy for _, _, fuzzy, _, _ in matches),
+        }
@@ -1,19 +1,171 @@
 # soketdb_flask_app.py
-from flask import Flask, json, jsonify, request, send_file, session, render_template
+from flask import Flask, jsonify, request, send_file, send_from_directory, session, render_template, g, has_request_context, stream_with_context
+from flask.json.provider import DefaultJSONProvider
+from werkzeug.exceptions import NotFound
+from jinja2 import ChoiceLoader, FileSystemLoader
+from markupsafe import Markup
+import gc
 import os
-import json as json_module
 import urllib.parse
-import subprocess
-import sys
+from collections import Counter
 import hashlib
 import secrets
-from soketdb import database
+import threading
+import time
+from jobqueue import JobQueue, PRIORITY_INTERACTIVE, PRIORITY_IMPORT, DONE, FAILED, ERROR_NOT_FOUND, ERROR_TIMEOUT, job_key
+from cache import TTLCache
+from broadcast import Broadcaster
+from suggest import SuggestIndex, SUGGEST_LIMIT
+from fetchers.router import plugin_key
+from fetchers.mcversions import VersionIndex
+from records import PluginRecord, rows_from_records
+import projects
+import metrics
+import icons
+import assets
+import serializer
+from storage import database
+
+# /static wordt door de asset pipeline (assets.py) geserveerd
+SECRET_KEY_FILE = os.environ.get('SECRET_KEY_FILE', '.secret_key')
+
+
+def load_secret_key(path=SECRET_KEY_FILE):
+    """
+    Session key uit $SECRET_KEY, anders uit path (eenmalig aangemaakt).
+    Alle workers en herstarts delen zo dezelfde key en sessies blijven geldig.
+    """
+    key = os.environ.get('SECRET_KEY')
+    if key:
+        return key
+    try:
+        fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    except FileExistsError:
+        # een andere worker was eerst (of de key bestond al)
+        for _ in range(50):
+            with open(path, 'r', encoding='utf-8') as f:
+                key = f.read().strip()
+            if key:
+                return key
+            time.sleep(0.1)
+        raise RuntimeError(f"{path} is leeg")
+    with os.fdopen(fd, 'w', encoding='utf-8') as f:
+        key = secrets.token_hex(32)
+        f.write(key)
+    return key
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """jsonify(), tojson en request.get_json() via serializer (orjson indien geïnstalleerd)"""
+
+    def dumps(self, obj, **kwargs):
+        # ingesprongen output (debug mode) blijft bij de stdlib
+        if 'indent' in kwargs:
+            return super().dumps(obj, **kwargs)
+        return serializer.dumps(obj, default=self.default)
+
+    def loads(self, s, **kwargs):
+        return serializer.loads(s)
+
+
+app = Flask(__name__, static_folder=None)
+app.json = FastJSONProvider(app)
+app.secret_key = load_secret_key()
+# templates uit een asset build (dist/templates) gaan voor, met templates/ als fallback
+app.jinja_loader = ChoiceLoader([
+    FileSystemLoader(assets.template_folder()),
+    FileSystemLoader(os.path.join(app.root_path, 'templates')),
+])
+
+# -------------------------
+# Metrics
+# -------------------------
+HTTP_REQUEST_SECONDS = metrics.Histogram(
+    'http_request_duration_seconds', 'Latency per route', ['route', 'method', 'status'])
+HTTP_REQUEST_DB_CALLS = metrics.Histogram(
+    'http_request_db_calls', 'Aantal db calls (execute, iter_rows, transaction, ...) per request', ['route'],
+    buckets=(0, 1, 2, 3, 5, 10, 25, 50, 100))
+FETCH_JOB_SECONDS = metrics.Histogram(
+    'fetch_job_duration_seconds', 'Duur van launcher.py (subprocess) per fetch job', ['platform', 'status'])
+# gelezen uit jobs.db: de HTTP calls van alle webserver workers en cron.py samen
+UPSTREAM_REQUESTS = metrics.Counter(
+    'upstream_requests_total', 'HTTP calls naar upstream platforms (alle processen)', ['platform'],
+    callback=lambda: job_queue.upstream_calls())
+FETCH_CACHE_REQUESTS = metrics.Counter(
+    'fetch_cache_requests_total', 'Fetch cache lookups in /fetch_plugin', ['result'])
+
+
+def _count_db_call():
+    """Tel db calls binnen de huidige request"""
+    if has_request_context():
+        g.db_calls = g.get('db_calls', 0) + 1
 
-app = Flask(__name__)
-app.secret_key = secrets.token_hex(16)
 
 # initialize SocketDB (project name as your DB folder)
-db = database("plugin-craft-db")
+# storage.database: soketDB table layout met file locks, veilig voor meerdere workers en processen
+db = metrics.InstrumentedDatabase(database("plugin-craft-db"), on_execute=_count_db_call)
+
+# rows uit de oude plugins table (een kopie per owner) naar projects + user_plugins
+try:
+    moved = projects.migrate_legacy_plugins(db)
+    if moved:
+        app.logger.info("%d plugin rows gemigreerd naar projects/user_plugins", moved)
+except Exception:
+    app.logger.exception("Migratie van de plugins table mislukt")
+
+# fetch jobs worden buiten de request thread verwerkt (workers starten bij de eerste fetch)
+job_queue = JobQueue(workers=int(os.environ.get('FETCH_WORKERS', 4)))
+
+# afgeronde fetches kort bewaren zodat een piek rond populaire plugins één upstream fetch kost
+fetch_cache = TTLCache(
+    maxsize=int(os.environ.get('FETCH_CACHE_SIZE', 256)),
+    ttl=float(os.environ.get('FETCH_CACHE_TTL', 300))
+)
+
+# negatieve cache: een project dat upstream niet bestaat wordt een tijd niet opnieuw opgehaald
+missing_cache = TTLCache(
+    maxsize=int(os.environ.get('FETCH_CACHE_SIZE', 256)),
+    ttl=float(os.environ.get('FETCH_NOT_FOUND_TTL', 3600))
+)
+
+
+def _cache_fetch_result(job):
+    """Job listener: bewaar succesvolle fetch resultaten (en niet bestaande projecten) in de cache"""
+    if job and job['status'] == DONE and 'result' in job:
+        # als JSON bytes: een cache hit gaat zonder opnieuw te encoderen de response in
+        fetch_cache.set(job['key'], serializer.dumpb(job['result']))
+        missing_cache.pop(job['key'])
+    elif job and job['status'] == FAILED and job.get('error_kind') == ERROR_NOT_FOUND:
+        missing_cache.set(job['key'], job.get('error'))
+
+
+def _record_fetch_job(job):
+    """Job listener: subprocess tijd per platform (de upstream calls telt jobqueue.py zelf)"""
+    if not job or not job.get('started_at') or not job.get('finished_at'):
+        return
+    platform = (plugin_key(job['url']) or 'unknown:').split(':', 1)[0]
+    FETCH_JOB_SECONDS.observe(job['finished_at'] - job['started_at'], platform=platform, status=job['status'])
+
+
+job_queue.listeners.append(_cache_fetch_result)
+job_queue.listeners.append(_record_fetch_job)
+
+
+@app.before_request
+def _start_request_timer():
+    g.request_start = time.perf_counter()
+    g.db_calls = 0
+
+
+@app.after_request
+def _observe_request(response):
+    start = g.get('request_start')
+    if start is not None:
+        route = request.url_rule.rule if request.url_rule else 'unmatched'
+        HTTP_REQUEST_SECONDS.observe(
+            time.perf_counter() - start, route=route, method=request.method, status=response.status_code)
+        HTTP_REQUEST_DB_CALLS.observe(g.get('db_calls', 0), route=route)
+    return response
 
 
 # -------------------------
@@ -30,7 +182,7 @@ def _esc(val):
     if val is None:
         return "''"
     if isinstance(val, (dict, list)):
-        return json_module.dumps(val, ensure_ascii=False)
+        return serializer.dumps(val)
     if isinstance(val, bool):
         return "1" if val else "0"
     if isinstance(val, (int, float)):
@@ -46,57 +198,207 @@ def _row_from_single_list(result):
     return []
 
 
+# -------------------------
+# Catalogue caches (version index)
+# -------------------------
+VERSION_INDEX_TTL = float(os.environ.get('VERSION_INDEX_TTL', 60))
+_version_index = {'index': None, 'built_at': 0.0, 'stamp': None}
+_version_index_lock = threading.Lock()
+
+
+def invalidate_catalogue():
+    """Markeer afgeleide catalogus data als verouderd na een wijziging in de plugins table"""
+    _version_index['index'] = None
+    _catalogue_page['page'] = None
+    _public_json.clear()
+    # live updates direct versturen in plaats van bij de volgende poll
+    _catalogue_feed_wakeup.set()
+
+
+def get_version_index():
+    """
+    Versie index over alle plugins; opnieuw opgebouwd na wijzigingen (ook uit andere processen,
+    via catalogue_changes) of na VERSION_INDEX_TTL
+    """
+    with _version_index_lock:
+        index = _version_index['index']
+        stamp = _changes_stamp()
+        if index is None or stamp != _version_index['stamp'] or \
+                time.monotonic() - _version_index['built_at'] > VERSION_INDEX_TTL:
+            # stamp vóór het lezen: een write tijdens de opbouw geeft bij de volgende call een nieuwe stamp
+            index = VersionIndex.build((p.key, p.versions) for p in load_plugins())
+            _version_index['index'] = index
+            _version_index['built_at'] = time.monotonic()
+            _version_index['stamp'] = stamp
+        return index
+
+
+# -------------------------
+# Catalogue caches (server-side gerenderde eerste pagina)
+# -------------------------
+CATALOGUE_PAGE_SIZE = int(os.environ.get('CATALOGUE_PAGE_SIZE', 24))
+# wijzigingen buiten dit proces (cron.py, launcher.py, andere workers) komen via de
+# stamp van catalogue_changes binnen; de TTL is alleen een vangnet
+CATALOGUE_PAGE_TTL = float(os.environ.get('CATALOGUE_PAGE_TTL', 300))
+_catalogue_page = {'page': None, 'built_at': 0.0, 'stamp': None}
+_catalogue_page_lock = threading.Lock()
+
+
+@app.template_filter('truncate_url')
+def _truncate_url(url, max_length=30):
+    """Zelfde inkorting als truncateUrl() in index.html"""
+    url = url or ''
+    return url if len(url) <= max_length else url[:max_length] + '...'
+
+
+def _card_view(plugin):
+    """PluginRecord zoals de catalogus template hem toont"""
+    url = plugin.url
+    parsed = urllib.parse.urlparse(url)
+    domain = parsed.hostname or url
+    if domain.startswith('www.'):
+        domain = domain[4:]
+    return dict(
+        plugin.to_dict(),
+        # alleen http(s) links in href attributen
+        url=url if parsed.scheme in ('http', 'https') else '',
+        domain=domain,
+    )
+
+
+def _json_for_script(value):
+    """JSON die veilig in een <script> tag past"""
+    text = serializer.dumps(value)
+    return Markup(text.replace('<', '\\u003c').replace('>', '\\u003e').replace('&', '\\u0026'))
+
+
+def get_catalogue_page():
+    """
+    Gerenderde kaarten en JSON van de eerste CATALOGUE_PAGE_SIZE plugins.
+    Gedeeld tussen alle bezoekers en alleen opnieuw gerenderd na invalidate_catalogue(), als
+    catalogue_changes gewijzigd is (ook door een ander proces) of na CATALOGUE_PAGE_TTL.
+    """
+    with _catalogue_page_lock:
+        page = _catalogue_page['page']
+        stamp = _changes_stamp()
+        if page is None or stamp != _catalogue_page['stamp'] or \
+                time.monotonic() - _catalogue_page['built_at'] > CATALOGUE_PAGE_TTL:
+            # startpunt voor /api/plugins/stream (vóór de rows gelezen)
+            change_version = projects.catalogue_version(db)
+            plugins = load_public_plugins()
+            first = plugins[:CATALOGUE_PAGE_SIZE]
+            page = {
+                'cards': Markup(render_template('catalogue_cards.html', plugins=[_card_view(p) for p in first])),
+                'json': _json_for_script({
+                    'plugins': [_public_row(p) for p in first],
+                    'total': len(plugins),
+                    'complete': len(first) == len(plugins),
+                    'version': change_version,
+                }),
+            }
+            _catalogue_page['page'] = page
+            _catalogue_page['built_at'] = time.monotonic()
+            _catalogue_page['stamp'] = stamp
+        return page
+
+
+# -------------------------
+# Catalogue caches (voorgecodeerde /api/plugins/public responses)
+# -------------------------
+# per ?version= filter; begrensd omdat de filter waarde van de client komt
+PUBLIC_JSON_CACHE_SIZE = int(os.environ.get('PUBLIC_JSON_CACHE_SIZE', 64))
+_public_json = {}
+_public_json_lock = threading.Lock()
+
+
+def _public_row(record):
+    """Row van /api/plugins/public en /api/plugins/changes (project_id: sleutel voor de client cache)"""
+    row = record.to_dict()
+    row['project_id'] = record.key
+    return row
+
+
+def get_public_json(version=''):
+    """
+    Body (JSON bytes), ETag en change version van /api/plugins/public, eventueel gefilterd op
+    versie. Eén keer geëncodeerd en gedeeld tussen requests tot invalidate_catalogue(), tot
+    catalogue_changes wijzigt (ook door een ander proces) of tot CATALOGUE_PAGE_TTL.
+    """
+    with _public_json_lock:
+        cached = _public_json.get(version)
+        stamp = _changes_stamp()
+        if cached is None or stamp != cached[5] or time.monotonic() - cached[2] > CATALOGUE_PAGE_TTL:
+            # versie vóór de rows lezen: de rows zijn minstens zo nieuw, latere changes zijn idempotent
+            change_version = projects.catalogue_version(db)
+            rows = load_public_plugins()
+            public_only = any(_is_public(p) for p in rows)
+            if version:
+                keys = get_version_index().lookup(version)
+                rows = [p for p in rows if p.key in keys]
+            body = serializer.dumpb([_public_row(p) for p in rows])
+            cached = (body, hashlib.sha1(body).hexdigest(), time.monotonic(), change_version, public_only, stamp)
+            if version not in _public_json and len(_public_json) >= PUBLIC_JSON_CACHE_SIZE:
+                _public_json.clear()
+            _public_json[version] = cached
+        return cached[0], cached[1], cached[3], cached[4]
+
+
 # -------------------------
 # Plugins (replacing JSON file ops with SocketDB)
 # -------------------------
 def load_plugins():
-    """Laad de plugins data uit de database (alle plugins)."""
+    """Laad alle plugins (één PluginRecord per owner koppeling, metadata gedeeld per project)."""
     try:
-        res = db.execute("SELECT * FROM plugins")
-        return _row_from_single_list(res)
+        return projects.load_plugins(db)
     except Exception as e:
         app.logger.exception("Fout bij het laden van plugins")
         return []
 
 
 def save_plugins(plugins):
-    """
-    Replace all plugins in the table:
-    - DELETE all rows, then re-insert from provided list.
-    """
+    """Voeg plugins (PluginRecords of dicts, met hun owner) toe aan projects/user_plugins"""
     try:
         for p in plugins:
-            payload = json_module.dumps(p, ensure_ascii=False)
-            db.execute(f"INSERT INTO plugins DATA={payload}")
+            record = p if isinstance(p, PluginRecord) else PluginRecord.from_dict(p)
+            projects.add_plugin(db, record.owner, record)
+        invalidate_catalogue()
         return True
     except Exception as e:
         app.logger.exception("Fout bij het opslaan van plugins")
         return False
 
 
+def _is_public(record):
+    return bool(record.extra) and record.extra.get('public') in (1, True)
+
+
+def load_public_plugins():
+    """Alle publieke plugins (of alle plugins als geen enkel project een public vlag heeft)"""
+    plugins = load_plugins()
+    public = [p for p in plugins if _is_public(p)]
+    return public or plugins
+
+
 def get_user_plugins(username):
     """Haal plugins van specifieke gebruiker op"""
     try:
-        username_q = _esc(username)
-        res = db.execute(f"SELECT * FROM plugins WHERE owner = {username_q}")
-        return _row_from_single_list(res)
+        return projects.load_plugins(db, owner=username)
     except Exception as e:
         app.logger.exception("Fout bij get_user_plugins")
         return []
 
 
 def add_user_plugin(username, plugin_data):
-    """Voeg plugin toe voor specifieke gebruiker"""
+    """
+    Voeg plugin toe voor specifieke gebruiker. Bestaat het project al, dan wordt alleen de
+    koppeling toegevoegd; de gedeelde metadata wordt door cron.py ververst.
+    """
     try:
-        plugin_data = dict(plugin_data)
-        plugin_data['owner'] = username
-        url = plugin_data.get('url')
-        if not url:
+        record = PluginRecord.from_dict(plugin_data)
+        if not record.url:
             return False
-
-        # remove existing same owner+url then insert new
-        db.execute(f"DELETE FROM plugins WHERE owner = {_esc(username)} AND url = {_esc(url)}")
-        db.execute(f"INSERT INTO plugins DATA={json_module.dumps(plugin_data, ensure_ascii=False)}")
+        projects.add_plugin(db, username, record)
+        invalidate_catalogue()
         return True
     except Exception as e:
         app.logger.exception("Fout bij add_user_plugin")
@@ -106,7 +408,8 @@ def add_user_plugin(username, plugin_data):
 def delete_user_plugin(username, url):
     """Verwijder plugin van specifieke gebruiker"""
     try:
-        res = db.execute(f"DELETE FROM plugins WHERE owner = {_esc(username)} AND url = {_esc(url)}")
+        projects.remove_plugin(db, url, owner=username)
+        invalidate_catalogue()
         return True
     except Exception as e:
         app.logger.exception("Fout bij delete_user_plugin")
@@ -116,7 +419,8 @@ def delete_user_plugin(username, url):
 def delete_any_plugin(url):
     """Verwijder plugin (admin functie)"""
     try:
-        res = db.execute(f"DELETE FROM plugins WHERE url = {_esc(url)}")
+        projects.remove_plugin(db, url)
+        invalidate_catalogue()
         return True
     except Exception as e:
         app.logger.exception("Fout bij delete_any_plugin")
@@ -141,7 +445,7 @@ def save_users(users):
     try:
         db.execute("DELETE FROM users")
         for u in users:
-            payload = json_module.dumps(u, ensure_ascii=False)
+            payload = serializer.dumps(u)
             db.execute(f"INSERT INTO users DATA={payload}")
         return True
     except Exception as e:
@@ -181,7 +485,7 @@ def save_settings(settings):
         if not isinstance(settings, dict):
             return False
         db.execute("DELETE FROM settings")
-        db.execute(f"INSERT INTO settings DATA={json_module.dumps(settings, ensure_ascii=False)}")
+        db.execute(f"INSERT INTO settings DATA={serializer.dumps(settings)}")
         return True
     except Exception as e:
         app.logger.exception("Fout bij save_settings")
@@ -252,37 +556,89 @@ def get_register_status():
 # -------------------------
 # Routes (static pages)
 # -------------------------
+# icoon zonder thumbnail (origineel bestand): zo lang cachen voordat de client opnieuw vraagt
+ICON_FALLBACK_MAX_AGE = int(os.environ.get('ICON_FALLBACK_MAX_AGE', 300))
+
+
+def _send_revalidated(path, mimetype=None):
+    """Serveer een ongebouwd bestand met ETag, zodat herhaalde requests een 304 krijgen"""
+    response = send_file(path, mimetype=mimetype, conditional=True)
+    response.headers['Cache-Control'] = assets.REVALIDATE
+    return response
+
+
 @app.route('/')
 def index():
-    """Serveer de index.html pagina"""
-    return send_file('index.html')
+    """Catalogus pagina met de eerste pagina plugins en de login status al ingebed"""
+    response = app.make_response(render_template(
+        'index.html', catalogue=get_catalogue_page(), auth=_auth_status()))
+    # de pagina hangt van de sessie af: niet in gedeelde caches, wel 304 bij een gelijke ETag
+    response.headers['Cache-Control'] = 'private, no-cache'
+    response.add_etag()
+    return response.make_conditional(request)
 
 
 @app.route('/login-page')
 def login_page():
     """Serveer de login.html pagina"""
-    return send_file('components/user/login.html')
+    return _send_revalidated('components/user/login.html')
 
 
 @app.route('/style.css')
 def serve_css():
     """Serveer de CSS file"""
-    return send_file('style.css', mimetype='text/css')
+    return _send_revalidated('style.css', mimetype='text/css')
 
 
 @app.route('/app.js')
 def serve_js():
     """Serveer de JS file"""
-    return send_file('app.js', mimetype='application/javascript')
+    return _send_revalidated('app.js', mimetype='application/javascript')
 
 
 @app.route('/images/<path:filename>')
 def serve_image(filename):
     """Serveer afbeeldingen uit de images map (keeps your old behavior)."""
     try:
-        return send_file(f'images/{filename}')
-    except FileNotFoundError:
+        response = send_from_directory('images', filename)
+    except NotFound:
         return "Image not found", 404
+    response.headers['Cache-Control'] = assets.REVALIDATE
+    return response
+
+
+@app.route('/metrics')
+def metrics_endpoint():
+    """Prometheus metrics van dit proces"""
+    return app.response_class(metrics.render(), mimetype='text/plain; version=0.0.4')
+
+
+@app.route('/static/<path:filename>')
+def serve_static(filename):
+    """Serveer gefingerprinte, vooraf gecomprimeerde assets uit dist/ (immutable caching)"""
+    response = assets.send_static(filename)
+    if response is None:
+        return "Not found", 404
+    return response
+
+
+@app.route('/icons/<digest>')
+def serve_icon(digest):
+    """Serveer een lokaal gespiegeld plugin icoon (content-addressed, dus onveranderlijk)"""
+    size = request.args.get('size', icons.DEFAULT_SIZE, type=int)
+    path, mimetype, variant = icons.icon_file(digest, size)
+    if not path:
+        return "Icon not found", 404
+    # ETag van wat echt geleverd wordt (een onbekende size wordt DEFAULT_SIZE)
+    response = send_file(path, mimetype=mimetype, conditional=True, etag=f"{digest}-{variant}")
+    if variant == 'orig':
+        # nog geen thumbnail: kort cachen, zodat een later gemaakte thumbnail de client bereikt
+        response.headers['Cache-Control'] = f'public, max-age={ICON_FALLBACK_MAX_AGE}'
+    else:
+        response.headers['Cache-Control'] = 'public, max-age=31536000, immutable'
+    response.headers['X-Content-Type-Options'] = 'nosniff'
+    response.headers['Content-Security-Policy'] = "default-src 'none'; style-src 'unsafe-inline'"
+    return response
 
 
 # -------------------------
@@ -298,23 +654,318 @@ def api_plugins():
     else:
         username = session.get('user')
         plugins = get_user_plugins(username)
-    return jsonify(plugins)
+    return jsonify(rows_from_records(plugins))
 
 
 @app.route('/api/plugins/public')
 def api_plugins_public():
-    """API endpoint voor alle plugins data (publiek toegankelijk)"""
-    # Return all plugins marked public, or all plugins if your schema doesn't have privacy flag
+    """API endpoint voor alle plugins data (publiek toegankelijk); ?version=1.21 of ?version=1.20.x filtert"""
+    body, etag, change_version, public_only = get_public_json(request.args.get('version') or '')
+    response = app.response_class(body, mimetype='application/json')
+    response.headers['Cache-Control'] = 'no-cache'
+    # startpunt voor /api/plugins/changes
+    response.headers['X-Catalogue-Version'] = str(change_version)
+    response.headers['X-Catalogue-Public-Only'] = '1' if public_only else '0'
+    response.set_etag(etag)
+    return response.make_conditional(request)
+
+
+@app.route('/api/plugins/changes')
+def api_plugins_changes():
+    """
+    Wijzigingen in /api/plugins/public sinds ?since=<versie>: per gewijzigd project de huidige
+    rows (één per koppeling) met op 'upsert', of op 'delete' als het project niet meer in de
+    catalogus staat. reset: true als since te oud is; haal dan de hele lijst opnieuw op.
+    """
     try:
-        # If plugins have a 'public' boolean/property, filter on it; otherwise return all
-        res = db.execute("SELECT * FROM plugins WHERE public = 1")
-        rows = _row_from_single_list(res)
-        if rows:
-            return jsonify(rows)
-        # fallback - return all
-        return jsonify(load_plugins())
+        since = int(request.args.get('since', ''))
+    except ValueError:
+        return jsonify({'error': 'Ongeldige of ontbrekende since'}), 400
+    version, changes = projects.changes_since(db, since)
+    if changes is None:
+        return jsonify({'version': version, 'reset': True})
+    public_only = get_public_json()[3]
+    result = [_change_entry(key, records, public_only) for key, records in changes]
+    response = jsonify({'version': version, 'public_only': public_only, 'changes': result})
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+
+def _change_entry(key, records, public_only):
+    """Eén gewijzigd project: upsert met de huidige rows, of delete als er niets meer getoond wordt"""
+    if public_only:
+        # dezelfde regel als load_public_plugins: met public vlaggen alleen de publieke projecten
+        records = [r for r in records if _is_public(r)]
+    if records:
+        return {'op': 'upsert', 'project_id': key, 'rows': [_public_row(r) for r in records]}
+    return {'op': 'delete', 'project_id': key}
+
+
+# -------------------------
+# Live updates: /api/plugins/stream (Server-Sent Events)
+# -------------------------
+# Eén feed thread per proces leest catalogue_changes en verdeelt de wijzigingen via
+# de broadcaster over alle open streams. Schrijfacties in dit proces wekken de
+# feed direct (invalidate_catalogue); wijzigingen van cron.py, launcher.py en andere
+# workers komen binnen STREAM_POLL_INTERVAL seconden door.
+#
+# Een open stream houdt een server thread bezet (gunicorn gthread: WEB_THREADS per
+# worker). Per proces zijn er hoogstens STREAM_MAX_CONNECTIONS streams open (serve.py
+# zet dit op de helft van de threads); daarboven volgt 503 met Retry-After en
+# probeert de client het later opnieuw, zodat gewone requests altijd een thread hebben.
+STREAM_MAX_CONNECTIONS = int(os.environ.get('STREAM_MAX_CONNECTIONS', 2))
+STREAM_RETRY_AFTER = int(os.environ.get('STREAM_RETRY_AFTER', 30))
+STREAM_POLL_INTERVAL = float(os.environ.get('STREAM_POLL_INTERVAL', 2))
+STREAM_KEEPALIVE = float(os.environ.get('STREAM_KEEPALIVE', 15))
+catalogue_events = Broadcaster(maxsize=int(os.environ.get('STREAM_QUEUE_SIZE', 1000)))
+_catalogue_feed = {'thread': None, 'version': None, 'stamp': None}
+_catalogue_feed_lock = threading.Lock()
+_catalogue_feed_wakeup = threading.Event()
+_open_streams = {'count': 0}
+_open_streams_lock = threading.Lock()
+
+
+def _changes_stamp():
+    """Verandert bij elke write van catalogue_changes (atomisch vervangen bestand)"""
+    try:
+        st = os.stat(db.table_path(projects.CHANGES))
+    except OSError:
+        return None
+    return st.st_ino, st.st_mtime_ns, st.st_size
+
+
+def _reserve_stream():
+    """Reserveer een stream plek in dit proces; False als STREAM_MAX_CONNECTIONS bereikt is"""
+    with _open_streams_lock:
+        if _open_streams['count'] >= STREAM_MAX_CONNECTIONS:
+            return False
+        _open_streams['count'] += 1
+        return True
+
+
+def _release_stream(subscription=None):
+    """Geef de plek van een gesloten stream vrij (response.call_on_close)"""
+    if subscription is not None:
+        catalogue_events.unsubscribe(subscription)
+    with _open_streams_lock:
+        _open_streams['count'] -= 1
+
+
+def subscribe_catalogue():
+    """
+    Nieuwe abonnee op de feed (start de feed thread zo nodig). De feed versie staat vast
+    voordat de abonnee zijn gemiste wijzigingen leest, zodat er niets tussen valt.
+    """
+    with _catalogue_feed_lock:
+        subscription = catalogue_events.subscribe()
+        if _catalogue_feed['version'] is None:
+            _catalogue_feed['stamp'] = _changes_stamp()
+            _catalogue_feed['version'] = projects.catalogue_version(db)
+        if _catalogue_feed['thread'] is None:
+            thread = threading.Thread(target=_catalogue_feed_loop, name='catalogue-feed', daemon=True)
+            _catalogue_feed['thread'] = thread
+            thread.start()
+    return subscription
+
+
+def _catalogue_feed_loop():
+    while True:
+        _catalogue_feed_wakeup.wait(STREAM_POLL_INTERVAL)
+        _catalogue_feed_wakeup.clear()
+        try:
+            publish_catalogue_changes()
+        except Exception:
+            app.logger.exception("Fout in de catalogus feed")
+
+
+def publish_catalogue_changes():
+    """Stuur nieuwe regels uit catalogue_changes naar alle open streams"""
+    with _catalogue_feed_lock:
+        if not len(catalogue_events):
+            # niemand luistert: de volgende abonnee begint vanaf de dan huidige versie
+            _catalogue_feed['version'] = None
+            return
+        stamp = _changes_stamp()
+        if _catalogue_feed['version'] is None or stamp == _catalogue_feed['stamp']:
+            return
+        version, changes = projects.changes_since(db, _catalogue_feed['version'])
+        _catalogue_feed['stamp'] = stamp
+        _catalogue_feed['version'] = version
+        if changes is None:
+            catalogue_events.publish({'version': version, 'reset': True})
+            return
+        for key, records in changes:
+            catalogue_events.publish({'version': version, 'project_id': key, 'records': records})
+
+
+def _stream_catalogue(subscription, since, public_only):
+    """Generator voor /api/plugins/stream: eerst de gemiste wijzigingen, daarna live"""
+    def change_event(version, key, records):
+        only = public_only and get_public_json()[3]
+        return _sse('change', dict(_change_entry(key, records, only), version=version), event_id=version)
+
+    # client herverbindt na 5 s; Last-Event-ID is dan de laatste ontvangen versie
+    yield b'retry: 5000\n\n'
+    if since is None:
+        sent = projects.catalogue_version(db)
+    else:
+        sent, changes = projects.changes_since(db, since)
+        if changes is None:
+            yield _sse('reset', {'version': sent}, event_id=sent)
+            return
+        for key, records in changes:
+            yield change_event(sent, key, records)
+    yield _sse('ready', {'version': sent}, event_id=sent)
+    while True:
+        event = subscription.get(timeout=STREAM_KEEPALIVE)
+        if subscription.overflowed:
+            # te veel gemist: de client haalt de wijzigingen zelf op
+            yield _sse('reset', {'version': sent})
+            return
+        if event is None:
+            yield b': keepalive\n\n'
+            continue
+        if event['version'] <= sent:
+            # al meegestuurd bij de gemiste wijzigingen
+            continue
+        if event.get('reset'):
+            yield _sse('reset', {'version': event['version']}, event_id=event['version'])
+            return
+        yield change_event(event['version'], event['project_id'], event['records'])
+
+
+@app.route('/api/plugins/stream')
+def api_plugins_stream():
+    """
+    Wijzigingen in de catalogus als Server-Sent Events ('change', zelfde vorm als de entries van
+    /api/plugins/changes, met version als event id). Met ?since= of Last-Event-ID komen eerst
+    de gemiste wijzigingen. ?all=1 (co-admins) laat ook niet-publieke projecten zien.
+    """
+    since = request.headers.get('Last-Event-ID') or request.args.get('since')
+    try:
+        since = int(since) if since not in (None, '') else None
+    except ValueError:
+        return jsonify({'error': 'Ongeldige since'}), 400
+    public_only = True
+    if request.args.get('all') == '1':
+        user = get_current_user()
+        if not user or user.get('role') not in ['admin', 'co-admin']:
+            return jsonify({'error': 'Co-Admin rechten vereist'}), 403
+        public_only = False
+
+    if not _reserve_stream():
+        # alle stream plekken bezet: de client probeert het na Retry-After opnieuw
+        response = app.response_class(f"retry: {STREAM_RETRY_AFTER * 1000}\n\n", status=503,
+                                      mimetype='text/event-stream')
+        response.headers['Retry-After'] = str(STREAM_RETRY_AFTER)
+        return response
+    try:
+        subscription = subscribe_catalogue()
     except Exception:
-        return jsonify(load_plugins())
+        _release_stream()
+        raise
+    response = app.response_class(stream_with_context(_stream_catalogue(subscription, since, public_only)),
+                                  mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    # de server sluit de response altijd (ook als de client wegvalt of de generator nooit start)
+    response.call_on_close(lambda: _release_stream(subscription))
+    return response
+
+
+# -------------------------
+# Typeahead: /api/plugins/suggest
+# -------------------------
+# Eén SuggestIndex per proces. De eerste opbouw (seconden bij 100k projecten) en
+# het bijwerken gebeuren in een achtergrond thread; daarna worden alleen de
+# projecten uit catalogue_changes bijgewerkt. Zolang er nog geen index is geeft
+# de endpoint een lege lijst met building: true.
+SUGGEST_MAX_LIMIT = int(os.environ.get('SUGGEST_MAX_LIMIT', 25))
+SUGGEST_MAX_QUERY = 100
+_suggest = {'index': None, 'stamp': None, 'thread': None}
+_suggest_lock = threading.Lock()
+
+
+def _suggest_items():
+    """(key, PluginRecord, aantal owners, publiek) per project, voor SuggestIndex.build"""
+    owners = projects.owner_counts(db)
+    for key, record in projects.iter_projects(db):
+        yield key, record, owners.get(key, 0), _is_public(record)
+
+
+def get_suggest_index():
+    """De typeahead index (None tot de eerste opbouw klaar is); start zo nodig een refresh"""
+    with _suggest_lock:
+        outdated = _suggest['index'] is None or _changes_stamp() != _suggest['stamp']
+        if outdated and _suggest['thread'] is None:
+            thread = threading.Thread(target=_refresh_suggest_index, name='suggest-index', daemon=True)
+            _suggest['thread'] = thread
+            thread.start()
+        return _suggest['index']
+
+
+def _refresh_suggest_index():
+    """Werk de index bij met de nieuwe wijzigingen, of bouw hem (opnieuw) op"""
+    try:
+        # stamp en versie vóór het lezen: wat daarna verandert komt bij de volgende refresh
+        stamp = _changes_stamp()
+        index = _suggest['index']
+        changes = None
+        if index is not None:
+            version, changes = projects.changes_since(db, index.version)
+        if changes is None:
+            version = projects.catalogue_version(db)
+            index = SuggestIndex.build(_suggest_items())
+            # de index (honderdduizenden objecten) buiten de cyclische GC houden; anders kost de
+            # eerste volledige GC na de opbouw (~200 ms bij 100k projecten) een willekeurige request
+            gc.freeze()
+        else:
+            for key, records in changes:
+                record = records[0].replace(owner=None) if records else None
+                owners = sum(1 for r in records if r.owner)
+                index.update(key, record, owners, record is not None and _is_public(record))
+        index.version = version
+        _suggest['index'] = index
+        _suggest['stamp'] = stamp
+    except Exception:
+        app.logger.exception("Fout bij het bijwerken van de typeahead index")
+    finally:
+        with _suggest_lock:
+            _suggest['thread'] = None
+
+
+@app.route('/api/plugins/suggest')
+def api_plugins_suggest():
+    """
+    Typeahead voor de catalogus: de best passende projecten voor ?q= (woord prefixen in titel
+    of auteur, kleine typo's toegestaan), hoogstens ?limit= (standaard 8, max SUGGEST_MAX_LIMIT).
+    """
+    try:
+        limit = int(request.args.get('limit', SUGGEST_LIMIT))
+    except ValueError:
+        return jsonify({'error': 'Ongeldige limit'}), 400
+    if not 1 <= limit <= SUGGEST_MAX_LIMIT:
+        return jsonify({'error': f'limit moet tussen 1 en {SUGGEST_MAX_LIMIT} liggen'}), 400
+    query = request.args.get('q', '')[:SUGGEST_MAX_QUERY]
+    index = get_suggest_index()
+    if index is None:
+        result = {'query': query, 'suggestions': [], 'building': True}
+    else:
+        result = {'query': query, 'suggestions': index.suggest(query, limit), 'version': index.version}
+    response = jsonify(result)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+
+@app.route('/api/versions')
+def api_versions():
+    """Alle ondersteunde Minecraft versies en reeksen (nieuwste eerst) met het aantal plugins"""
+    index = get_version_index()
+    return jsonify({
+        'versions': index.versions(),
+        'ranges': index.ranges(),
+        'counts': index.counts()
+    })
 
 
 # -------------------------
@@ -340,7 +991,7 @@ def register():
             return jsonify({'error': 'Gebruikersnaam bestaat al'}), 400
 
         user_row = {"username": username, "password": hash_password(password)}
-        db.execute(f"INSERT INTO users DATA={json_module.dumps(user_row, ensure_ascii=False)}")
+        db.execute(f"INSERT INTO users DATA={serializer.dumps(user_row)}")
         return jsonify({'success': True})
     except Exception as e:
         app.logger.exception("Fout bij register")
@@ -386,15 +1037,20 @@ def logout():
     return jsonify({'success': True})
 
 
-@app.route('/auth-status')
-def auth_status():
-    """Check login status"""
+def _auth_status():
+    """Login status van de huidige sessie (ook ingebed in de index pagina)"""
     user = get_current_user()
-    return jsonify({
+    return {
         'logged_in': ('user' in session) or ('admin' in session), 
         'username': session.get('user') or session.get('admin'),
         'role': user.get('role', 'user') if user else ('admin' if 'admin' in session else None)
-    })
+    }
+
+
+@app.route('/auth-status')
+def auth_status():
+    """Check login status"""
+    return jsonify(_auth_status())
 
 
 @app.route('/registration-status')
@@ -414,12 +1070,8 @@ def registration_status():
 # -------------------------
 @app.route('/admin')
 def admin_panel():
-    """Admin panel pagina"""
-    users = db.execute("SELECT * FROM users")
-    plugins = db.execute("SELECT * FROM plugins")
-    totalUsers = len(users) if users else 0
-    totalPlugins = len(plugins) if plugins else 0
-    return render_template('admin/admin.html', totalUsers=totalUsers, totalPlugins=totalPlugins)
+    """Admin panel pagina (de tellers vult de pagina zelf via /admin/users en /admin/plugins)"""
+    return render_template('admin/admin.html')
 
 
 @app.route('/admin/login', methods=['POST'])
@@ -461,14 +1113,14 @@ def admin_check_session():
 def admin_get_users():
     """Haal alle gebruikers op met plugin counts"""
     users = load_users()
-    plugins = load_plugins()
+    # één telling over alle plugins in plaats van een scan per gebruiker
+    counts = Counter(p.owner for p in load_plugins())
     user_data = []
     for u in users:
-        plugin_count = len([p for p in plugins if p.get('owner') == u.get('username')])
         user_data.append({
             'username': u.get('username'),
             'role': u.get('role', 'user'),
-            'plugin_count': plugin_count
+            'plugin_count': counts.get(u.get('username'), 0)
         })
     return jsonify(user_data)
 
@@ -530,8 +1182,11 @@ def admin_change_role(username):
 @app.route('/admin/plugins', methods=['GET'])
 @require_co_admin
 def admin_get_plugins():
-    """Haal alle plugins op"""
-    return jsonify(load_plugins())
+    """Haal alle plugins op (met project_id en de change version voor /api/plugins/stream?all=1)"""
+    change_version = projects.catalogue_version(db)
+    response = jsonify([_public_row(p) for p in load_plugins()])
+    response.headers['X-Catalogue-Version'] = str(change_version)
+    return response
 
 
 @app.route('/admin/plugins/<path:url>', methods=['DELETE'])
@@ -544,34 +1199,210 @@ def admin_delete_plugin(url):
 
 
 # -------------------------
-# Fetch plugin via launcher.py (keeps original behavior)
+# Fetch plugin via job queue (launcher.py draait in een worker)
 # -------------------------
 @app.route('/fetch_plugin', methods=['POST'])
 def fetch_plugin():
-    """Haal plugin data op voor een gegeven URL"""
+    """Zet het ophalen van plugin data in de queue en retourneer een job id"""
     try:
         data = request.get_json() or {}
-        url = data.get('url')
+        url = (data.get('url') or '').strip()
         if not url:
             return jsonify({'error': 'Geen URL opgegeven'}), 400
 
-        # Run launcher.py (same behaviour as original)
-        result = subprocess.run(
-            [sys.executable, 'launcher.py', url],
-            capture_output=True,
-            text=True,
-            check=True
-        )
-        plugin_data = json_module.loads(result.stdout)
-        return jsonify(plugin_data)
-    except subprocess.CalledProcessError as e:
-        app.logger.exception("launcher.py failed")
-        return jsonify({'error': f'Fout bij ophalen plugin data: {e.stderr}'}), 500
+        if not plugin_key(url):
+            return jsonify({'error': 'Ongeldige of niet ondersteunde URL'}), 400
+
+        key = job_key(url)
+        if key in missing_cache:
+            FETCH_CACHE_REQUESTS.inc(result='not_found')
+            return jsonify({'error': 'Project niet gevonden', 'error_kind': ERROR_NOT_FOUND}), 404
+
+        cached = fetch_cache.get(key)
+        result = 'hit' if cached is not None else 'miss'
+        if cached is None:
+            # al bekend project: de gedeelde metadata (ververst door cron.py) in plaats van een upstream fetch
+            project = projects.get_project(db, key)
+            if project is not None:
+                cached = serializer.dumpb(project.to_dict())
+                fetch_cache.set(key, cached)
+                result = 'project'
+        FETCH_CACHE_REQUESTS.inc(result=result)
+        if cached is not None:
+            # het gecachte resultaat is al JSON: alleen de envelop eromheen encoderen
+            head = serializer.dumpb({'job_id': None, 'status': DONE, 'cached': True})
+            return app.response_class(head[:-1] + b',"result":' + cached + b'}', mimetype='application/json')
+
+        job_queue.start()
+        job_id = job_queue.submit(url, priority=PRIORITY_INTERACTIVE)
+        job = job_queue.get(job_id)
+        return jsonify({'job_id': job_id, 'status': job['status']}), 202
     except Exception as e:
         app.logger.exception("Unexpected fetch_plugin error")
         return jsonify({'error': f'Onverwachte fout: {str(e)}'}), 500
 
 
+@app.route('/fetch_plugin/<job_id>', methods=['GET'])
+def fetch_plugin_status(job_id):
+    """Status en resultaat van een fetch job"""
+    job = job_queue.get(job_id)
+    if not job:
+        return jsonify({'error': 'Job niet gevonden'}), 404
+    # jobs die door een ander proces (bv. cron.py) zijn afgerond komen zo ook in de cache
+    _cache_fetch_result(job)
+    return jsonify(job)
+
+
+FETCH_STREAM_POLL = float(os.environ.get('FETCH_STREAM_POLL', 0.2))
+# velden die de preview toont
+FETCH_STREAM_FIELDS = ('title', 'icon', 'author', 'description', 'versions')
+
+
+def _sse(event, data, event_id=None):
+    head = b'id: %d\n' % event_id if event_id is not None else b''
+    return head + b'event: ' + event.encode() + b'\ndata: ' + serializer.dumpb(data) + b'\n\n'
+
+
+def _stream_fetch_job(job_id):
+    """
+    Generator voor /fetch_plugin/<job_id>/stream: een 'field' event per veld zodra launcher.py
+    het heeft (titel eerst), daarna 'done' met het volledige resultaat of 'failed'.
+    """
+    sent = set()
+    deadline = time.time() + job_queue.timeout + 30
+    while True:
+        job = job_queue.get(job_id)
+        if job is None:
+            yield _sse('failed', {'error': 'Job niet gevonden'})
+            return
+        fields = job.get('result') if job['status'] == DONE else job.get('partial')
+        for field, value in (fields or {}).items():
+            if field in FETCH_STREAM_FIELDS and field not in sent:
+                sent.add(field)
+                yield _sse('field', {'field': field, 'value': value})
+        if job['status'] == DONE:
+            _cache_fetch_result(job)
+            yield _sse('done', job['result'])
+            return
+        if job['status'] == FAILED:
+            _cache_fetch_result(job)
+            yield _sse('failed', {'error': job.get('error'), 'error_kind': job.get('error_kind')})
+            return
+        if time.time() > deadline:
+            yield _sse('failed', {'error': 'Timeout', 'error_kind': ERROR_TIMEOUT})
+            return
+        time.sleep(FETCH_STREAM_POLL)
+
+
+@app.route('/fetch_plugin/<job_id>/stream', methods=['GET'])
+def fetch_plugin_stream(job_id):
+    """Voortgang van een fetch job als Server-Sent Events (de preview vult zich per veld)"""
+    response = app.response_class(stream_with_context(_stream_fetch_job(job_id)), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    # geen buffering door een reverse proxy (nginx)
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
+
+# -------------------------
+# Bulk import: veel URLs in één request, voortgang als NDJSON
+# -------------------------
+IMPORT_MAX_URLS = int(os.environ.get('IMPORT_MAX_URLS', 500))
+IMPORT_TIMEOUT = float(os.environ.get('IMPORT_TIMEOUT', 900))
+IMPORT_POLL_INTERVAL = 0.5
+
+
+def _import_line(**fields):
+    return serializer.dumpb(fields) + b'\n'
+
+
+def _import_plugins(username, urls):
+    """
+    Generator voor /api/plugins/import: één NDJSON regel per URL zodra die klaar is en een
+    slotregel. Alle gelukte plugins worden aan het eind in één commit gekoppeld, ook als de
+    client halverwege afhaakt.
+    """
+    records = {}
+    pending = {}  # job_id -> (key, url)
+    failed = 0
+    seen = set()
+    try:
+        for url in urls:
+            if not plugin_key(url):
+                failed += 1
+                yield _import_line(url=url, status='invalid', error='Ongeldige of niet ondersteunde URL')
+                continue
+            key = job_key(url)
+            if key in seen:
+                yield _import_line(url=url, status='duplicate', key=key)
+                continue
+            seen.add(key)
+            if key in missing_cache:
+                failed += 1
+                yield _import_line(url=url, status='failed', key=key, error='Project niet gevonden')
+                continue
+            # bekend project of recent opgehaald: geen upstream fetch nodig
+            project = projects.get_project(db, key)
+            cached = fetch_cache.get(key) if project is None else None
+            if project is not None or cached is not None:
+                record = project or PluginRecord.from_json(cached)
+                records[key] = record
+                yield _import_line(url=url, status=DONE, key=key, title=record.title, cached=True)
+                continue
+            job_queue.start()
+            pending[job_queue.submit(url, priority=PRIORITY_IMPORT)] = (key, url)
+            yield _import_line(url=url, status='queued', key=key)
+
+        deadline = time.time() + IMPORT_TIMEOUT
+        while pending and time.time() < deadline:
+            time.sleep(IMPORT_POLL_INTERVAL)
+            for job_id, (key, url) in list(pending.items()):
+                job = job_queue.get(job_id)
+                if job and job['status'] == DONE:
+                    record = PluginRecord.from_dict(job['result'])
+                    records[key] = record
+                    yield _import_line(url=url, status=DONE, key=key, title=record.title)
+                elif job is None or job['status'] == FAILED:
+                    failed += 1
+                    yield _import_line(url=url, status='failed', key=key,
+                                       error=(job or {}).get('error', 'Job niet gevonden'),
+                                       error_kind=(job or {}).get('error_kind'))
+                else:
+                    continue
+                del pending[job_id]
+        for key, url in pending.values():
+            failed += 1
+            yield _import_line(url=url, status='failed', key=key, error='Timeout')
+        pending.clear()
+    finally:
+        if records:
+            projects.add_plugins(db, username, list(records.values()))
+            invalidate_catalogue()
+    yield _import_line(done=True, added=len(records), failed=failed)
+
+
+@app.route('/api/plugins/import', methods=['POST'])
+@require_login
+def import_plugins():
+    """
+    Voeg veel plugins tegelijk toe: {"urls": [...]} of platte tekst met één URL per regel.
+    De fetches lopen parallel in de job queue; de response is NDJSON met de voortgang per URL.
+    """
+    data = request.get_json(silent=True)
+    if isinstance(data, dict):
+        urls = data.get('urls') or []
+    else:
+        urls = request.get_data(as_text=True).splitlines()
+    urls = [u.strip() for u in urls if isinstance(u, str) and u.strip() and not u.strip().startswith('#')]
+    if not urls:
+        return jsonify({'error': 'Geen URLs opgegeven'}), 400
+    if len(urls) > IMPORT_MAX_URLS:
+        return jsonify({'error': f'Maximaal {IMPORT_MAX_URLS} URLs per import'}), 400
+
+    username = session.get('admin') or session.get('user')
+    return app.response_class(stream_with_context(_import_plugins(username, urls)), mimetype='application/x-ndjson')
+
+
 # -------------------------
 # Add / Delete plugin endpoints (preserve original names & behavior)
 # -------------------------
@@ -660,5 +1491,6 @@ def change_password():
 # -------------------------
 # Run
 # -------------------------
+# Alleen voor ontwikkeling; productie draait via serve.py
 if __name__ == '__main__':
-    app.run(debug=True, host='0.0.0.0', port=5000)
\ No newline at end of file
+    app.run(debug=os.environ.get('FLASK_DEBUG', '1') == '1', host='0.0.0.0', port=5000)
\ No newline at end of file